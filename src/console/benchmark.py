@@ -0,0 +1,168 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, Optional
+)
+from pathlib import Path
+from functools import partial
+from multiprocessing import get_context
+from socket import socket, create_connection
+from tempfile import TemporaryDirectory
+from time import sleep, monotonic
+from asyncio import run
+from uuid import uuid4
+from .. import moca_modules as mzk
+from ..moca_modules.moca_dev import (
+    MocaFakeRedis, MocaFakeMysql, http_bench, save_bench_results, load_bench_results, format_bench_results
+)
+from .. import core
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+BENCHMARK_API_KEY: str = f'moca-benchmark-{uuid4().hex}'
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Benchmark --------------------------------------------------------------------------
+
+
+def get_mysql_results(items: int) -> Dict[str, Any]:
+    """Return the results of the queries used by the benchmarked routes."""
+    return {
+        core.GET_NEWS_QUERY: tuple(
+            (i, 'simple-text', f'title {i}', f'detail of the news {i}. ' * 4, f'https://example.com/news/{i}',
+             None, i < 2)
+            for i in range(items)
+        ),
+        core.GET_SLIDE_AD_QUERY: tuple(
+            (i, f'/static/ad/{i}.png', f'https://example.com/ad/{i}', i < 1) for i in range(items)
+        ),
+        core.GET_AI_INFO_QUERY: tuple(
+            (f'ai {i}', f'twitter_{i}', f'/static/img/{i}.png', f'/static/icon/{i}.png', f'/static/bg/{i}.png',
+             f'https://example.com/ai/{i}', 'Hello!', 'The details of the ai. ' * 8)
+            for i in range(items)
+        ),
+        core.CLIENT_COUNT_QUERY: ((items * 1000,),),
+    }
+
+
+def get_routes() -> Dict[str, Dict[str, Any]]:
+    """Return the benchmarked routes, all requests go through the full middleware chain."""
+    api = {'api_key': BENCHMARK_API_KEY}
+    return {
+        'get-news': {'path': '/moca-virtual-dm/get-news', 'params': api},
+        'get-slide-ad': {'path': '/moca-virtual-dm/get-slide-ad', 'params': api},
+        'get-ai-info-list': {'path': '/moca-virtual-dm/get-ai-info-list', 'params': api},
+        'configs': {'path': '/moca-virtual-dm/configs', 'params': {**api, 'client_type': 'app'}},
+        'init': {
+            'method': 'POST',
+            'path': '/moca-virtual-dm/init',
+            'json': {**api, 'client_type': 'app', 'client_id': str(uuid4())},
+        },
+    }
+
+
+def _prepare_configs(directory: Path) -> None:
+    """
+    Write the config files for the benchmark server,
+    so the benchmark can't ban the local address or change the real config files.
+    """
+    system_config = mzk.load_json_from_file(core.SYSTEM_CONFIG)
+    system_config['dos_detect'] = 2 ** 62
+    system_config['maintenance_mode'] = False
+    mzk.dump_json_to_file(system_config, directory.joinpath('system.json'))
+    mzk.dump_json_to_file([], directory.joinpath('ip_blacklist.json'))
+    mzk.dump_json_to_file([{
+        'key': BENCHMARK_API_KEY, 'status': True, 'allowed_path': ['/'], 'required': {'headers': {}, 'args': {}},
+        'ip': '*', 'rate': '*', 'delay': 0, 'info': 'benchmark',
+    }], directory.joinpath('api_key.json'))
+
+
+def _serve(port: int, workers: int, directory: Path, items: int, redis_latency: float, mysql_latency: float) -> None:
+    """Run the server with the fakes of mysql and redis, this function is called in a child process."""
+    core.SERVER_CONFIG['address'].update({'host': '127.0.0.1', 'port': port, 'unix': None, 'use_ipv6': False})
+    core.SERVER_CONFIG['ssl'] = {'cert': None, 'key': None}
+    core.SERVER_CONFIG['workers'] = workers
+    core.SERVER_CONFIG['access_log'] = False
+    core.SERVER_CONFIG['debug'] = False
+    core.SERVER_CONFIG['auto_reload'] = False
+    core.SERVER_CONFIG['rate_limiter_redis_storage'] = None
+    core.SYSTEM_CONFIG = directory.joinpath('system.json')
+    core.IP_BLACKLIST_FILE = directory.joinpath('ip_blacklist.json')
+    core.API_KEY_FILE = directory.joinpath('api_key.json')
+    core.system_config = mzk.MocaConfig(core.SYSTEM_CONFIG, manual_reload=True)
+    # the server creates the database clients in before_server_start.
+    mzk.MocaRedis = partial(MocaFakeRedis, latency=redis_latency)
+    mzk.MocaMysql = partial(MocaFakeMysql, results=get_mysql_results(items), latency=mysql_latency)
+    from ..server import moca_sanic
+    moca_sanic.run()
+
+
+def _get_free_port() -> int:
+    with socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, process, timeout: float = 60.0) -> bool:
+    """Wait until the server accepts connections."""
+    deadline = monotonic() + timeout
+    while monotonic() < deadline and process.is_alive():
+        try:
+            create_connection(('127.0.0.1', port), timeout=1).close()
+            return True
+        except OSError:
+            sleep(0.2)
+    return False
+
+
+def run_benchmark(
+        concurrency: int = 32,
+        duration: float = 10.0,
+        warmup: float = 1.0,
+        workers: int = 1,
+        items: int = 20,
+        redis_latency: float = 0.0,
+        mysql_latency: float = 0.0,
+        output: Optional[Path] = None,
+        baseline: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Start the server with the fakes of mysql and redis in a child process,
+    and benchmark the routes from this process with a concurrent http client.
+    :param concurrency: the number of the concurrent clients.
+    :param duration: the seconds to test each route.
+    :param warmup: the seconds to send requests before recording.
+    :param workers: the number of the server workers, the fakes are not shared between the workers.
+    :param items: the number of the rows returned by the fake mysql.
+    :param redis_latency: the simulated round trip time of a redis command (seconds).
+    :param mysql_latency: the simulated time to execute a mysql query (seconds).
+    :param output: save the results to this json file.
+    :param baseline: compare the results with this json file.
+    :return: the results.
+    """
+    port = _get_free_port()
+    with TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        _prepare_configs(directory)
+        process = get_context('fork').Process(
+            target=_serve, args=(port, workers, directory, items, redis_latency, mysql_latency),
+        )
+        process.start()
+        try:
+            if not _wait_for_port(port, process):
+                raise RuntimeError("The benchmark server didn't start.")
+            results = run(http_bench(f'http://127.0.0.1:{port}', get_routes(), concurrency, duration, warmup))
+        finally:
+            process.terminate()
+            process.join(10)
+    results['meta'].update({'workers': workers, 'items': items,
+                            'redis_latency': redis_latency, 'mysql_latency': mysql_latency})
+    if output is not None:
+        save_bench_results(results, output)
+    mzk.tsecho(format_bench_results(results, None if baseline is None else load_bench_results(baseline)))
+    return results
+
+# -------------------------------------------------------------------------- Benchmark --
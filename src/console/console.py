@@ -1,6 +1,8 @@
 # -- Imports --------------------------------------------------------------------------
 
 from sanic import __version__
+from pathlib import Path
+from time import time
 from sys import version_info
 from orjson import loads
 from requests import post
@@ -151,6 +153,94 @@ def turn_off() -> None:
     mzk.tsecho('MocaSystem is currently undergoing maintenance. All requests will receive 503.', fg=mzk.tcolors.GREEN)
 
 
+@console.command('profile')
+def profile(mode: str = 'sampling', duration: int = 30, interval: int = 10, api_key: str = '') -> None:
+    """
+    Toggle the profilers of a running worker (sampling, request, stop, status).
+    The profiles are written to the log directory, the worker is chosen by the os.
+    The first online key in configs/api_key.json is used, if the api key is not specified.
+    """
+    if api_key == '':
+        api_key = next((item['key'] for item in core.api_key_config.list if item.get('status')), '')
+    host = core.SERVER_CONFIG['address']['host']
+    scheme = 'http' if core.SERVER_CONFIG['ssl']['cert'] is None else 'https'
+    url = f"{scheme}://{'127.0.0.1' if host in ('0.0.0.0', '::') else host}:{core.SERVER_CONFIG['address']['port']}"
+    try:
+        res = post(
+            f'{url}/moca-virtual-dm/profiler',
+            json={
+                'api_key': api_key,
+                'root_pass': core.system_config.get_config('root_pass'),
+                'mode': mode,
+                'duration': duration,
+                'interval': interval,
+            },
+            verify=False,
+        )
+    except OSError as e:
+        mzk.print_error(f"Can't connect to MocaVirtualDM. <{e}>")
+        return None
+    if res.status_code == 200:
+        mzk.tsecho(res.text)
+    else:
+        mzk.print_error(f'{res.status_code}: {res.text}')
+
+
+@console.command('benchmark')
+def benchmark(
+        concurrency: int = 32,
+        duration: float = 10,
+        warmup: float = 1,
+        workers: int = 1,
+        items: int = 20,
+        redis_latency: float = 0,
+        mysql_latency: float = 0,
+        output: str = '',
+        baseline: str = '',
+) -> None:
+    """Benchmark the routes with in-process fakes of MySQL and Redis, and save the results as json."""
+    from .benchmark import run_benchmark
+    run_benchmark(
+        concurrency, duration, warmup, workers, items, redis_latency, mysql_latency,
+        Path(output) if output else core.LOG_DIR.joinpath(f'benchmark-{mzk.get_my_pid()}-{int(time())}.json'),
+        Path(baseline) if baseline else None,
+    )
+
+
+@console.command('micro-benchmark')
+def micro_benchmark(
+        name: str = '',
+        min_time: float = 0.5,
+        repeat: int = 5,
+        output: str = '',
+        baseline: str = '',
+        threshold: float = 0.1,
+) -> None:
+    """
+    Benchmark the hot paths of moca_modules, and save the results as json.
+    If a benchmark is slower than the baseline by more than the threshold (0.1 = 10%), exit with 1.
+    """
+    from ..moca_modules.moca_dev import (
+        run_micro_benchmarks, compare_micro_results, format_micro_results, save_bench_results, load_bench_results
+    )
+    results = run_micro_benchmarks(
+        name.split(',') if name else None, min_time, repeat,
+        lambda key, result: mzk.tsecho(f'{key}: {result["best"] * 1e6:.3f} us'),
+    )
+    save_bench_results(
+        results,
+        Path(output) if output else core.LOG_DIR.joinpath(f'micro-benchmark-{mzk.get_my_pid()}-{int(time())}.json'),
+    )
+    baseline_results = load_bench_results(baseline) if baseline else None
+    mzk.tsecho(format_micro_results(results, baseline_results, threshold))
+    if baseline_results is not None:
+        regressions = [key for key, (_, regression) in
+                       compare_micro_results(results, baseline_results, threshold).items() if regression]
+        if regressions:
+            mzk.print_error(f'Regressions: {", ".join(regressions)}')
+            mzk.sys_exit(1)
+
+
 @console.command('clear-logs')
 def clear_logs() -> None:
     """Clear log files."""
@@ -2,7 +2,8 @@
 
 from .core import (
     VERSION, TOP_DIR, CONFIG_DIR, LOG_DIR, SRC_DIR, STATIC_DIR, STORAGE_DIR, SYSTEM_CONFIG, SANIC_CONFIG, SERVER_CONFIG,
-    IP_BLACKLIST_FILE, API_KEY_FILE, system_config, ip_blacklist, APP_CLIENT_CONFIG_FILE, WEB_CLIENT_CONFIG_FILE,
+    IP_BLACKLIST_FILE, API_KEY_FILE, system_config, ip_blacklist, api_key_config, APP_CLIENT_CONFIG_FILE,
+    WEB_CLIENT_CONFIG_FILE,
     DB_CONFIG, MAIL_CONFIG, CLIENT_INIT_QUERY, ADD_NEWS_QUERY, GET_NEWS_QUERY, ADD_SLIDE_AD_QUERY, GET_SLIDE_AD_QUERY,
     CLIENT_COUNT_QUERY, SCREEN_NAME_LIST_FILE, screen_name_list, ADD_AI_QUERY, GET_AI_INFO_QUERY
 )
@@ -1 +1 @@
-insert into `[el]#moca_prefix#clients`(client_id, client_type, ip, time) values (%s, %s, %s, now());
\ No newline at end of file
+insert ignore into `[el]#moca_prefix#clients`(client_id, client_type, ip, time) values (%s, %s, %s, %s);
\ No newline at end of file
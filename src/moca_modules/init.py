@@ -61,7 +61,7 @@ tzlocal
 
 if __config.__LOAD_FILE__:
     from .moca_file import (
-        MocaDirectoryCache, MocaFileAppendController, MocaFileCacheController, MocaSynchronizedBinaryFile,
+        MocaDirectoryCache, MocaFileAppendController, MocaFileCacheController, MocaFileWatcher, MocaSynchronizedBinaryFile,
         MocaSynchronizedJSONDictFile, MocaSynchronizedJSONFile, MocaSynchronizedJSONListFile, MocaSynchronizedTextFile,
         MocaWriteFileController, MocaWriteEncryptedFileController, get_str_from_file, get_str_from_file_with_cache,
         aio_get_str_from_file, aio_get_str_from_file_with_cache, get_mime_type, get_mime_type_with_cache, get_timestamp,
@@ -137,7 +137,9 @@ None
 # -- moca_redis --------------------------------------------------------------------------
 
 if __config.__LOAD_REDIS__:
-    from .moca_redis import MocaRedis, test_redis_connection
+    from .moca_redis import (
+        MocaRedis, MocaRedisPipeline, MocaSingleFlight, MocaTieredCache, test_redis_connection
+    )
 
 """
 This module is a redis client.
@@ -155,7 +157,7 @@ aioredis
 # -- moca_mysql --------------------------------------------------------------------------
 
 if __config.__LOAD_MYSQL__:
-    from .moca_mysql import MocaMysql, test_mysql_connection
+    from .moca_mysql import MocaMysql, MocaBufferedWriter, test_mysql_connection
 
 """
 This is a mysql client module.
@@ -213,6 +215,9 @@ if __config.__LOAD_UTILS__:
         have_alnum, have_alpha, have_ascii, have_numeric, create_tor_deny_config_for_nginx, pm, pl, resize_img,
         get_my_public_ip, get_my_public_ip_v6, get_my_public_ip_v4, update_use_github, update_moca_modules
     )
+    from .moca_utils import (
+        register_serializer, register_compressor, get_compress_stats
+    )
     from .moca_utils import (  # The functions in this file, Only supports CentOS 8 and RHEL 8.
         get_centos_cpu_info, get_centos_cpu_model_name, get_centos_cpu_vendor_id, get_centos_cpu_cores,
         get_centos_cpu_cache_size, get_centos_cpu_mhz, get_centos_ssh_login_log, get_centos_accepted_ssh_login_log,
@@ -262,6 +267,14 @@ prettytable
     A simple Python library for easily displaying tabular data in a visually appealing ASCII table format
 Pillow
     The friendly PIL fork (Python Imaging Library)
+orjson
+    Fast, correct Python JSON library supporting dataclasses, datetimes, and numpy
+msgpack (optional)
+    MessagePack serializer
+zstandard (optional)
+    Zstandard bindings for Python
+lz4 (optional)
+    LZ4 Bindings for Python
 """
 
 # -------------------------------------------------------------------------- moca_utils --
@@ -413,7 +426,7 @@ cytoolz
 if __config.__LOAD_COUNTER__:
     from .moca_counter import (
         AsyncInMemoryDriver, InMemoryDriver, AioRedisDriver, AsyncDriverInterface, DriverInterface, MocaCounter,
-        SharedMemoryDriver, MocaAsyncCounter
+        SharedMemoryDriver, MocaAsyncCounter, MocaSlidingWindowCounter, MocaMetrics
     )
 
 """
@@ -431,7 +444,7 @@ aioredis
 
 if __config.__LOAD_SHARE__:
     from .moca_share import (
-        MocaMultiProcessLock, MocaSharedMemory
+        MocaMultiProcessLock, MocaSharedMemory, MocaConfigBroker
     )
 
 """
@@ -468,6 +481,8 @@ brotli
     Brotli compression format
 sympy
     A computer algebra system written in pure Python
+aiohttp
+    Async http client/server framework (asyncio)
 """
 
 # -------------------------------------------------------------------------- moca_dev --
@@ -575,7 +590,8 @@ plyvel
 
 if __config.__LOAD_SANIC__:
     from .moca_sanic import (
-        MocaSanic, get_remote_address, get_args, write_cookie
+        MocaSanic, get_remote_address, get_args, compile_args, get_request_params, MocaRequestParams, write_cookie,
+        MocaPrefixSet, MocaRouteClassifier, MocaMiddlewarePipeline, MocaIPSet, MocaResponseCache
     )
 
 """
@@ -8,7 +8,8 @@ try:
     from ujson import dumps
 except (ImportError, ModuleNotFoundError):
     from json import dumps
-from ..moca_file import MocaSynchronizedJSONDictFile
+from ..moca_file import MocaSynchronizedJSONDictFile, MocaFileWatcher
+from ..moca_share import MocaConfigBroker
 from ..moca_el_command import el_command_parser
 from ..moca_core import MOCA_NULL
 
@@ -62,6 +63,8 @@ class MocaConfig:
             reload_interval: float = 1.0,
             access_token: Optional[str] = None,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
+            broker: Optional[MocaConfigBroker] = None,
             **kwargs,
     ):
         """
@@ -71,9 +74,12 @@ class MocaConfig:
         :param reload_interval: the interval to check reload.
         :param access_token: when you access to the private config, you need to provide access token.
         :param manual_reload: don't create the reload timer thread. You need run reload method manually.
+        :param watcher: reload the config when the watcher detected a change, instead of the reload timer thread.
+        :param broker: if the main process shared the config file by the broker, load the config from the broker.
         """
         self._config_file: MocaSynchronizedJSONDictFile = MocaSynchronizedJSONDictFile(
-            filename, reload_interval, ensure_ascii, True, manual_reload=manual_reload
+            filename, reload_interval, ensure_ascii, True,
+            manual_reload=manual_reload, watcher=watcher, broker=broker
         )
         if access_token is None and self._config_file.get('__access_token__', None) is None:
             self._config_file.set('__access_token__', None)
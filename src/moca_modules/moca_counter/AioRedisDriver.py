@@ -198,8 +198,9 @@ class AioRedisDriver(AsyncDriverInterface):
                 result = await redis.execute('get', self._prefix + key, encoding=self._encoding)
             try:
                 return int(result), 'success'
-            except (ValueError, KeyError) as error:
-                return None, str(error)
+            except (ValueError, TypeError) as error:
+                # TypeError: the key does not exist.
+                return default, str(error)
         except RedisError as error:
             return default, str(error)
 
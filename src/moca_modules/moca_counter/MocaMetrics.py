@@ -0,0 +1,359 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, Callable, Sequence
+)
+from asyncio import AbstractEventLoop, Task, Lock, CancelledError, sleep
+from bisect import bisect_left
+from aioredis import RedisError
+from ..moca_redis import MocaRedis
+from ..moca_utils import print_warning
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+# the upper bounds of the histogram buckets (seconds), two buckets per power of two from 50us to about 50s,
+# so the relative error of a quantile is less than 42% in any range, like a hdr histogram.
+DEFAULT_BUCKETS: Tuple[float, ...] = tuple(0.00005 * 2 ** (i / 2) for i in range(41))
+
+# the separator of the labels and the bucket index in the redis hash fields.
+_SEPARATOR: str = '\x1f'
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Metric Families --------------------------------------------------------------------------
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the prometheus text format."""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, the integers are written without the exponent."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _merge(target: Dict[str, Dict[str, float]], changes: Dict[str, Dict[str, float]]) -> None:
+    """Add the changes to the target."""
+    for name, fields in changes.items():
+        values = target.setdefault(name, {})
+        for field, value in fields.items():
+            values[field] = values.get(field, 0) + value
+
+
+class _Counter:
+    """
+    A counter family, the values of this process since the last flush are kept.
+
+    Attributes
+    ----------
+    self.name: str
+        the metric name.
+    self.help: str
+        the help text.
+    self.label_names: Tuple[str, ...]
+        the label names.
+    self._pending: Dict[Tuple[str, ...], float]
+        {label values: the increased value since the last flush}
+    """
+
+    kind: str = 'counter'
+
+    def __init__(self, name: str, help_: str, label_names: Sequence[str]):
+        self.name: str = name
+        self.help: str = help_
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._pending: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, value: float = 1) -> None:
+        try:
+            self._pending[label_values] += value
+        except KeyError:
+            self._pending[label_values] = value
+
+    def take(self) -> Dict[str, float]:
+        """Return the increased values since the last flush, the keys are the formatted labels."""
+        pending, self._pending = self._pending, {}
+        return {_format_labels(self.label_names, labels): value for labels, value in pending.items()}
+
+    def render(self, fields: Dict[str, float]) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels in sorted(fields):
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}{suffix} {_format_value(fields[labels])}')
+        return lines
+
+
+class _Histogram:
+    """
+    A histogram family with fixed log scale buckets.
+    An observation only increases a bucket count of this process, the counts are merged when flushed.
+
+    Attributes
+    ----------
+    self.name: str
+        the metric name.
+    self.help: str
+        the help text.
+    self.label_names: Tuple[str, ...]
+        the label names.
+    self._buckets: Tuple[float, ...]
+        the upper bounds of the buckets, the last bucket (+Inf) is not included.
+    self._pending: Dict[Tuple[str, ...], List[float]]
+        {label values: [the counts of the buckets..., the sum]} since the last flush.
+    """
+
+    kind: str = 'histogram'
+
+    def __init__(self, name: str, help_: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name: str = name
+        self.help: str = help_
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._pending: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        series = self._pending.get(label_values)
+        if series is None:
+            series = self._pending[label_values] = [0] * (len(self._buckets) + 2)
+        series[bisect_left(self._buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def take(self) -> Dict[str, float]:
+        """
+        Return the observations since the last flush,
+        the keys are the formatted labels and the bucket index (or 'sum'), only the non-zero buckets are included.
+        """
+        pending, self._pending = self._pending, {}
+        fields: Dict[str, float] = {}
+        for labels, series in pending.items():
+            labels = _format_labels(self.label_names, labels)
+            for index, count in enumerate(series[:-1]):
+                if count:
+                    fields[f'{labels}{_SEPARATOR}{index}'] = count
+            fields[f'{labels}{_SEPARATOR}sum'] = series[-1]
+        return fields
+
+    def render(self, fields: Dict[str, float]) -> List[str]:
+        series: Dict[str, List[float]] = {}
+        for field, value in fields.items():
+            labels, _, index = field.rpartition(_SEPARATOR)
+            item = series.get(labels)
+            if item is None:
+                item = series[labels] = [0] * (len(self._buckets) + 2)
+            if index == 'sum':
+                item[-1] = value
+            elif int(index) <= len(self._buckets):
+                item[int(index)] = value
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels in sorted(series):
+            item = series[labels]
+            prefix = f'{labels},' if labels else ''
+            total = 0
+            for bound, count in zip(self._buckets, item):
+                total += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound:.6g}"}} {_format_value(total)}')
+            total += item[len(self._buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {_format_value(total)}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {_format_value(item[-1])}')
+            lines.append(f'{self.name}_count{suffix} {_format_value(total)}')
+        return lines
+
+# -------------------------------------------------------------------------- Metric Families --
+
+# -- Moca Metrics --------------------------------------------------------------------------
+
+
+class MocaMetrics:
+    """
+    Collect the counters and the latency histograms of all worker processes,
+    and render them in the prometheus text format.
+    Recording a value only changes a dictionary of this process without any lock,
+    and the changes are pushed to redis hashes by a background task, so the rendered values are the totals of all
+    worker processes. If redis is None, only the values of this process will be rendered.
+
+        metrics = MocaMetrics(redis)
+        latency = metrics.histogram('http_request_duration_seconds', 'The request latency.', ('route',))
+        latency.observe(0.0123, 'root.configs')
+
+    Attributes
+    ----------
+    self._redis: Optional[MocaRedis]
+        the redis client.
+    self._interval: float
+        the interval to push the changes to redis (seconds).
+    self._expire: int
+        the values will be removed from redis if they were not changed in this seconds.
+    self._families: Dict[str, Any]
+        the metric families.
+    self._collectors: List[Tuple[_Counter, Callable[[], Dict[Tuple[str, ...], float]], Dict]]
+        the counters that are read from the callbacks, and the last values of them.
+    self._unsent: Dict[str, Dict[str, float]]
+        the changes that could not be pushed to redis, they will be pushed with the next changes.
+    self._totals: Dict[str, Dict[str, float]]
+        the values of this process, only used if redis is not available.
+    self._flush_lock: Optional[Lock]
+        render and the flush task may flush at the same time, the flushes are run one by one.
+    self._task: Optional[Task]
+        the flush task.
+    """
+
+    def __init__(self, redis: Optional[MocaRedis], interval: float = 5.0, expire: int = 86400):
+        """
+        :param redis: the redis client, if the value is None, only render the values of this process.
+        :param interval: the interval to push the changes to redis (seconds).
+        :param expire: the values will be removed from redis if they were not changed in this seconds.
+        """
+        self._redis: Optional[MocaRedis] = redis
+        self._interval: float = interval
+        self._expire: int = expire
+        self._families: Dict[str, Any] = {}
+        self._collectors: List[Tuple[_Counter, Callable[[], Dict[Tuple[str, ...], float]], Dict]] = []
+        self._unsent: Dict[str, Dict[str, float]] = {}
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._flush_lock: Optional[Lock] = None
+        self._task: Optional[Task] = None
+
+    def _get_family(self, cls, name: str, *args) -> Any:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = cls(name, *args)
+        elif not isinstance(family, cls):
+            raise ValueError(f'The metric <{name}> is already registered as a {family.kind}.')
+        return family
+
+    def counter(self, name: str, help_: str, label_names: Sequence[str] = ()) -> _Counter:
+        """Return the counter family, if not exists, create a new one."""
+        return self._get_family(_Counter, name, help_, label_names)
+
+    def histogram(
+            self,
+            name: str,
+            help_: str,
+            label_names: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> _Histogram:
+        """Return the histogram family, if not exists, create a new one."""
+        return self._get_family(_Histogram, name, help_, label_names, buckets)
+
+    def collect(
+            self,
+            name: str,
+            help_: str,
+            label_names: Sequence[str],
+            callback: Callable[[], Dict[Tuple[str, ...], float]],
+    ) -> None:
+        """
+        Read a counter from the callback when flushed.
+        :param callback: a function that returns {label values: the current total value} of this process.
+        """
+        self._collectors.append((self.counter(name, help_, label_names), callback, {}))
+
+    def _read_collectors(self) -> None:
+        """Add the changes of the collected values to the counters."""
+        for family, callback, last in self._collectors:
+            try:
+                values = callback()
+            except Exception as e:  # don't stop flushing.
+                print_warning(f'The metric collector of <{family.name}> failed. <{e}>')
+                continue
+            for labels, value in values.items():
+                delta = value - last.get(labels, 0)
+                if delta:
+                    family.inc(*labels, value=delta)
+                last[labels] = value
+
+    async def _push(self, changes: Dict[str, Dict[str, float]]) -> None:
+        """
+        Push the changes to redis in one round trip.
+        The commands are run in a transaction, so a failed push doesn't apply a part of the changes,
+        and all of them can be pushed again.
+        """
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for name, fields in changes.items():
+                key = f'metrics-{name}'
+                for field, value in fields.items():
+                    if isinstance(value, float):
+                        pipe.hincrbyfloat(key, field, value)
+                    else:
+                        pipe.hincrby(key, field, value)
+                pipe.expire(key, self._expire)
+
+    async def flush(self) -> None:
+        """Push the changes of this process."""
+        if self._flush_lock is None:
+            # create the lock in the running loop.
+            self._flush_lock = Lock()
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        self._read_collectors()
+        changes = {name: family.take() for name, family in self._families.items()}
+        changes = {name: fields for name, fields in changes.items() if fields}
+        if self._redis is None:
+            return _merge(self._totals, changes)
+        _merge(changes, self._unsent)
+        self._unsent = {}
+        if not changes:
+            return None
+        try:
+            await self._push(changes)
+        except (RedisError, ConnectionError, OSError) as e:
+            print_warning(f"Can't push the metrics to redis, retry in the next flush. <{e}>")
+            _merge(self._unsent, changes)
+
+    async def _read(self) -> Dict[str, Dict[str, float]]:
+        """Read the totals of all processes from redis."""
+        names = list(self._families.keys())
+        async with self._redis.pipeline() as pipe:
+            for name in names:
+                pipe.hgetall(f'metrics-{name}')
+        return {
+            name: {field.decode(): float(value) for field, value in items.items()}
+            for name, items in zip(names, pipe.results)
+        }
+
+    async def render(self) -> str:
+        """
+        Return the totals of all processes in the prometheus text format.
+        If redis is not available, RedisError will be raised, so the scraper knows the values are missing.
+        """
+        await self.flush()
+        totals = self._totals if self._redis is None else await self._read()
+        lines: List[str] = []
+        for name, family in self._families.items():
+            lines.extend(family.render(totals.get(name, {})))
+        lines.append('')
+        return '\n'.join(lines)
+
+    async def run(self) -> None:
+        """Flush the metrics periodically."""
+        while True:
+            await sleep(self._interval)
+            await self.flush()
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start the flush task."""
+        if self._task is None:
+            self._task = loop.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush task, and push the remaining changes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+# -------------------------------------------------------------------------- Moca Metrics --
@@ -0,0 +1,131 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Dict, Deque, Tuple, Optional, Callable, Awaitable
+)
+from asyncio import AbstractEventLoop, Task, CancelledError, sleep
+from collections import deque
+from time import time
+from aioredis import RedisError
+from ..moca_redis import MocaRedis
+from ..moca_utils import print_warning
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Moca Sliding Window Counter --------------------------------------------------------------------------
+
+
+class MocaSlidingWindowCounter:
+    """
+    Count the hits of the keys in a sliding window of seconds.
+    The hits are counted in this process without any lock, and pushed to redis once per second,
+    so the total count of all processes can be checked.
+    If redis is not available, only the hits of this process will be counted.
+
+    Attributes
+    ----------
+    self._redis: Optional[MocaRedis]
+        the redis client.
+    self._name: str
+        the name of this counter.
+    self._window: int
+        the size of the window (seconds).
+    self._current: Dict[str, int]
+        the hits of the current second.
+    self._buckets: Deque[Tuple[int, Dict[str, int]]]
+        the hits of this process in the window.
+    self._task: Optional[Task]
+        the flush task.
+    """
+
+    def __init__(self, redis: Optional[MocaRedis], name: str, window: int = 5):
+        """
+        :param redis: the redis client, if the value is None, only count the hits of this process.
+        :param name: the name of this counter.
+        :param window: the size of the window (seconds).
+        """
+        self._redis: Optional[MocaRedis] = redis
+        self._name: str = name
+        self._window: int = window
+        self._current: Dict[str, int] = {}
+        self._buckets: Deque[Tuple[int, Dict[str, int]]] = deque(maxlen=window)
+        self._task: Optional[Task] = None
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    def hit(self, key: str, value: int = 1) -> None:
+        """Count a hit."""
+        try:
+            self._current[key] += value
+        except KeyError:
+            self._current[key] = value
+
+    def _local_totals(self, keys) -> Dict[str, int]:
+        """Sum the hits of this process in the window."""
+        return {key: sum(bucket.get(key, 0) for _, bucket in self._buckets) for key in keys}
+
+    async def _remote_totals(self, bucket: int, current: Dict[str, int]) -> Dict[str, int]:
+        """Push the hits to redis, and sum the hits of all processes in the window."""
+        keys = list(current.keys())
+        name = f'swc-{self._name}-'
+        # all commands are sent in one round trip.
+        async with self._redis.pipeline() as pipe:
+            for key, value in current.items():
+                pipe.hincrby(f'{name}{bucket}', key, value)
+            pipe.expire(f'{name}{bucket}', self._window + 1)
+            for second in range(bucket - self._window + 1, bucket + 1):
+                pipe.hmget(f'{name}{second}', *keys)
+        res = pipe.results
+        totals = dict.fromkeys(keys, 0)
+        for values in res[len(current) + 1:]:
+            for key, value in zip(keys, values):
+                if value is not None:
+                    totals[key] += int(value)
+        return totals
+
+    async def flush(self) -> Dict[str, int]:
+        """
+        Close the current second.
+        :return: the total hits in the window, only the keys that were hit in the current second are included.
+        """
+        current, self._current = self._current, {}
+        bucket = int(time())
+        self._buckets.append((bucket, current))
+        if not current:
+            return {}
+        if self._redis is not None:
+            try:
+                return await self._remote_totals(bucket, current)
+            except (RedisError, ConnectionError, OSError) as e:
+                print_warning(f"Can't aggregate the sliding window counter <{self._name}>. <{e}>")
+        return self._local_totals(current.keys())
+
+    async def run(self, callback: Callable[[Dict[str, int]], Awaitable]) -> None:
+        """Flush the counter once per second, and pass the totals to the callback."""
+        while True:
+            await sleep(1)
+            totals = await self.flush()
+            if totals:
+                try:
+                    await callback(totals)
+                except Exception as e:  # don't stop counting.
+                    print_warning(f'The callback of the sliding window counter <{self._name}> failed. <{e}>')
+
+    def start(self, loop: AbstractEventLoop, callback: Callable[[Dict[str, int]], Awaitable]) -> None:
+        """Start the flush task."""
+        if self._task is None:
+            self._task = loop.create_task(self.run(callback))
+
+    async def stop(self) -> None:
+        """Stop the flush task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+
+# -------------------------------------------------------------------------- Moca Sliding Window Counter --
@@ -7,6 +7,8 @@ from .InMemoryDriver import InMemoryDriver
 from .AsyncInMemoryDriver import AsyncInMemoryDriver
 from .SharedMemoryDriver import SharedMemoryDriver
 from .MocaCounter import MocaCounter, MocaAsyncCounter
+from .MocaSlidingWindowCounter import MocaSlidingWindowCounter
+from .MocaMetrics import MocaMetrics
 
 # -------------------------------------------------------------------------- Imports --
 
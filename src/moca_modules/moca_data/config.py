@@ -10,7 +10,7 @@ __DEBUG_MODE__ = None
 
 __LOAD_CACHE__ = True
 __LOAD_CONFIG__ = True
-__LOAD_COUNTER__ = False
+__LOAD_COUNTER__ = True
 __LOAD_DEV__ = False
 __LOAD_ENCRYPT__ = True
 __LOAD_FILE__ = True
@@ -4,6 +4,14 @@ from benchmarker import Benchmarker, BenchmarkerError
 from .compress_test import compress_test
 from .json_test import json_test
 from .benchmark import string_bench
+from .profiler import MocaSamplingProfiler, MocaRequestProfiler
+from .fakes import MocaFakeRedis, MocaFakeMysql
+from .http_bench import (
+    http_bench, percentile, get_bench_meta, save_bench_results, load_bench_results, format_bench_results
+)
+from .micro_bench import (
+    MICRO_BENCHMARKS, run_micro_benchmarks, compare_micro_results, format_micro_results
+)
 from .bench_funcs import (
     fibonacci_loop, fibonacci_sym, fibonacci_recursion,
     fibonacci_list_loop, fibonacci_list_sym, fibonacci_list_recursion
@@ -30,4 +38,6 @@ brotli
     Brotli compression format
 sympy
     A computer algebra system written in pure Python
+aiohttp
+    Async http client/server framework (asyncio)
 """
@@ -0,0 +1,383 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, Sequence
+)
+from asyncio import sleep
+from time import monotonic, perf_counter
+from aioredis import Channel, ReplyError
+from ..moca_redis import MocaRedis
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Fake Redis --------------------------------------------------------------------------
+
+
+def _to_bytes(value: Any) -> bytes:
+    """Encode a value like aioredis."""
+    if isinstance(value, bytes):
+        return value
+    elif isinstance(value, str):
+        return value.encode()
+    else:
+        return str(value).encode()
+
+
+class _FakeRedisConnection:
+    """
+    A redis connection that executes the commands in memory, only the commands used by this system are supported.
+
+    Attributes
+    ----------
+    self._server: _FakeRedisPool
+        the in memory data.
+    self._transaction: Optional[List[Any]]
+        the results of the commands after MULTI, None means not in a transaction.
+    """
+
+    def __init__(self, server: '_FakeRedisPool'):
+        self._server: _FakeRedisPool = server
+        self._transaction: Optional[List[Any]] = None
+
+    async def execute(self, command: Any, *args, encoding: Optional[str] = None) -> Any:
+        server = self._server
+        if server.latency:
+            await sleep(server.latency)
+        name = _to_bytes(command).decode().upper()
+        if name == 'MULTI':
+            self._transaction = []
+            return b'OK'
+        elif name == 'EXEC':
+            # the commands were already executed when they were queued.
+            results, self._transaction = self._transaction, None
+            return results
+        handler = getattr(server, f'_cmd_{name}', None)
+        if handler is None:
+            raise ReplyError(f"ERR unknown command '{name}'")
+        result = handler(*args)
+        if self._transaction is not None:
+            self._transaction.append(result)
+            return b'QUEUED'
+        if encoding is not None:
+            if isinstance(result, bytes):
+                return result.decode(encoding)
+            elif isinstance(result, list):
+                return [item.decode(encoding) if isinstance(item, bytes) else item for item in result]
+        return result
+
+
+class _FakeRedisPool:
+    """
+    An in memory redis server that looks like a aioredis connection pool.
+
+    Attributes
+    ----------
+    self.latency: float
+        the simulated round trip time of a command (seconds).
+    self._data: Dict[bytes, Any]
+        the values, bytes for strings, dict for hashes and list for lists.
+    self._expires: Dict[bytes, float]
+        the expiration time of the keys (monotonic).
+    self._channels: Dict[bytes, List[Channel]]
+        the subscribed channels.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency: float = latency
+        self._data: Dict[bytes, Any] = {}
+        self._expires: Dict[bytes, float] = {}
+        self._channels: Dict[bytes, List[Channel]] = {}
+
+    def get(self) -> '_FakeRedisPool':
+        return self
+
+    async def __aenter__(self) -> _FakeRedisConnection:
+        return _FakeRedisConnection(self)
+
+    async def __aexit__(self, *_) -> None:
+        return None
+
+    async def acquire(self) -> _FakeRedisConnection:
+        return _FakeRedisConnection(self)
+
+    def release(self, connection: _FakeRedisConnection) -> None:
+        return None
+
+    async def clear(self) -> None:
+        return None
+
+    async def execute(self, command: Any, *args, **kwargs) -> Any:
+        return await _FakeRedisConnection(self).execute(command, *args, **kwargs)
+
+    async def execute_pubsub(self, command: Any, *channels) -> List:
+        command = _to_bytes(command).decode().upper()
+        for channel in channels:
+            if command == 'SUBSCRIBE':
+                self._channels.setdefault(_to_bytes(channel.name), []).append(channel)
+            elif command == 'UNSUBSCRIBE':
+                for item in self._channels.pop(_to_bytes(channel), []):
+                    item.close()
+        return [None for _ in channels]
+
+    # ---- keys --
+
+    def _lookup(self, key: Any) -> Any:
+        key = _to_bytes(key)
+        expire = self._expires.get(key)
+        if expire is not None and expire <= monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+    def _store(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        key = _to_bytes(key)
+        self._data[key] = value
+        if ttl is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = monotonic() + ttl
+
+    def _cmd_DEL(self, *keys) -> int:
+        return sum(self._data.pop(_to_bytes(key), None) is not None for key in keys)
+
+    def _cmd_EXPIRE(self, key, seconds) -> int:
+        if self._lookup(key) is None:
+            return 0
+        self._expires[_to_bytes(key)] = monotonic() + int(seconds)
+        return 1
+
+    def _cmd_PING(self, *_) -> bytes:
+        return b'PONG'
+
+    def _cmd_DBSIZE(self) -> int:
+        return len([key for key in list(self._data) if self._lookup(key) is not None])
+
+    def _cmd_FLUSHDB(self, *_) -> bytes:
+        self._data.clear()
+        self._expires.clear()
+        return b'OK'
+
+    # ---- strings --
+
+    def _cmd_GET(self, key) -> Optional[bytes]:
+        return self._lookup(key)
+
+    def _cmd_MGET(self, *keys) -> List[Optional[bytes]]:
+        return [self._lookup(key) for key in keys]
+
+    def _cmd_SET(self, key, value, *options) -> Optional[bytes]:
+        options = [_to_bytes(item).upper() for item in options]
+        ttl = None
+        for index, option in enumerate(options):
+            if option == b'EX':
+                ttl = float(options[index + 1])
+            elif option == b'PX':
+                ttl = float(options[index + 1]) / 1000
+        if b'NX' in options and self._lookup(key) is not None:
+            return None
+        self._store(key, _to_bytes(value), ttl)
+        return b'OK'
+
+    def _cmd_SETEX(self, key, seconds, value) -> bytes:
+        self._store(key, _to_bytes(value), float(seconds))
+        return b'OK'
+
+    def _cmd_MSET(self, *args) -> bytes:
+        for index in range(0, len(args), 2):
+            self._store(args[index], _to_bytes(args[index + 1]))
+        return b'OK'
+
+    def _cmd_INCRBY(self, key, value) -> int:
+        result = int(self._lookup(key) or 0) + int(value)
+        key = _to_bytes(key)
+        self._data[key] = _to_bytes(result)
+        return result
+
+    def _cmd_INCR(self, key) -> int:
+        return self._cmd_INCRBY(key, 1)
+
+    def _cmd_DECR(self, key) -> int:
+        return self._cmd_INCRBY(key, -1)
+
+    def _cmd_DECRBY(self, key, value) -> int:
+        return self._cmd_INCRBY(key, -int(value))
+
+    # ---- hashes --
+
+    def _hash(self, key) -> Dict[bytes, bytes]:
+        value = self._lookup(key)
+        if value is None:
+            value = {}
+            self._store(key, value)
+        return value
+
+    def _cmd_HINCRBY(self, key, field, value) -> int:
+        data = self._hash(key)
+        result = int(data.get(_to_bytes(field), 0)) + int(value)
+        data[_to_bytes(field)] = _to_bytes(result)
+        return result
+
+    def _cmd_HINCRBYFLOAT(self, key, field, value) -> bytes:
+        data = self._hash(key)
+        result = _to_bytes(repr(float(data.get(_to_bytes(field), 0)) + float(value)))
+        data[_to_bytes(field)] = result
+        return result
+
+    def _cmd_HMGET(self, key, *fields) -> List[Optional[bytes]]:
+        data = self._lookup(key) or {}
+        return [data.get(_to_bytes(field)) for field in fields]
+
+    def _cmd_HGETALL(self, key) -> List[bytes]:
+        return [item for pair in (self._lookup(key) or {}).items() for item in pair]
+
+    # ---- lists --
+
+    def _list(self, key) -> List[bytes]:
+        value = self._lookup(key)
+        if value is None:
+            value = []
+            self._store(key, value)
+        return value
+
+    def _cmd_RPUSH(self, key, *values) -> int:
+        data = self._list(key)
+        data.extend(_to_bytes(value) for value in values)
+        return len(data)
+
+    def _cmd_LPUSH(self, key, *values) -> int:
+        data = self._list(key)
+        for value in values:
+            data.insert(0, _to_bytes(value))
+        return len(data)
+
+    def _cmd_RPOP(self, key) -> Optional[bytes]:
+        data = self._lookup(key)
+        return data.pop() if data else None
+
+    def _cmd_LPOP(self, key) -> Optional[bytes]:
+        data = self._lookup(key)
+        return data.pop(0) if data else None
+
+    def _cmd_LRANGE(self, key, start, end) -> List[bytes]:
+        data = self._lookup(key) or []
+        end = int(end)
+        return data[int(start):None if end == -1 else end + 1]
+
+    def _cmd_LINDEX(self, key, index) -> Optional[bytes]:
+        data = self._lookup(key) or []
+        try:
+            return data[int(index)]
+        except IndexError:
+            return None
+
+    def _cmd_LLEN(self, key) -> int:
+        return len(self._lookup(key) or [])
+
+    def _cmd_LTRIM(self, key, start, end) -> bytes:
+        data = self._lookup(key)
+        if data is not None:
+            data[:] = self._cmd_LRANGE(key, start, end)
+        return b'OK'
+
+    # ---- pub/sub and scripts --
+
+    def _cmd_PUBLISH(self, channel, message) -> int:
+        receivers = [item for item in self._channels.get(_to_bytes(channel), []) if item.is_active]
+        for item in receivers:
+            item.put_nowait(_to_bytes(message))
+        return len(receivers)
+
+    def _cmd_EVAL(self, script, number, *args) -> Any:
+        # only the lock releasing script of MocaRedis is supported.
+        if _to_bytes(script) != _to_bytes(MocaRedis._RELEASE_LOCK_SCRIPT):
+            raise ReplyError('ERR the fake redis only supports the lock releasing script.')
+        key, token = args[0], args[int(number)]
+        if self._lookup(key) == _to_bytes(token):
+            return self._cmd_DEL(key)
+        return 0
+
+
+class MocaFakeRedis(MocaRedis):
+    """
+    A MocaRedis that keeps the data in memory of this process, for the benchmarks.
+    The constructor accepts the same arguments as MocaRedis, the connection parameters are ignored.
+
+    Attributes
+    ----------
+    self._latency: float
+        the simulated round trip time of a command (seconds).
+    """
+
+    def __init__(self, *args, latency: float = 0.0, **kwargs):
+        """
+        :param latency: the simulated round trip time of a command (seconds).
+        """
+        super().__init__(*args, **kwargs)
+        self._latency: float = latency
+
+    async def get_aio_pool(self):
+        if self._pool is None:
+            self._pool = _FakeRedisPool(self._latency)
+        return self._pool
+
+    async def create_aio_pool(self):
+        return await self.get_aio_pool()
+
+# -------------------------------------------------------------------------- Fake Redis --
+
+# -- Fake Mysql --------------------------------------------------------------------------
+
+
+class MocaFakeMysql:
+    """
+    A fake of MocaMysql for the benchmarks, the results of the queries are given in advance.
+    The constructor accepts the same arguments as MocaMysql, the connection parameters are ignored.
+
+    Attributes
+    ----------
+    self._results: Dict[str, Optional[Tuple]]
+        {query: result} the unknown queries return None.
+    self._latency: float
+        the simulated time to execute a query (seconds).
+    self.queries: Dict[str, int]
+        the number of the executions of each query.
+    self.force_sync: bool
+        not used, for the compatibility.
+    self.timer
+        same to MocaMysql.timer.
+    """
+
+    def __init__(self, *_, results: Optional[Dict[str, Optional[Tuple]]] = None, latency: float = 0.0, **__):
+        """
+        :param results: {query: result} the unknown queries return None.
+        :param latency: the simulated time to execute a query (seconds).
+        """
+        self._results: Dict[str, Optional[Tuple]] = {} if results is None else results
+        self._latency: float = latency
+        self.queries: Dict[str, int] = {}
+        self.force_sync: bool = False
+        self.timer = None
+
+    def execute(self, query: str, param: Tuple = (), commit: bool = False) -> Optional[Tuple]:
+        self.queries[query] = self.queries.get(query, 0) + 1
+        return self._results.get(query)
+
+    async def execute_aio(self, query: str, param: Tuple = (), commit: bool = False) -> Optional[Tuple]:
+        start = perf_counter()
+        if self._latency:
+            await sleep(self._latency)
+        result = self.execute(query, param, commit)
+        if self.timer is not None:
+            self.timer(perf_counter() - start, query.split(None, 1)[0].upper() if query.strip() else '')
+        return result
+
+    def executemany(self, query: str, params: Sequence[Tuple], commit: bool = False) -> int:
+        self.queries[query] = self.queries.get(query, 0) + 1
+        return len(params)
+
+    async def executemany_aio(self, query: str, params: Sequence[Tuple], commit: bool = False) -> int:
+        if self._latency:
+            await sleep(self._latency)
+        return self.executemany(query, params, commit)
+
+# -------------------------------------------------------------------------- Fake Mysql --
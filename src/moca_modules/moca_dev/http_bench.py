@@ -0,0 +1,151 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Optional, Sequence, Union
+)
+from pathlib import Path
+from asyncio import gather
+from time import perf_counter, time
+from platform import python_version
+from subprocess import check_output, CalledProcessError, DEVNULL
+from aiohttp import ClientSession, TCPConnector, ClientError
+from orjson import dumps, loads, OPT_INDENT_2
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Functions --------------------------------------------------------------------------
+
+
+def get_bench_meta(**kwargs) -> Dict[str, Any]:
+    """Return the information of the benchmark environment, the kwargs are added to it."""
+    try:
+        commit = check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=DEVNULL).decode().strip()
+    except (CalledProcessError, OSError):
+        commit = None
+    return {
+        'time': time(),
+        'commit': commit,
+        'python': python_version(),
+        **kwargs,
+    }
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """Return the nearest rank percentile of the sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(len(values) * ratio + 0.5) - 1))]
+
+
+async def _bench_route(
+        session: ClientSession,
+        base_url: str,
+        route: Dict[str, Any],
+        concurrency: int,
+        duration: float,
+        warmup: float,
+) -> Dict[str, Any]:
+    """Send the request of the route from the concurrent clients for the duration."""
+    method = route.get('method', 'GET')
+    url = base_url + route['path']
+    kwargs = {key: route[key] for key in ('params', 'json', 'data', 'headers') if key in route}
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    start = perf_counter()
+    measure_from = start + warmup
+    end = measure_from + duration
+
+    async def client() -> None:
+        nonlocal errors
+        while True:
+            begin = perf_counter()
+            if begin >= end:
+                return None
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    await response.read()
+                    status = str(response.status)
+            except (ClientError, OSError):
+                status = None
+            finished = perf_counter()
+            if begin < measure_from:  # the warmup requests are not recorded.
+                continue
+            if status is None:
+                errors += 1
+            else:
+                latencies.append(finished - begin)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    await gather(*[client() for _ in range(concurrency)])
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': statuses,
+        'rps': len(latencies) / duration,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'p999': percentile(latencies, 0.999),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+async def http_bench(
+        base_url: str,
+        routes: Dict[str, Dict[str, Any]],
+        concurrency: int = 32,
+        duration: float = 10.0,
+        warmup: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Run a http load test, the routes are tested one by one, so the latencies of a route are not mixed with others.
+    :param base_url: the url of the server, like http://127.0.0.1:5980
+    :param routes: {name: {'path': str, 'method': str, 'params': dict, 'json': dict, 'data': dict, 'headers': dict}}
+    :param concurrency: the number of the concurrent clients, the connections are kept alive.
+    :param duration: the seconds to test each route.
+    :param warmup: the seconds to send requests before recording.
+    :return: the results, the latencies are seconds.
+    """
+    results: Dict[str, Any] = {}
+    async with ClientSession(connector=TCPConnector(limit=concurrency, ssl=False)) as session:
+        for name, route in routes.items():
+            results[name] = await _bench_route(session, base_url, route, concurrency, duration, warmup)
+    return {
+        'meta': get_bench_meta(concurrency=concurrency, duration=duration),
+        'routes': results,
+    }
+
+
+def save_bench_results(results: Dict[str, Any], path: Union[str, Path]) -> None:
+    """Save the results as a json file."""
+    Path(path).write_bytes(dumps(results, option=OPT_INDENT_2))
+
+
+def load_bench_results(path: Union[str, Path]) -> Dict[str, Any]:
+    return loads(Path(path).read_bytes())
+
+
+def format_bench_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                         keys: Sequence[str] = ('rps', 'p50', 'p99', 'p999')) -> str:
+    """
+    Format the results as a table, the latencies are shown in milliseconds.
+    If the baseline is given, the changes from the baseline are also shown.
+    """
+    lines = [f'{"route":<24}' + ''.join(f'{key:>22}' for key in keys) + f'{"errors":>10}']
+    for name, result in results['routes'].items():
+        line = f'{name:<24}'
+        for key in keys:
+            value = result[key] if key == 'rps' else result[key] * 1000
+            cell = f'{value:.2f}'
+            if baseline is not None and name in baseline['routes']:
+                old = baseline['routes'][name][key]
+                old = old if key == 'rps' else old * 1000
+                if old:
+                    cell += f' ({(value - old) / old * 100:+.1f}%)'
+            line += f'{cell:>22}'
+        lines.append(line + f'{result["errors"]:>10}')
+    return '\n'.join(lines)
+
+# -------------------------------------------------------------------------- Functions --
@@ -0,0 +1,274 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, Callable, Sequence
+)
+from tempfile import mkdtemp
+from shutil import rmtree
+from statistics import median
+from time import perf_counter
+from random import Random
+from .http_bench import get_bench_meta
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+# {name: (input sizes, setup)} setup(size) returns a function without arguments, it is the measured operation.
+MICRO_BENCHMARKS: Dict[str, Tuple[Tuple[int, ...], Callable[[int], Callable[[], Any]]]] = {}
+
+# a japanese sentence used for the text processing benchmarks.
+_SENTENCE: str = '今日はとても良い天気なので、公園で友達と一緒にお弁当を食べました。'
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Benchmarks --------------------------------------------------------------------------
+
+
+def _benchmark(name: str, sizes: Sequence[int]):
+    """Register a micro benchmark."""
+    def decorator(setup: Callable[[int], Callable[[], Any]]) -> Callable[[int], Callable[[], Any]]:
+        MICRO_BENCHMARKS[name] = (tuple(sizes), setup)
+        return setup
+    return decorator
+
+
+def _get_items(size: int) -> List[dict]:
+    """Return the items like the news list."""
+    return [{
+        'id': i,
+        'type': 'simple-text',
+        'title': f'title {i}',
+        'detail': f'the detail of the news {i}. ' * 4,
+        'url': f'https://example.com/news/{i}',
+        'img_path': None,
+    } for i in range(size)]
+
+
+@_benchmark('moca_dumps', (1, 10, 100, 1000))
+def _moca_dumps(size: int) -> Callable[[], Any]:
+    from ..moca_utils import moca_dumps
+    items = _get_items(size)
+    return lambda: moca_dumps(items)
+
+
+@_benchmark('moca_loads', (1, 10, 100, 1000))
+def _moca_loads(size: int) -> Callable[[], Any]:
+    from ..moca_utils import moca_dumps, moca_loads
+    data = moca_dumps(_get_items(size))
+    return lambda: moca_loads(data)
+
+
+@_benchmark('get_args', (1, 10, 100))
+def _get_args(size: int) -> Callable[[], Any]:
+    """Parse a json body that has the size keys, and get 3 arguments from a new request."""
+    from orjson import dumps
+    from sanic.request import Request
+    from sanic.compat import Header
+    from ..moca_sanic import get_args
+    body = dumps({'client_type': 'app', 'client_id': 'x' * 36, **{f'key{i}': i for i in range(size)}})
+    headers = Header({'content-type': 'application/json', 'api-key': 'mochimochi'})
+
+    def run() -> Any:
+        request = Request(b'/moca-virtual-dm/init?api_key=mochimochi', headers, '1.1', 'POST', None, None)
+        request.body = body
+        return get_args(
+            request,
+            ('client_type|client', str, None, {'is_in': ['web', 'app']}),
+            ('client_id|id', str, None, {'max_length': 36, 'min_length': 36}),
+            ('api_key', str, None, {'max_length': 1024}),
+        )
+    return run
+
+
+@_benchmark('validate_argument', (8, 64, 1024))
+def _validate_argument(size: int) -> Callable[[], Any]:
+    from ..moca_utils import validate_argument
+    value = 'a' * size
+    return lambda: validate_argument(value, min_length=1, max_length=4096, is_ascii=True, invalid_str=['<', '>'])
+
+
+@_benchmark('el_command_parser', (8, 64, 1024))
+def _el_command_parser(size: int) -> Callable[[], Any]:
+    from ..moca_el_command import el_command_parser
+    command = f'[el]#moca_random_string<{size}>#'
+    return lambda: el_command_parser(command)
+
+
+def _word_filter(cls: Any, size: int) -> Callable[[], Any]:
+    """Filter a 1000 characters message with the size keywords."""
+    random = Random(size)
+    word_filter = cls()
+    for _ in range(size):
+        word_filter.add_word(''.join(random.choice('あいうえおかきくけこさしすせそ') for _ in range(random.randint(2, 5))))
+    message = (_SENTENCE * (1000 // len(_SENTENCE) + 1))[:1000]
+    return lambda: word_filter.filter(message)
+
+
+@_benchmark('MocaSimpleWordFilter.filter', (10, 100, 1000))
+def _simple_word_filter(size: int) -> Callable[[], Any]:
+    from ..moca_word_filter import MocaSimpleWordFilter
+    return _word_filter(MocaSimpleWordFilter, size)
+
+
+@_benchmark('MocaBSFilter.filter', (10, 100, 1000))
+def _bs_filter(size: int) -> Callable[[], Any]:
+    from ..moca_word_filter import MocaBSFilter
+    return _word_filter(MocaBSFilter, size)
+
+
+@_benchmark('MocaDFAFilter.filter', (10, 100, 1000))
+def _dfa_filter(size: int) -> Callable[[], Any]:
+    from ..moca_word_filter import MocaDFAFilter
+    return _word_filter(MocaDFAFilter, size)
+
+
+@_benchmark('MocaSimpleCache.set/get', (1000, 10000, 100000))
+def _simple_cache(size: int) -> Callable[[], Any]:
+    """Set a new key and get a cached key, the cache is always full."""
+    from ..moca_cache import MocaSimpleCache
+    cache = MocaSimpleCache(size, max(1, size // 10))
+    for i in range(size):
+        cache.set(f'key-{i}', i)
+    counter = [size]
+
+    def run() -> Any:
+        counter[0] += 1
+        cache.set(f'key-{counter[0]}', counter[0])
+        return cache.get(f'key-{counter[0] - size // 2}')
+    return run
+
+
+@_benchmark('Markov.generate', (10, 100, 1000))
+def _markov_generate(size: int) -> Callable[[], Any]:
+    """Generate a sentence from a dictionary trained by the size sentences."""
+    from ..moca_bot.markov import Markov
+    from ..moca_bot import analyze
+    random = Random(size)
+    words = analyze(_SENTENCE * 4)
+    markov = Markov()
+    for _ in range(size):
+        start = random.randrange(len(words) - 8)
+        markov.add_sentence(words[start:start + random.randint(4, 8)])
+    return lambda: markov.generate('公園')
+
+
+@_benchmark('morph.analyze', (10, 100, 1000))
+def _morph_analyze(size: int) -> Callable[[], Any]:
+    from ..moca_bot import analyze
+    message = (_SENTENCE * (size // len(_SENTENCE) + 1))[:size]
+    return lambda: analyze(message)
+
+
+@_benchmark('MocaBot.dialogue', (10, 100))
+def _bot_dialogue(size: int) -> Callable[[], Any]:
+    """Talk to a bot that studied the size messages, the dictionary is in a temporary directory."""
+    from ..moca_bot import MocaBot
+    directory = mkdtemp()
+    try:
+        bot = MocaBot('benchmark', directory)
+        random = Random(size)
+        for _ in range(size):
+            start = random.randrange(len(_SENTENCE) - 10)
+            bot.dialogue(_SENTENCE[start:], study=True)
+    finally:
+        # the dictionary is only saved by Dictionary.save.
+        rmtree(directory, ignore_errors=True)
+    return lambda: bot.dialogue('公園でお弁当を食べたい')
+
+# -------------------------------------------------------------------------- Benchmarks --
+
+# -- Functions --------------------------------------------------------------------------
+
+
+def _measure(operation: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, float]:
+    """
+    Measure the time of an operation like timeit,
+    the number of loops is increased until a round takes min_time / repeat seconds.
+    """
+    target = min_time / repeat
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            operation()
+        spent = perf_counter() - start
+        if spent >= target:
+            break
+        # guess the number of loops from the last round.
+        number = max(number * 2, int(number * target / max(spent, 1e-9) * 1.2))
+    times = [spent / number]
+    for _ in range(repeat - 1):
+        start = perf_counter()
+        for _ in range(number):
+            operation()
+        times.append((perf_counter() - start) / number)
+    return {
+        'number': number,
+        'best': min(times),
+        'median': median(times),
+        'ops': 1 / min(times),
+    }
+
+
+def run_micro_benchmarks(
+        names: Optional[Sequence[str]] = None,
+        min_time: float = 0.5,
+        repeat: int = 5,
+        on_result: Optional[Callable[[str, Dict[str, float]], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the micro benchmarks.
+    :param names: the names of the benchmarks to run, None means all.
+    :param min_time: the minimum seconds to measure each input size.
+    :param repeat: the number of the rounds, the best and the median of them are reported.
+    :param on_result: a function called with the name (like moca_dumps[100]) and the result of each input size.
+    :return: the results, the times are seconds per operation.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for name, (sizes, setup) in MICRO_BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        for size in sizes:
+            result = _measure(setup(size), min_time, repeat)
+            results[f'{name}[{size}]'] = result
+            if on_result is not None:
+                on_result(f'{name}[{size}]', result)
+    return {
+        'meta': get_bench_meta(min_time=min_time, repeat=repeat),
+        'results': results,
+    }
+
+
+def compare_micro_results(
+        results: Dict[str, Any],
+        baseline: Dict[str, Any],
+        threshold: float = 0.1,
+) -> Dict[str, Tuple[float, bool]]:
+    """
+    Compare the best times with the baseline.
+    :return: {name: (the change ratio, the change is a regression larger than the threshold)}
+    """
+    changes: Dict[str, Tuple[float, bool]] = {}
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name)
+        if old is not None and old['best'] > 0:
+            change = result['best'] / old['best'] - 1
+            changes[name] = (change, change > threshold)
+    return changes
+
+
+def format_micro_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                         threshold: float = 0.1) -> str:
+    """Format the results as a table, the times are shown in microseconds."""
+    changes = {} if baseline is None else compare_micro_results(results, baseline, threshold)
+    lines = [f'{"benchmark":<40}{"best (us)":>14}{"median (us)":>14}{"ops/s":>14}{"change":>12}']
+    for name, result in results['results'].items():
+        line = f'{name:<40}{result["best"] * 1e6:>14.3f}{result["median"] * 1e6:>14.3f}{result["ops"]:>14.0f}'
+        if name in changes:
+            change, regression = changes[name]
+            line += f'{change * 100:>+11.1f}%' + (' REGRESSION' if regression else '')
+        lines.append(line)
+    return '\n'.join(lines)
+
+# -------------------------------------------------------------------------- Functions --
@@ -0,0 +1,196 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, Tuple, Optional, Union
+)
+from pathlib import Path
+from cProfile import Profile
+from signal import signal, setitimer, ITIMER_PROF, SIGPROF, SIG_DFL
+from time import time, strftime
+from os import getpid
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Sampling Profiler --------------------------------------------------------------------------
+
+
+class MocaSamplingProfiler:
+    """
+    A sampling stack profiler driven by the SIGPROF timer, it can be started in a running process.
+    The timer only counts the cpu time of this process, so an idle worker takes no samples,
+    and the cost of a sample is a walk of the current stack, so it is cheap enough for production.
+    The samples are written in the collapsed stack format, it can be rendered by flamegraph.pl or speedscope.
+    Signal handlers can only be set in the main thread, so start and stop it in the main thread
+    (the event loop of a sanic worker runs in the main thread).
+
+    Attributes
+    ----------
+    self._output_dir: Path
+        the directory to write the profiles.
+    self._max_depth: int
+        the maximum number of the frames of a stack.
+    self._samples: Dict[Tuple[str, ...], int]
+        {stack (the outermost frame first): the number of the samples}
+    self._labels: Dict[Any, str]
+        the cached labels of the code objects.
+    self._previous_handler: Any
+        the SIGPROF handler before starting.
+    self._started_at: Optional[float]
+        the start time, None means the profiler is not running.
+    self._timer: Any
+        the timer handle to stop the profiler, if it was started with a duration.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], max_depth: int = 128):
+        """
+        :param output_dir: the directory to write the profiles.
+        :param max_depth: the maximum number of the frames of a stack.
+        """
+        self._output_dir: Path = Path(output_dir)
+        self._max_depth: int = max_depth
+        self._samples: Dict[Tuple[str, ...], int] = {}
+        self._labels: Dict[Any, str] = {}
+        self._previous_handler: Any = None
+        self._started_at: Optional[float] = None
+        self._timer: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._started_at is not None
+
+    def _get_label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # ';' is the separator of the collapsed stack format.
+            label = f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})'.replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    def _sample(self, _, frame) -> None:
+        """The SIGPROF handler, count the current stack."""
+        stack = []
+        while frame is not None and len(stack) < self._max_depth:
+            stack.append(self._get_label(frame.f_code))
+            frame = frame.f_back
+        stack = tuple(reversed(stack))
+        self._samples[stack] = self._samples.get(stack, 0) + 1
+
+    def start(self, interval: float = 0.01, duration: Optional[float] = None, loop=None) -> None:
+        """
+        Start sampling.
+        :param interval: the sampling interval (seconds of the cpu time).
+        :param duration: stop after this seconds, the loop is required.
+        :param loop: the event loop to schedule the stop.
+        """
+        if self.running:
+            raise RuntimeError('The profiler is already running.')
+        self._samples = {}
+        self._previous_handler = signal(SIGPROF, self._sample)
+        setitimer(ITIMER_PROF, interval, interval)
+        self._started_at = time()
+        if duration is not None:
+            self._timer = loop.call_later(duration, self.stop)
+
+    def stop(self) -> Optional[Path]:
+        """Stop sampling and write the collapsed stacks, return the path of the file."""
+        if not self.running:
+            return None
+        setitimer(ITIMER_PROF, 0, 0)
+        signal(SIGPROF, self._previous_handler if self._previous_handler is not None else SIG_DFL)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._started_at = None
+        path = self._output_dir.joinpath(f'profile-{getpid()}-{strftime("%Y%m%d-%H%M%S")}.collapsed')
+        samples, self._samples = self._samples, {}
+        with open(str(path), mode='w', encoding='utf-8') as file:
+            for stack, count in sorted(samples.items(), key=lambda item: item[1], reverse=True):
+                file.write(f'{";".join(stack)} {count}\n')
+        return path
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'started_at': self._started_at,
+            'samples': sum(self._samples.values()),
+        }
+
+# -------------------------------------------------------------------------- Sampling Profiler --
+
+# -- Request Profiler --------------------------------------------------------------------------
+
+
+class MocaRequestProfiler:
+    """
+    Profile single requests by cProfile, only while this profiler is enabled.
+    cProfile records everything in the thread, so only one request is profiled at a time,
+    and the other coroutines that ran during the request are also included in the profile.
+
+    Attributes
+    ----------
+    self._output_dir: Path
+        the directory to write the profiles.
+    self._timeout: float
+        if a request was not finished in this seconds, stop profiling it.
+    self._enabled_until: float
+        the profiler is enabled until this time.
+    self._active: Optional[Tuple[Profile, float]]
+        the profile of the current request and the start time.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], timeout: float = 60.0):
+        """
+        :param output_dir: the directory to write the profiles.
+        :param timeout: if a request was not finished in this seconds, stop profiling it.
+        """
+        self._output_dir: Path = Path(output_dir)
+        self._timeout: float = timeout
+        self._enabled_until: float = 0.0
+        self._active: Optional[Tuple[Profile, float]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled_until > time()
+
+    def enable(self, duration: float) -> None:
+        """Enable the profiler for the duration (seconds)."""
+        self._enabled_until = time() + duration
+
+    def disable(self) -> None:
+        self._enabled_until = 0.0
+
+    def begin(self) -> Optional[Profile]:
+        """Start profiling a request, if the profiler is disabled or busy, return None."""
+        if not self.enabled:
+            return None
+        if self._active is not None:
+            if time() - self._active[1] < self._timeout:
+                return None
+            # the response of the request was never sent.
+            self._active[0].disable()
+        profile = Profile()
+        self._active = (profile, time())
+        profile.enable()
+        return profile
+
+    def end(self, profile: Profile, name: str) -> Optional[Path]:
+        """
+        Stop profiling the request and write the stats, the file can be loaded by pstats or snakeviz.
+        If the profile was already discarded by the timeout, return None.
+        """
+        if self._active is None or self._active[0] is not profile:
+            return None
+        profile.disable()
+        self._active = None
+        name = ''.join(char if char.isalnum() or char in '-_.' else '_' for char in name)
+        path = self._output_dir.joinpath(f'request-{getpid()}-{int(time() * 1000)}-{name}.prof')
+        profile.dump_stats(str(path))
+        return path
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'enabled_until': self._enabled_until if self.enabled else None,
+        }
+
+# -------------------------------------------------------------------------- Request Profiler --
@@ -8,6 +8,7 @@ from gzip import compress, decompress
 from threading import Thread
 from time import sleep
 from .utils import get_mime_type, get_timestamp
+from .MocaFileWatcher import MocaFileWatcher
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -38,12 +39,14 @@ class MocaDirectoryCache:
             use_compress: bool = False,
             interval: float = 1.0,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
     ):
         """
         :param dir_path: The path ot the target directory.
         :param use_compress: Compress files in memory.
         :param interval: The interval (seconds) to refresh files.
         :param manual_reload: don't create the reload timer thread. You need run cache_files method manually.
+        :param watcher: refresh the files when the watcher detected a change, instead of the reload timer thread.
         """
         # set parameters.
         self._dir_path: Path = Path(dir_path) if isinstance(dir_path, str) else dir_path
@@ -54,7 +57,9 @@ class MocaDirectoryCache:
         self.cache_files()
 
         # loop thread
-        if not manual_reload:
+        if watcher is not None:
+            watcher.watch(self._dir_path, self.cache_files)
+        elif not manual_reload:
             def __loop(self_: MocaDirectoryCache, interval_: float):
                 while True:
                     sleep(interval_)
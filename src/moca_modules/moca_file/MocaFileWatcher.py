@@ -0,0 +1,282 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Union, Dict, List, Set, Tuple, Optional, Callable, Any
+)
+from pathlib import Path
+from threading import Thread, Lock
+from select import select
+from struct import calcsize, unpack_from
+from time import sleep, monotonic
+from os import read, close, walk, stat, fsencode
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from ..moca_utils import print_warning
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaFileWatcher --------------------------------------------------------------------------
+
+
+class MocaFileWatcher:
+    """
+    Watch the files and the directories, and call the callbacks when they were changed.
+    On Linux, inotify is used, so the thread only wakes up when a file was really changed.
+    On other platforms, or if inotify is not available, the files are checked by polling.
+    The changes in the debounce time are merged, so a burst of writes only calls the callback once.
+
+    Attributes
+    ----------
+    self._debounce: float
+        the callbacks will be called after no changes in this seconds.
+    self._poll_interval: float
+        the interval to check the files, if inotify is not available.
+    self._lock: Lock
+        the lock for the watched paths.
+    self._files: Dict[Path, List[Callable[[], Any]]]
+        the watched files and the callbacks.
+    self._dirs: Dict[Path, List[Callable[[], Any]]]
+        the watched directories (including sub directories) and the callbacks.
+    self._libc
+        the c library used to call inotify.
+    self._fd: Optional[int]
+        the inotify file descriptor, if the value is None, use polling.
+    self._wds: Dict[int, Path]
+        the inotify watch descriptors and the watched directories.
+    self._watched: Set[Path]
+        the directories that were added to inotify.
+    self._stamps: Dict[Path, Any]
+        the last state of the watched paths, only for polling.
+    self._thread: Optional[Thread]
+        the watcher thread.
+    self._exit_thread: bool
+        if this flag is True, the self._thread will stop.
+    """
+
+    _IN_NONBLOCK: int = 0o4000
+    _IN_CLOEXEC: int = 0o2000000
+    _IN_MODIFY: int = 0x00000002
+    _IN_CLOSE_WRITE: int = 0x00000008
+    _IN_MOVED_FROM: int = 0x00000040
+    _IN_MOVED_TO: int = 0x00000080
+    _IN_CREATE: int = 0x00000100
+    _IN_DELETE: int = 0x00000200
+    _IN_Q_OVERFLOW: int = 0x00004000
+    _IN_ISDIR: int = 0x40000000
+    _MASK: int = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    _EVENT_FORMAT: str = 'iIII'
+    _EVENT_SIZE: int = calcsize(_EVENT_FORMAT)
+
+    def __init__(self, debounce: float = 0.2, poll_interval: float = 1.0, use_inotify: bool = True):
+        """
+        :param debounce: the callbacks will be called after no changes in this seconds.
+        :param poll_interval: the interval to check the files, if inotify is not available.
+        :param use_inotify: if this flag is False, always use polling.
+        """
+        self._debounce: float = debounce
+        self._poll_interval: float = poll_interval
+        self._lock: Lock = Lock()
+        self._files: Dict[Path, List[Callable[[], Any]]] = {}
+        self._dirs: Dict[Path, List[Callable[[], Any]]] = {}
+        self._libc = None
+        self._fd: Optional[int] = None
+        self._wds: Dict[int, Path] = {}
+        self._watched: Set[Path] = set()
+        self._stamps: Dict[Path, Any] = {}
+        self._thread: Optional[Thread] = None
+        self._exit_thread: bool = False
+        if use_inotify:
+            self._init_inotify()
+
+    def __del__(self):
+        self.stop()
+
+    @property
+    def backend(self) -> str:
+        return 'polling' if self._fd is None else 'inotify'
+
+    def _init_inotify(self) -> None:
+        """Create the inotify file descriptor, if failed, use polling."""
+        try:
+            libc = CDLL(find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            print_warning(f"Can't use inotify (errno: {get_errno()}), use polling instead.")
+            return None
+        self._libc = libc
+        self._fd = fd
+
+    def _add_inotify_watch(self, directory: Path) -> None:
+        """Watch the directory by inotify."""
+        if directory in self._watched:
+            return None
+        wd = self._libc.inotify_add_watch(self._fd, fsencode(str(directory)), self._MASK)
+        if wd < 0:
+            print_warning(f"Can't watch the directory {directory} (errno: {get_errno()}).")
+        else:
+            self._wds[wd] = directory
+            self._watched.add(directory)
+
+    def _add_inotify_tree(self, directory: Path) -> None:
+        """Watch the directory and all sub directories by inotify."""
+        for root, _, _ in walk(str(directory)):
+            self._add_inotify_watch(Path(root))
+
+    @staticmethod
+    def _get_stamp(path: Path) -> Any:
+        """Return the state of the path, used for polling."""
+        if path.is_dir():
+            stamps = []
+            for root, _, files in walk(str(path)):
+                for name in files:
+                    try:
+                        stamps.append((root, name, stat(f'{root}/{name}').st_mtime))
+                    except OSError:
+                        pass
+            return tuple(sorted(stamps))
+        else:
+            try:
+                return stat(str(path)).st_mtime
+            except OSError:
+                return None
+
+    def watch(self, path: Union[str, Path], callback: Callable[[], Any]) -> None:
+        """
+        Call the callback when the file was changed.
+        If the path is a directory, the changes of all files in the directory (including sub directories) are watched.
+        :param path: the path of the file or the directory.
+        :param callback: the function that will be called in the watcher thread.
+        """
+        path = Path(path).absolute()
+        with self._lock:
+            if path.is_dir():
+                self._dirs.setdefault(path, []).append(callback)
+                if self._fd is not None:
+                    self._add_inotify_tree(path)
+            else:
+                self._files.setdefault(path, []).append(callback)
+                if self._fd is not None:
+                    # watch the directory, so the file can be replaced by rename.
+                    self._add_inotify_watch(path.parent)
+            if self._fd is None:
+                self._stamps[path] = self._get_stamp(path)
+        self.start()
+
+    def unwatch(self, path: Union[str, Path], callback: Callable[[], Any]) -> None:
+        """Stop calling the callback."""
+        path = Path(path).absolute()
+        with self._lock:
+            for table in (self._files, self._dirs):
+                try:
+                    table[path].remove(callback)
+                    if not table[path]:
+                        del table[path]
+                except (KeyError, ValueError):
+                    pass
+
+    def _read_events(self) -> Tuple[Set[Path], bool]:
+        """Read the inotify events, return the changed paths and the overflow flag."""
+        changed: Set[Path] = set()
+        overflow = False
+        try:
+            data = read(self._fd, 65536)
+        except BlockingIOError:
+            return changed, overflow
+        offset = 0
+        while offset + self._EVENT_SIZE <= len(data):
+            wd, mask, _, length = unpack_from(self._EVENT_FORMAT, data, offset)
+            offset += self._EVENT_SIZE
+            name = data[offset: offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+            offset += length
+            if mask & self._IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            path = directory.joinpath(name) if name else directory
+            changed.add(path)
+            if mask & self._IN_ISDIR and mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                with self._lock:
+                    if any(path == item or item in path.parents for item in self._dirs):
+                        self._add_inotify_tree(path)
+        return changed, overflow
+
+    def _get_callbacks(self, changed: Set[Path], everything: bool) -> List[Callable[[], Any]]:
+        """Return the callbacks for the changed paths."""
+        callbacks: List[Callable[[], Any]] = []
+        with self._lock:
+            for path, items in self._files.items():
+                if everything or path in changed:
+                    callbacks.extend(items)
+            for path, items in self._dirs.items():
+                if everything or any(item == path or path in item.parents for item in changed):
+                    callbacks.extend(items)
+        return callbacks
+
+    @staticmethod
+    def _call(callbacks: List[Callable[[], Any]]) -> None:
+        """Call the callbacks, an error in a callback should not stop the watcher."""
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print_warning(f'File watcher callback {callback} failed. <{e}>')
+
+    def _inotify_loop(self) -> None:
+        """Wait for the inotify events."""
+        pending: Set[Path] = set()
+        everything = False
+        deadline = 0.0
+        while not self._exit_thread:
+            timeout = 1.0 if not pending and not everything else max(0.0, min(1.0, deadline - monotonic()))
+            readable, _, _ = select([self._fd], [], [], timeout)
+            if readable:
+                changed, overflow = self._read_events()
+                if changed or overflow:
+                    pending |= changed
+                    everything = everything or overflow
+                    deadline = monotonic() + self._debounce
+            elif (pending or everything) and monotonic() >= deadline:
+                self._call(self._get_callbacks(pending, everything))
+                pending = set()
+                everything = False
+
+    def _polling_loop(self) -> None:
+        """Check the files periodically."""
+        while not self._exit_thread:
+            sleep(self._poll_interval)
+            with self._lock:
+                paths = list(self._files.keys()) + list(self._dirs.keys())
+            changed: Set[Path] = set()
+            for path in paths:
+                stamp = self._get_stamp(path)
+                if stamp != self._stamps.get(path):
+                    self._stamps[path] = stamp
+                    changed.add(path)
+            if changed:
+                self._call(self._get_callbacks(changed, False))
+
+    def start(self) -> None:
+        """Start the watcher thread, if not started."""
+        if self._thread is None:
+            self._exit_thread = False
+            self._thread = Thread(
+                target=self._polling_loop if self._fd is None else self._inotify_loop,
+                name='Moca File Watcher', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread and close the inotify file descriptor."""
+        self._exit_thread = True
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            close(self._fd)
+            self._fd = None
+
+# -------------------------------------------------------------------------- MocaFileWatcher --
@@ -6,6 +6,8 @@ from typing import (
 from pathlib import Path
 from traceback import print_exc
 from .MocaSynchronizedJSONFile import MocaSynchronizedJSONFile
+from .MocaFileWatcher import MocaFileWatcher
+from ..moca_share import MocaConfigBroker
 from ..moca_core import IS_DEBUG, MOCA_NULL
 from ..moca_utils import print_error
 
@@ -43,6 +45,8 @@ class MocaSynchronizedJSONDictFile(MocaSynchronizedJSONFile):
             ensure_ascii: bool = False,
             sort_keys: bool = True,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
+            broker: Optional[MocaConfigBroker] = None,
     ):
         """
         :param filename: the file name of the target file.
@@ -51,9 +55,12 @@ class MocaSynchronizedJSONDictFile(MocaSynchronizedJSONFile):
                then the strings written to file can contain non-ASCII characters.
         :param sort_keys: if sort_keys is true, then the output of dictionaries will be sorted by key.
         :param manual_reload: don't create the reload timer thread. You need run reload_file method manually.
+        :param watcher: reload the file when the watcher detected a change, instead of the reload timer thread.
+        :param broker: if the main process shared this file by the broker, load the json data from the broker.
         """
         super().__init__(
-            filename, check_interval, ensure_ascii=ensure_ascii, sort_keys=sort_keys, manual_reload=manual_reload
+            filename, check_interval, ensure_ascii=ensure_ascii, sort_keys=sort_keys, manual_reload=manual_reload,
+            watcher=watcher, broker=broker
         )
         # If the json data is not a dictionary, change the data to a empty dictionary.
         if not isinstance(self.json, dict):
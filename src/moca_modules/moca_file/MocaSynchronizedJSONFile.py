@@ -1,13 +1,15 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Any
+    Union, Any, Optional
 )
 from functools import partial
 from pathlib import Path
 from json import JSONDecodeError
 from .MocaSynchronizedTextFile import MocaSynchronizedTextFile
+from .MocaFileWatcher import MocaFileWatcher
 from ..moca_core import ENCODING
+from ..moca_share import MocaConfigBroker
 try:
     from ujson import (
         dumps as __dumps, loads
@@ -44,6 +46,16 @@ class MocaSynchronizedJSONFile(MocaSynchronizedTextFile):
         If ensure_ascii is false, then the strings written to ``fp`` can contain non-ASCII characters.
     self._sort_keys: bool
         if sort_keys is true, then the output of dictionaries will be sorted by key.
+    self._broker: Optional[MocaConfigBroker]
+        if the file was shared by the main process, the json data is loaded from this broker.
+    self._broker_version: int
+        the version of the loaded snapshot.
+    self._publisher: Optional[MocaConfigBroker]
+        the broker to publish the json data.
+    self._published_time: float
+        the file update time of the published json data.
+    self._version: int
+        this number will be increased when the json data was changed.
     """
 
     def __init__(
@@ -53,6 +65,8 @@ class MocaSynchronizedJSONFile(MocaSynchronizedTextFile):
             ensure_ascii: bool = False,
             sort_keys: bool = True,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
+            broker: Optional[MocaConfigBroker] = None,
     ):
         """
         :param filename: the file name of the target file.
@@ -61,8 +75,20 @@ class MocaSynchronizedJSONFile(MocaSynchronizedTextFile):
                then the strings written to file can contain non-ASCII characters.
         :param sort_keys: if sort_keys is true, then the output of dictionaries will be sorted by key.
         :param manual_reload: don't create the reload timer thread. You need run reload_file method manually.
+        :param watcher: reload the file when the watcher detected a change, instead of the reload timer thread.
+        :param broker: if the main process shared this file by the broker, load the json data from the broker,
+                       the file will not be parsed and watched in this process.
         """
-        super().__init__(filename, check_interval, encoding=ENCODING, manual_reload=manual_reload)
+        shared = broker is not None and Path(filename) in broker
+        super().__init__(
+            filename, check_interval, encoding=ENCODING,
+            manual_reload=manual_reload or shared, watcher=None if shared else watcher
+        )
+        self._broker: Optional[MocaConfigBroker] = broker if shared else None
+        self._broker_version: int = -1
+        self._publisher: Optional[MocaConfigBroker] = None
+        self._published_time: float = 0.0
+        self._version: int = 0
         # set ensure_ascii flag
         self._ensure_ascii: bool = ensure_ascii
         # set sort_keys flag
@@ -72,10 +98,13 @@ class MocaSynchronizedJSONFile(MocaSynchronizedTextFile):
         # set json data
         if self._file_content == '':
             self.change_content('null')
-        try:
-            self._json = loads(self._file_content)
-        except (TypeError, ValueError, JSONDecodeError):
+        if self._broker is not None:
             self._json = None
+        else:
+            try:
+                self._json = loads(self._file_content)
+            except (TypeError, ValueError, JSONDecodeError):
+                self._json = None
 
     def __str__(self) -> str:
         return f'MocaSynchronizedJSONFile: {self._filename}'
@@ -83,17 +112,57 @@ class MocaSynchronizedJSONFile(MocaSynchronizedTextFile):
     @property
     def json(self) -> Any:
         """Get the loaded JSON data."""
+        if self._broker is not None:
+            version = self._broker.version(self._filename)
+            if version != self._broker_version:
+                self._json = self._broker.get(self._filename, self._json)
+                self._broker_version = version
+                self._version += 1
+            return self._json
         if self._json_update_time != self._file_update_time:
             try:
                 self._json = loads(self._file_content)
                 self._json_update_time = self._file_update_time
+                self._version += 1
             except (TypeError, ValueError, JSONDecodeError):
                 pass
         return self._json
 
+    @property
+    def version(self) -> int:
+        """This number will be increased when the json data was changed, it can be used as a cache key."""
+        _ = self.json
+        return self._version
+
     def change_json(self, data: Any) -> Any:
         """Change json data."""
         self.change_content(dumps(data, ensure_ascii=self._ensure_ascii, sort_keys=self._sort_keys, indent=2))
+        if self._broker is not None:
+            # the main process will publish it after the file was reloaded, use it until then.
+            self._json = data
+        self._version += 1
         return data
 
+    def reload_file(self) -> str:
+        """Reload the file manually."""
+        content = super().reload_file()
+        if self._publisher is not None and self._published_time != self._file_update_time:
+            self._publish()
+        return content
+
+    def _publish(self) -> None:
+        """Publish the json data to the broker."""
+        self._publisher.publish(self._filename, self.json)
+        self._published_time = self._file_update_time
+
+    def share(self, broker: MocaConfigBroker) -> None:
+        """
+        Publish the json data to the broker, and publish it again when the file was reloaded.
+        The worker processes can load the json data from the broker, instead of parsing the file.
+        This method must be called in the main process before the worker processes are forked.
+        """
+        broker.add(self._filename)
+        self._publisher = broker
+        self._publish()
+
 # -------------------------------------------------------------------------- MocaSynchronizedJSONFile --
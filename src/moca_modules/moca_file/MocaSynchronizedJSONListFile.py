@@ -1,10 +1,12 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Any, List
+    Union, Any, List, Optional
 )
 from pathlib import Path
 from .MocaSynchronizedJSONFile import MocaSynchronizedJSONFile
+from .MocaFileWatcher import MocaFileWatcher
+from ..moca_share import MocaConfigBroker
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -36,6 +38,8 @@ class MocaSynchronizedJSONListFile(MocaSynchronizedJSONFile):
             ensure_ascii: bool = False,
             remove_duplicates: bool = False,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
+            broker: Optional[MocaConfigBroker] = None,
     ):
         """
         :param filename: the file name of the target file.
@@ -44,9 +48,14 @@ class MocaSynchronizedJSONListFile(MocaSynchronizedJSONFile):
                then the strings written to file can contain non-ASCII characters.
         :param remove_duplicates: remove duplicate items, use list as a set.
         :param manual_reload: don't create the reload timer thread. You need run reload_file method manually.
+        :param watcher: reload the file when the watcher detected a change, instead of the reload timer thread.
+        :param broker: if the main process shared this file by the broker, load the json data from the broker.
         """
         self._remove_duplicates: bool = remove_duplicates
-        super().__init__(filename, check_interval, ensure_ascii=ensure_ascii, manual_reload=manual_reload)
+        super().__init__(
+            filename, check_interval, ensure_ascii=ensure_ascii, manual_reload=manual_reload,
+            watcher=watcher, broker=broker
+        )
         # If the json data is not a list, change the data to a empty list.
         if not isinstance(self.json, list):
             self.change_json([])
@@ -1,12 +1,13 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Any
+    Union, Any, Optional
 )
 from pathlib import Path
 from time import sleep
 from threading import Thread
 from .utils import get_timestamp
+from .MocaFileWatcher import MocaFileWatcher
 from ..moca_core import ENCODING
 
 # -------------------------------------------------------------------------- Imports --
@@ -44,12 +45,14 @@ class MocaSynchronizedTextFile:
             check_interval: float = 0.1,
             encoding: str = ENCODING,
             manual_reload: bool = False,
+            watcher: Optional[MocaFileWatcher] = None,
     ):
         """
         :param filename: the file name of the target file.
         :param check_interval: the interval to check file (seconds).
         :param encoding: encoding is the name of the encoding used to decode or encode the file.
         :param manual_reload: don't create the reload timer thread. You need run reload_file method manually.
+        :param watcher: reload the file when the watcher detected a change, instead of the reload timer thread.
         """
         # set filename
         self._filename: Path = Path(filename)
@@ -70,7 +73,9 @@ class MocaSynchronizedTextFile:
         # exit thread flag
         self._exit_thread: bool = False
 
-        if not manual_reload:
+        if watcher is not None:
+            watcher.watch(self._filename, self.reload_file)
+        elif not manual_reload:
             # file check loop
             def check_loop(self_: MocaSynchronizedTextFile):
                 while True:
@@ -3,6 +3,7 @@
 from .MocaDirectoryCache import MocaDirectoryCache
 from .MocaFileAppendController import MocaFileAppendController
 from .MocaFileCacheController import MocaFileCacheController
+from .MocaFileWatcher import MocaFileWatcher
 from .MocaSynchronizedBinaryFile import MocaSynchronizedBinaryFile
 from .MocaSynchronizedJSONDictFile import MocaSynchronizedJSONDictFile
 from .MocaSynchronizedJSONFile import MocaSynchronizedJSONFile
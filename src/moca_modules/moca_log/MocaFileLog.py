@@ -1,7 +1,7 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Optional, Union
+    Optional, Union, Sequence, Tuple
 )
 from pathlib import Path
 from queue import Queue
@@ -96,6 +96,27 @@ class MocaFileLog(MocaFileAppendController):
         else:
             pass  # do nothing
 
+    def write_logs(self, messages: Sequence[Tuple[str, int]], origin: Optional[Tuple[str, str, int]] = None) -> None:
+        """
+        Add some log messages into the queue at once, they are written to the file in one write.
+        This method can be called in other thread, the origin is used instead of the caller in that case.
+        :param messages: (the log message, the log level)
+        :param origin: (filename, caller, line number) written in the logs, None means the caller of this method.
+        :return: None
+        """
+        filename, caller, line = location() if origin is None else origin
+        current_time = str(datetime.now(tz=tz))
+        header = f"<{filename}|{caller}|{line}|{self._pid or 0}|{get_my_tid()}>"
+        lines = [
+            (f"[{LogLevel.int_to_str(level)}]({current_time}){header}{message}{NEW_LINE}", level)
+            for message, level in messages if self._log_level <= level
+        ]
+        if lines:
+            self.write(''.join(msg for msg, _ in lines))
+            if self._debug:
+                for msg, level in lines:
+                    self._print_log(msg, level)
+
     def write_exception(self) -> None:
         msg = "-- Exception -------------------------------------" \
               f"{format_exc()}" \
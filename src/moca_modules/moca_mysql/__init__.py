@@ -1,6 +1,7 @@
 # -- Imports --------------------------------------------------------------------------
 
 from .moca_mysql import MocaMysql
+from .moca_buffered_writer import MocaBufferedWriter
 from .utils import test_mysql_connection
 
 # -------------------------------------------------------------------------- Imports --
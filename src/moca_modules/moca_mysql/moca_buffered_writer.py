@@ -0,0 +1,140 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Tuple, List, Optional, Callable, Awaitable
+)
+from asyncio import AbstractEventLoop, Task, Event, Lock, Semaphore, CancelledError, TimeoutError, wait_for
+from pymysql.err import MySQLError
+from .moca_mysql import MocaMysql
+from ..moca_utils import print_warning
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Moca Buffered Writer --------------------------------------------------------------------------
+
+
+class MocaBufferedWriter:
+    """
+    Collect the rows and write them to mysql with one multi-row insert statement.
+    The rows will be written when the buffer is full, or the interval time was passed.
+
+    Attributes
+    ----------
+    self._mysql: MocaMysql
+        the mysql client.
+    self._query: str
+        the insert query for one row, it must be `insert ... values (%s, ...)`.
+    self._max_size: int
+        flush the buffer when the number of the rows reach this size.
+    self._interval: float
+        flush the buffer after this seconds.
+    self._on_flush: Optional[Callable[[int], Awaitable]]
+        this coroutine function will be called with the number of the inserted rows after flush.
+    self._rows: List[Tuple]
+        the buffered rows.
+    self._space: Semaphore
+        the number of the rows that can be buffered, put method will wait when the buffer is too large.
+    self._wakeup: Event
+        wake up the flush task.
+    self._lock: Lock
+        only one flush can run at the same time.
+    self._task: Optional[Task]
+        the flush task.
+    """
+
+    def __init__(self,
+                 mysql: MocaMysql,
+                 query: str,
+                 max_size: int = 500,
+                 interval: float = 0.5,
+                 max_pending: int = 10000,
+                 on_flush: Optional[Callable[[int], Awaitable]] = None):
+        """
+        :param mysql: the mysql client.
+        :param query: the insert query for one row, it must be `insert ... values (%s, ...)`.
+        :param max_size: flush the buffer when the number of the rows reach this size.
+        :param interval: flush the buffer after this seconds.
+        :param max_pending: the maximum number of the rows waiting to be written.
+        :param on_flush: this coroutine function will be called with the number of the inserted rows after flush.
+        """
+        self._mysql: MocaMysql = mysql
+        self._query: str = query
+        self._max_size: int = max_size
+        self._interval: float = interval
+        self._on_flush: Optional[Callable[[int], Awaitable]] = on_flush
+        self._rows: List[Tuple] = []
+        self._space: Semaphore = Semaphore(max_pending)
+        self._wakeup: Event = Event()
+        self._lock: Lock = Lock()
+        self._task: Optional[Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    async def put(self, row: Tuple) -> None:
+        """Add a row to the buffer, wait if the buffer is too large."""
+        await self._space.acquire()
+        self._rows.append(row)
+        if len(self._rows) >= self._max_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write the buffered rows, return the number of the inserted rows."""
+        async with self._lock:
+            if not self._rows:
+                return 0
+            rows, self._rows = self._rows, []
+            try:
+                inserted = await self._mysql.executemany_aio(self._query, rows, True)
+            except BaseException:
+                # keep the rows, they will be written by the next flush.
+                self._rows[:0] = rows
+                raise
+            for _ in rows:
+                self._space.release()
+            if self._on_flush is not None and inserted > 0:
+                # the rows were written, an error of the callback should not be handled as a failed insert.
+                try:
+                    await self._on_flush(inserted)
+                except CancelledError:
+                    raise
+                except Exception as e:
+                    print_warning(f'The flush callback of the buffered writer failed. <{e}>')
+            return inserted
+
+    async def run(self) -> None:
+        """Flush the buffer periodically."""
+        while True:
+            try:
+                await wait_for(self._wakeup.wait(), self._interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except CancelledError:
+                raise
+            except (MySQLError, ConnectionError, OSError) as e:
+                print_warning(f"Can't write the buffered rows to mysql, will retry later. <{e}>")
+            except Exception as e:
+                # don't stop the flush task, put method would wait forever when the buffer is full.
+                print_warning(f"Can't write the buffered rows, will retry later. <{type(e).__name__}: {e}>")
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start the flush task."""
+        if self._task is None:
+            self._task = loop.create_task(self.run())
+
+    async def close(self) -> int:
+        """Stop the flush task and write the remaining rows."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        return await self.flush()
+
+# -------------------------------------------------------------------------- Moca Buffered Writer --
@@ -1,12 +1,12 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Tuple, Optional
+    Any, Tuple, Optional, Sequence, Callable
 )
 from pymysql import Connection
 from pymysql.err import MySQLError, InternalError
 from aiomysql import connect, create_pool
-from time import time
+from time import time, perf_counter
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -41,6 +41,9 @@ class MocaMysql:
         a async database connection pool.
     self.force_sync: bool
         if _force_sync is True, use execute instead of execute_aio
+    self.timer: Optional[Callable[[float, str], Any]]
+        if this value is not None, it will be called with the spent time (seconds) and the statement type
+        (the first word of the query, like SELECT) after each execute_aio.
     """
 
     _TEST_TABLE = """
@@ -92,6 +95,7 @@ class MocaMysql:
         self._aio_con = None
         self._aio_pool = None
         self.force_sync: bool = False
+        self.timer: Optional[Callable[[float, str], Any]] = None
 
     @property
     def host(self) -> str:
@@ -187,6 +191,15 @@ class MocaMysql:
         """Execute the query."""
         if self.force_sync:
             return self.execute(query, param, commit)
+        if self.timer is None:
+            return await self._execute_aio(query, param, commit)
+        start = perf_counter()
+        try:
+            return await self._execute_aio(query, param, commit)
+        finally:
+            self.timer(perf_counter() - start, query.split(None, 1)[0].upper() if query.strip() else '')
+
+    async def _execute_aio(self, query: str, param: Tuple, commit: bool) -> Optional[Tuple]:
         pool = await self.get_a_aio_pool()
         async with pool.acquire() as con:
             async with con.cursor() as cur:
@@ -196,6 +209,33 @@ class MocaMysql:
                     await con.commit()
                 return data if data != [] else None
 
+    def executemany(self, query: str, params: Sequence[Tuple], commit: bool = False) -> int:
+        """
+        Execute the query with many parameters, return the number of affected rows.
+        A simple insert query will be sent as one multi-row insert statement.
+        """
+        con = self.get_con()
+        cursor = con.cursor()
+        rows = cursor.executemany(query, args=params)
+        if commit:
+            con.commit()
+        return rows or 0
+
+    async def executemany_aio(self, query: str, params: Sequence[Tuple], commit: bool = False) -> int:
+        """
+        Execute the query with many parameters, return the number of affected rows.
+        A simple insert query will be sent as one multi-row insert statement.
+        """
+        if self.force_sync:
+            return self.executemany(query, params, commit)
+        pool = await self.get_a_aio_pool()
+        async with pool.acquire() as con:
+            async with con.cursor() as cur:
+                rows = await cur.executemany(query, args=params)
+                if commit:
+                    await con.commit()
+                return rows or 0
+
     def create_test_table(self) -> None:
         """Create a test table."""
         try:
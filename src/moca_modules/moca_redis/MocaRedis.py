@@ -1,11 +1,18 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Any, List, Dict, Tuple, Optional, Union
+    Any, List, Dict, Tuple, Optional, Union, Callable
+)
+from aioredis import create_pool, Channel, RedisError
+from asyncio import (
+    AbstractEventLoop, Task, Lock, CancelledError, TimeoutError as AsyncioTimeoutError, sleep, wait_for
 )
-from aioredis import create_pool
 from ssl import SSLContext
-from ..moca_utils import moca_dumps as dumps, moca_loads as loads, get_random_string
+from time import perf_counter
+from ..moca_utils import (
+    moca_dumps as dumps, moca_loads as loads, get_random_string, print_warning, print_info
+)
+from .MocaRedisPipeline import MocaRedisPipeline
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -34,6 +41,27 @@ class MocaRedis:
          ssl context for the redis database.
     self._pool
         the async redis connection pool.
+    self._pool_lock: Optional[Lock]
+        only one coroutine creates the pool.
+    self._health_task: Optional[Task]
+        the health check task.
+    self.timer: Optional[Callable[[float, str], Any]]
+        if this value is not None, it will be called with the spent time (seconds) and the command name
+        after each command. the time waiting for a connection is not included.
+    self.acquire_timer: Optional[Callable[[float], Any]]
+        if this value is not None, it will be called with the time waiting for a pooled connection (seconds).
+    self.healthy: bool
+        the result of the last health check.
+    self.health_check_failures: int
+        the number of the failed health checks.
+    """
+
+    _RELEASE_LOCK_SCRIPT: str = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    else
+        return 0
+    end
     """
 
     def __init__(
@@ -63,7 +91,13 @@ class MocaRedis:
         self._maxsize: int = maxsize
         self._ssl: Optional[SSLContext] = ssl
         self._pool = None
+        self._pool_lock: Optional[Lock] = None
+        self._health_task: Optional[Task] = None
         self.prefix = ''
+        self.timer: Optional[Callable[[float, str], Any]] = None
+        self.acquire_timer: Optional[Callable[[float], Any]] = None
+        self.healthy: bool = True
+        self.health_check_failures: int = 0
 
     @property
     def url(self) -> str:
@@ -96,38 +130,68 @@ class MocaRedis:
     def ssl(self) -> Optional[SSLContext]:
         return self._ssl
 
+    async def _create_pool(self):
+        return await create_pool((self._host, self._port),
+                                 db=self._db,
+                                 password=self._password if self._password != '' else None,
+                                 minsize=self._minsize,
+                                 maxsize=self._maxsize,
+                                 ssl=self._ssl)
+
     async def get_aio_pool(self):
         """Return a async connection pool, if not exists, create a new onw."""
         if self._pool is None:
-            pool = await create_pool((self._host, self._port),
-                                     db=self._db,
-                                     password=self._password if self._password != '' else None,
-                                     minsize=self._minsize,
-                                     maxsize=self._maxsize,
-                                     ssl=self._ssl)
-            self._pool = pool
-        else:
-            pool = self._pool
-        return pool
+            # the lock is created here, so it belongs to the running event loop.
+            if self._pool_lock is None:
+                self._pool_lock = Lock()
+            async with self._pool_lock:
+                # other coroutine may have created the pool while we were waiting.
+                if self._pool is None:
+                    self._pool = await self._create_pool()
+        return self._pool
 
     async def create_aio_pool(self):
         """Create a new async connection pool."""
-        pool = await create_pool((self._host, self._port),
-                                 db=self._db,
-                                 password=self._password if self._password != '' else None,
-                                 minsize=self._minsize,
-                                 maxsize=self._maxsize,
-                                 ssl=self._ssl)
+        pool = await self._create_pool()
         if self._pool is None:
             self._pool = pool
         return pool
 
+    async def acquire(self):
+        """Acquire a connection from the pool, it must be released by the release method."""
+        pool = await self.get_aio_pool()
+        if self.acquire_timer is None:
+            return await pool.acquire()
+        start = perf_counter()
+        connection = await pool.acquire()
+        self.acquire_timer(perf_counter() - start)
+        return connection
+
+    def release(self, connection) -> None:
+        """Return the connection to the pool."""
+        self._pool.release(connection)
+
     async def execute(self, command, *args, **kwargs):
         """Execute a redis command."""
-        pool = await self.get_aio_pool()
-        async with pool.get() as redis:
-            result = await redis.execute(command, *args, **kwargs)
-            return result
+        connection = await self.acquire()
+        if self.timer is None:
+            try:
+                return await connection.execute(command, *args, **kwargs)
+            finally:
+                self.release(connection)
+        start = perf_counter()
+        try:
+            return await connection.execute(command, *args, **kwargs)
+        finally:
+            self.release(connection)
+            self.timer(perf_counter() - start, command)
+
+    def pipeline(self, transaction: bool = False) -> MocaRedisPipeline:
+        """
+        Return a pipeline to send some commands in one round trip, use it with async with.
+        :param transaction: wrap the commands in MULTI and EXEC.
+        """
+        return MocaRedisPipeline(self, transaction)
 
     async def set(self, key: str, value: Any, expiration: int = -1):
         if expiration == -1:
@@ -143,10 +207,10 @@ class MocaRedis:
                 tmp.append(dumps(value[1]))
             await self.execute('MSET', *tmp)
         else:
-            pool = await self.get_aio_pool()
-            async with pool.get() as redis:
-                for value in data:
-                    await redis.execute('SETEX', f'mr-{self.prefix}-{value[0]}', expiration, dumps(value[1]))
+            # MSET can't set the expiration.
+            async with self.pipeline() as pipe:
+                for key, value in data:
+                    pipe.set(key, value, expiration)
 
     async def get(self, key: str, default: Any = None) -> Any:
         data = await self.execute('GET', f'mr-{self.prefix}-{key}')
@@ -225,6 +289,104 @@ class MocaRedis:
     async def decrement_by(self, key: str, value: int):
         return await self.execute('DECRBY', f'mr-{self.prefix}-{key}', value)
 
+    async def publish(self, channel: str, message: Any) -> int:
+        """Publish a message to the channel, return the number of receivers."""
+        return await self.execute('PUBLISH', f'mr-{self.prefix}-{channel}', dumps(message))
+
+    async def subscribe(self, channel: str) -> Channel:
+        """
+        Subscribe to the channel.
+        The messages can be received from the returned channel object, and must be decoded by moca_loads.
+        """
+        pool = await self.get_aio_pool()
+        receiver = Channel(f'mr-{self.prefix}-{channel}', is_pattern=False)
+        await pool.execute_pubsub('SUBSCRIBE', receiver)
+        return receiver
+
+    async def unsubscribe(self, channel: str) -> None:
+        """Unsubscribe from the channel."""
+        pool = await self.get_aio_pool()
+        await pool.execute_pubsub('UNSUBSCRIBE', f'mr-{self.prefix}-{channel}')
+
+    async def acquire_lock(self, key: str, ttl: int = 5000) -> Optional[str]:
+        """
+        Try to acquire a lock between processes.
+        :param key: the name of the lock.
+        :param ttl: the lock will be released automatically after ttl milliseconds.
+        :return: if acquired the lock, return a token to release it. otherwise return None.
+        """
+        token = get_random_string(32)
+        res = await self.execute('SET', f'mr-{self.prefix}-lock-{key}', token, 'PX', ttl, 'NX')
+        return token if res is not None else None
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release the lock, only the owner of the token can release it."""
+        res = await self.execute('EVAL', self._RELEASE_LOCK_SCRIPT, 1, f'mr-{self.prefix}-lock-{key}', token)
+        return res == 1
+
+    async def check_health(self, timeout: float = 1.0) -> bool:
+        """
+        Send PING on a pooled connection.
+        If failed, close the free connections of the pool, so the next commands will reconnect.
+        Only PING is timed out, if no connection was released in the timeout, the pool is busy but redis may be fine,
+        the check is skipped and the last state is returned.
+        """
+        try:
+            try:
+                connection = await wait_for(self.acquire(), timeout)
+            except AsyncioTimeoutError:
+                return self.healthy
+            try:
+                await wait_for(connection.execute('PING'), timeout)
+            finally:
+                # the connection is closed by the pool, if the reply of PING is still pending.
+                self.release(connection)
+            if not self.healthy:
+                print_info('Reconnected to Redis.')
+            self.healthy = True
+        except CancelledError:
+            raise
+        except (RedisError, ConnectionError, OSError, AsyncioTimeoutError) as e:
+            self.health_check_failures += 1
+            if self.healthy:
+                print_warning(f'Redis health check failed. <{str(e) or type(e).__name__}>')
+            self.healthy = False
+            if self._pool is not None:
+                try:
+                    await self._pool.clear()
+                except (RedisError, ConnectionError, OSError):
+                    pass
+        return self.healthy
+
+    async def _run_health_check(self, interval: float, timeout: float, max_backoff: float) -> None:
+        """Check the health periodically, while redis is down, retry with exponential backoff."""
+        failures = 0
+        while True:
+            await sleep(interval if failures == 0 else min(max_backoff, 0.5 * 2 ** (failures - 1)))
+            failures = 0 if await self.check_health(timeout) else failures + 1
+
+    def start_health_check(self, loop: AbstractEventLoop, interval: float = 5.0, timeout: float = 1.0,
+                           max_backoff: float = 30.0) -> None:
+        """
+        Start the health check task.
+        :param loop: the event loop.
+        :param interval: the interval seconds of the checks while redis is healthy.
+        :param timeout: the check fails if PING takes longer than this seconds, the wait for a connection is excluded.
+        :param max_backoff: the maximum interval seconds of the retries while redis is down.
+        """
+        if self._health_task is None:
+            self._health_task = loop.create_task(self._run_health_check(interval, timeout, max_backoff))
+
+    async def stop_health_check(self) -> None:
+        """Stop the health check task."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except CancelledError:
+                pass
+            self._health_task = None
+
     async def test_con(self) -> None:
         key = 'moca_modules_connection_test_key' + get_random_string(32)
         await self.set(key, 0)
@@ -0,0 +1,194 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, Callable, TYPE_CHECKING
+)
+from asyncio import gather
+from time import perf_counter
+from ..moca_utils import moca_dumps as dumps, moca_loads as loads
+if TYPE_CHECKING:
+    from .MocaRedis import MocaRedis
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Moca Redis Pipeline --------------------------------------------------------------------------
+
+
+def _load_or_default(default: Any) -> Callable[[Any], Any]:
+    return lambda data: default if data is None else loads(data)
+
+
+def _load_list(data: List[bytes]) -> List[Any]:
+    return [loads(item) for item in data]
+
+
+def _to_dict(data: List[bytes]) -> Dict[bytes, bytes]:
+    return {data[i]: data[i + 1] for i in range(0, len(data), 2)}
+
+
+class MocaRedisPipeline:
+    """
+    Queue the commands of MocaRedis, and send them on one connection in one round trip.
+    The keys are prefixed and the values are serialized like MocaRedis.
+    The commands are sent when the async with block exits without an exception,
+    the results are decoded like the methods of MocaRedis and saved in the results attribute,
+    in the order of the queued commands.
+
+        async with redis.pipeline() as pipe:
+            pipe.get('news-info-special')
+            pipe.increment('count')
+        special, count = pipe.results
+
+    Attributes
+    ----------
+    self._redis: MocaRedis
+        the redis client.
+    self._transaction: bool
+        wrap the commands in MULTI and EXEC, so the other clients can't run commands between them.
+    self._commands: List[Tuple[str, tuple, Optional[Callable[[Any], Any]]]]
+        the queued commands, (command, args, the decoder of the result)
+    self.results: Optional[List[Any]]
+        the decoded results, None means the commands were not sent yet.
+    """
+
+    def __init__(self, redis: 'MocaRedis', transaction: bool = False):
+        """
+        :param redis: the redis client.
+        :param transaction: wrap the commands in MULTI and EXEC.
+        """
+        self._redis: 'MocaRedis' = redis
+        self._transaction: bool = transaction
+        self._commands: List[Tuple[str, tuple, Optional[Callable[[Any], Any]]]] = []
+        self.results: Optional[List[Any]] = None
+
+    async def __aenter__(self) -> 'MocaRedisPipeline':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.execute()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def _key(self, key: str) -> str:
+        return f'mr-{self._redis.prefix}-{key}'
+
+    def command(self, command: str, *args, decoder: Optional[Callable[[Any], Any]] = None) -> 'MocaRedisPipeline':
+        """Queue a raw redis command, the keys are not prefixed."""
+        self._commands.append((command, args, decoder))
+        return self
+
+    async def execute(self) -> List[Any]:
+        """
+        Send the queued commands and return the decoded results.
+        If a command failed, the first error is raised after all replies were received.
+        """
+        commands, self._commands = self._commands, []
+        if not commands:
+            self.results = []
+            return self.results
+        connection = await self._redis.acquire()
+        start = perf_counter()
+        try:
+            if self._transaction:
+                # the replies of the queued commands are QUEUED, the results are returned by EXEC.
+                replies = await gather(
+                    connection.execute('MULTI'),
+                    *[connection.execute(command, *args) for command, args, _ in commands],
+                    connection.execute('EXEC'),
+                    return_exceptions=True,
+                )
+                errors = [item for item in replies[:-1] if isinstance(item, Exception)]
+                if errors:
+                    # EXEC is rejected after a command was rejected while queueing.
+                    raise errors[0]
+                replies = replies[-1]
+                if isinstance(replies, Exception):
+                    raise replies
+            else:
+                replies = await gather(
+                    *[connection.execute(command, *args) for command, args, _ in commands], return_exceptions=True,
+                )
+        finally:
+            self._redis.release(connection)
+            if self._redis.timer is not None:
+                self._redis.timer(perf_counter() - start, 'MULTI' if self._transaction else 'PIPELINE')
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        self.results = [
+            reply if decoder is None else decoder(reply) for reply, (_, _, decoder) in zip(replies, commands)
+        ]
+        return self.results
+
+    def set(self, key: str, value: Any, expiration: int = -1) -> 'MocaRedisPipeline':
+        if expiration == -1:
+            return self.command('SET', self._key(key), dumps(value))
+        else:
+            return self.command('SETEX', self._key(key), expiration, dumps(value))
+
+    def get(self, key: str, default: Any = None) -> 'MocaRedisPipeline':
+        return self.command('GET', self._key(key), decoder=_load_or_default(default))
+
+    def delete(self, *keys: str) -> 'MocaRedisPipeline':
+        return self.command('DEL', *[self._key(key) for key in keys])
+
+    def expire(self, key: str, expiration: int) -> 'MocaRedisPipeline':
+        return self.command('EXPIRE', self._key(key), expiration)
+
+    def rpush(self, key: str, value: Any) -> 'MocaRedisPipeline':
+        return self.command('RPUSH', self._key(key), dumps(value))
+
+    def lpush(self, key: str, value: Any) -> 'MocaRedisPipeline':
+        return self.command('LPUSH', self._key(key), dumps(value))
+
+    def rpop(self, key: str) -> 'MocaRedisPipeline':
+        return self.command('RPOP', self._key(key), decoder=loads)
+
+    def lpop(self, key: str) -> 'MocaRedisPipeline':
+        return self.command('LPOP', self._key(key), decoder=loads)
+
+    def lrange(self, key: str, start: int, end: int) -> 'MocaRedisPipeline':
+        return self.command('LRANGE', self._key(key), start, end, decoder=_load_list)
+
+    def lindex(self, key: str, index: int) -> 'MocaRedisPipeline':
+        return self.command('LINDEX', self._key(key), index, decoder=loads)
+
+    def llen(self, key: str) -> 'MocaRedisPipeline':
+        return self.command('LLEN', self._key(key))
+
+    def ltrim(self, key: str, start: int, end: int) -> 'MocaRedisPipeline':
+        return self.command('LTRIM', self._key(key), start, end)
+
+    def increment(self, key: str) -> 'MocaRedisPipeline':
+        return self.command('INCR', self._key(key))
+
+    def increment_by(self, key: str, value: int) -> 'MocaRedisPipeline':
+        return self.command('INCRBY', self._key(key), value)
+
+    def decrement(self, key: str) -> 'MocaRedisPipeline':
+        return self.command('DECR', self._key(key))
+
+    def decrement_by(self, key: str, value: int) -> 'MocaRedisPipeline':
+        return self.command('DECRBY', self._key(key), value)
+
+    # the fields and values of the hashes are not serialized, they are used as counters.
+
+    def hincrby(self, key: str, field: str, value: int) -> 'MocaRedisPipeline':
+        return self.command('HINCRBY', self._key(key), field, value)
+
+    def hincrbyfloat(self, key: str, field: str, value: float) -> 'MocaRedisPipeline':
+        return self.command('HINCRBYFLOAT', self._key(key), field, value)
+
+    def hmget(self, key: str, *fields: str) -> 'MocaRedisPipeline':
+        return self.command('HMGET', self._key(key), *fields)
+
+    def hgetall(self, key: str) -> 'MocaRedisPipeline':
+        """The result is {field: value} of bytes."""
+        return self.command('HGETALL', self._key(key), decoder=_to_dict)
+
+    def publish(self, channel: str, message: Any) -> 'MocaRedisPipeline':
+        return self.command('PUBLISH', self._key(channel), dumps(message))
+
+# -------------------------------------------------------------------------- Moca Redis Pipeline --
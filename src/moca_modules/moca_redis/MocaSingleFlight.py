@@ -0,0 +1,86 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, Callable, Awaitable, Optional
+)
+from asyncio import Task, ensure_future, shield, sleep
+from time import monotonic
+from .MocaRedis import MocaRedis
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Moca Single Flight --------------------------------------------------------------------------
+
+
+class MocaSingleFlight:
+    """
+    Run only one rebuild for the same key at the same time.
+    In the same process, the callers will wait for the same task.
+    Between processes, only the owner of the redis lock can rebuild, the others wait for the cached value.
+
+    Attributes
+    ----------
+    self._redis: MocaRedis
+        the redis client.
+    self._lock_ttl: int
+        the lock will be released automatically after this milliseconds.
+    self._interval: float
+        the interval seconds to check the cached value while waiting for other process.
+    self._flights: Dict[str, Task]
+        the running tasks in this process.
+    """
+
+    def __init__(self, redis: MocaRedis, lock_ttl: int = 5000, interval: float = 0.05):
+        """
+        :param redis: the redis client.
+        :param lock_ttl: the lock will be released automatically after this milliseconds.
+        :param interval: the interval seconds to check the cached value while waiting for other process.
+        """
+        self._redis: MocaRedis = redis
+        self._lock_ttl: int = lock_ttl
+        self._interval: float = interval
+        self._flights: Dict[str, Task] = {}
+
+    async def do(self,
+                 key: str,
+                 load: Callable[[], Awaitable[Optional[Any]]],
+                 build: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the value, if no one is building it, build it.
+        :param key: the key of the value.
+        :param load: get the cached value, return None if not exists.
+        :param build: create the value and save it to the cache.
+        :return: the value.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = ensure_future(self._run(key, load, build))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        # the task is shared, one cancelled request should not cancel the others.
+        return await shield(task)
+
+    async def _run(self,
+                   key: str,
+                   load: Callable[[], Awaitable[Optional[Any]]],
+                   build: Callable[[], Awaitable[Any]]) -> Any:
+        """Wait for the lock or the cached value."""
+        deadline = monotonic() + self._lock_ttl / 1000
+        while True:
+            token = await self._redis.acquire_lock(f'single-flight-{key}', self._lock_ttl)
+            if token is not None:
+                try:
+                    # other process may have finished building while we were waiting.
+                    value = await load()
+                    return value if value is not None else await build()
+                finally:
+                    await self._redis.release_lock(f'single-flight-{key}', token)
+            await sleep(self._interval)
+            value = await load()
+            if value is not None:
+                return value
+            if monotonic() > deadline:
+                # the owner of the lock seems to be too slow, don't block the request any more.
+                return await build()
+
+# -------------------------------------------------------------------------- Moca Single Flight --
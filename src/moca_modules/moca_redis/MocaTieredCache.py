@@ -0,0 +1,334 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Set, Optional, Callable, Awaitable
+)
+from asyncio import AbstractEventLoop, Task, CancelledError, ensure_future, shield, sleep
+from collections import OrderedDict
+from time import time
+from uuid import uuid4
+from aioredis import RedisError
+from ..moca_utils import moca_loads as loads, print_warning
+from .MocaRedis import MocaRedis
+from .MocaSingleFlight import MocaSingleFlight
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Moca Tiered Cache --------------------------------------------------------------------------
+
+
+class MocaTieredCache:
+    """
+    A two tier cache, the values are cached in the memory of this process first, and in redis second.
+    When a value was changed or deleted, the local copies in all processes will be removed by a redis pub/sub message.
+    While this process is not listening the invalidation channel, the local tier is not used.
+
+    Every value has a hard ttl and a soft ttl.
+    After the hard ttl, the value is removed from redis.
+    After the soft ttl, the value is stale, get_or_load returns it and reloads it in background.
+    A missing value (the loader returned None) is also cached for the negative ttl, so it will not hit the database
+    for every request.
+
+    Attributes
+    ----------
+    self._redis: MocaRedis
+        the redis client.
+    self._max_size: int
+        the maximum number of the local entries, the least recently used entry will be removed.
+    self._ttl: int
+        the default hard ttl (seconds).
+    self._soft_ttl: Optional[int]
+        the default soft ttl (seconds), None means the same as the hard ttl.
+    self._local_ttl: float
+        the local copy will be removed after this seconds, even if no invalidation message was received.
+    self._negative_ttl: int
+        the ttl of the missing values (seconds).
+    self._single_flight: Optional[MocaSingleFlight]
+        if this value is not None, only one process loads the same key at the same time.
+    self._id: str
+        the id of this cache, the invalidation messages from this cache are ignored.
+    self._local: OrderedDict
+        {key: (found, value, soft expiration time, local expiration time)}
+    self._generation: int
+        this number will be increased when some local entries were removed,
+        a value read before the invalidation will not be saved to the local tier.
+    self._loads: Dict[str, Task]
+        the running loaders in this process.
+    self._refreshing: Set[str]
+        the keys that are reloaded in background.
+    self._subscribed: bool
+        If this process is not listening the invalidation channel, the local tier can't be trusted.
+    self._drop_callbacks: List[Callable[..., Any]]
+        the functions called with the keys, when the local copies were removed.
+    self._task: Optional[Task]
+        the listener task.
+    self.hits: Dict[str, int]
+        the number of the lookups that found the value, by tier (local or redis).
+    self.misses: int
+        the number of the lookups that found no value.
+    """
+
+    CHANNEL: str = 'tiered-cache-invalidation'
+    ALL: str = '*'
+
+    def __init__(
+            self,
+            redis: MocaRedis,
+            max_size: int = 10000,
+            ttl: int = 3600,
+            soft_ttl: Optional[int] = None,
+            local_ttl: float = 10.0,
+            negative_ttl: int = 10,
+            single_flight: Optional[MocaSingleFlight] = None,
+    ):
+        """
+        :param redis: the redis client.
+        :param max_size: the maximum number of the local entries.
+        :param ttl: the default hard ttl (seconds).
+        :param soft_ttl: the default soft ttl (seconds), None means the same as the hard ttl.
+        :param local_ttl: the local copy will be removed after this seconds.
+        :param negative_ttl: the ttl of the missing values (seconds).
+        :param single_flight: if this value is not None, only one process loads the same key at the same time.
+        """
+        self._redis: MocaRedis = redis
+        self._max_size: int = max_size
+        self._ttl: int = ttl
+        self._soft_ttl: Optional[int] = soft_ttl
+        self._local_ttl: float = local_ttl
+        self._negative_ttl: int = negative_ttl
+        self._single_flight: Optional[MocaSingleFlight] = single_flight
+        self._id: str = uuid4().hex
+        self._local: OrderedDict = OrderedDict()
+        self._generation: int = 0
+        self._loads: Dict[str, Task] = {}
+        self._refreshing: Set[str] = set()
+        self._subscribed: bool = False
+        self._drop_callbacks: List[Callable[..., Any]] = []
+        self._task: Optional[Task] = None
+        self.hits: Dict[str, int] = {'local': 0, 'redis': 0}
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    @property
+    def subscribed(self) -> bool:
+        """If this process is listening the invalidation channel, return True."""
+        return self._subscribed
+
+    # ---- local tier --
+
+    def _get_local(self, key: str) -> Optional[Tuple[bool, Any, float, float]]:
+        if not self._subscribed:
+            return None
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[3] <= time():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, found: bool, value: Any, soft_until: float, hard_until: float,
+                   generation: int) -> None:
+        """Save the local copy, if no invalidation message was received since the generation."""
+        if not self._subscribed or generation != self._generation:
+            return None
+        self._local[key] = (found, value, soft_until, min(hard_until, time() + self._local_ttl))
+        self._local.move_to_end(key)
+        while len(self._local) > self._max_size:
+            self._local.popitem(last=False)
+
+    def drop(self, *keys: str) -> None:
+        """Remove the local copies in this process, the ALL key removes all of them."""
+        self._generation += 1
+        if self.ALL in keys:
+            self._local.clear()
+        else:
+            for key in keys:
+                self._local.pop(key, None)
+        for callback in self._drop_callbacks:
+            callback(*keys)
+
+    def add_drop_callback(self, callback: Callable[..., Any]) -> None:
+        """
+        Call the function with the keys, when the local copies were removed.
+        It is called when a value was changed or deleted in any process, and with the ALL key when the local tier
+        can't be trusted, so the data built from the cached values in this process can be removed by it.
+        """
+        self._drop_callbacks.append(callback)
+
+    # ---- redis tier --
+
+    async def _get_remote(self, key: str) -> Optional[Tuple[bool, Any, float, float]]:
+        """Get the entry from redis, if not exists return None."""
+        generation = self._generation
+        entry = await self._redis.get(f'tiered-cache-{key}', None)
+        if entry is not None:
+            entry = tuple(entry)
+            self._put_local(key, *entry, generation)
+        return entry
+
+    async def _lookup(self, key: str) -> Optional[Tuple[bool, Any, float, float]]:
+        entry = self._get_local(key)
+        if entry is not None:
+            self.hits['local'] += 1
+            return entry
+        entry = await self._get_remote(key)
+        if entry is not None:
+            self.hits['redis'] += 1
+        else:
+            self.misses += 1
+        return entry
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Get the value, if not exists or the missing value was cached, return the default value."""
+        entry = await self._lookup(key)
+        if entry is None or not entry[0]:
+            return default
+        return entry[1]
+
+    async def _store(self, key: str, value: Any, ttl: Optional[int],
+                     soft_ttl: Optional[int]) -> Tuple[bool, Any, float, float]:
+        """Save the value to redis and this process, and remove the local copies in other processes."""
+        found = value is not None
+        if not found:
+            ttl = soft_ttl = self._negative_ttl
+        else:
+            ttl = self._ttl if ttl is None else ttl
+            soft_ttl = (self._soft_ttl or ttl) if soft_ttl is None else soft_ttl
+        now = time()
+        entry = (found, value, now + min(soft_ttl, ttl), now + ttl)
+        async with self._redis.pipeline() as pipe:
+            # a list can be serialized by json, a tuple needs pickle.
+            pipe.set(f'tiered-cache-{key}', list(entry), ttl)
+            pipe.publish(self.CHANNEL, (self._id, [key]))
+        self.drop(key)
+        self._put_local(key, *entry, self._generation)
+        return entry
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, soft_ttl: Optional[int] = None) -> None:
+        """
+        Save the value to redis and this process, and remove the local copies in other processes.
+        :param key: the key.
+        :param value: the value, None means the value is missing (negative caching).
+        :param ttl: the hard ttl (seconds), the default ttl is used for None.
+        :param soft_ttl: the soft ttl (seconds), the default soft ttl is used for None.
+        """
+        await self._store(key, value, ttl, soft_ttl)
+
+    async def delete(self, *keys: str) -> None:
+        """Remove the values from redis and all processes."""
+        async with self._redis.pipeline() as pipe:
+            pipe.delete(*[f'tiered-cache-{key}' for key in keys])
+            pipe.publish(self.CHANNEL, (self._id, list(keys)))
+        self.drop(*keys)
+
+    # ---- loader --
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int],
+                    soft_ttl: Optional[int]) -> Tuple[bool, Any, float, float]:
+        async def build() -> Tuple[bool, Any, float, float]:
+            return await self._store(key, await loader(), ttl, soft_ttl)
+
+        async def load() -> Optional[Tuple[bool, Any, float, float]]:
+            entry = await self._get_remote(key)
+            # a stale value must be rebuilt.
+            return entry if entry is not None and entry[2] > time() else None
+
+        if self._single_flight is None:
+            return await build()
+        return await self._single_flight.do(f'tiered-cache-{key}', load, build)
+
+    def _start_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int],
+                    soft_ttl: Optional[int]) -> Task:
+        """Start the loader, the callers of the same key wait for the same task."""
+        task = self._loads.get(key)
+        if task is None:
+            task = ensure_future(self._load(key, loader, ttl, soft_ttl))
+            self._loads[key] = task
+            task.add_done_callback(lambda _: self._loads.pop(key, None))
+        return task
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int],
+                 soft_ttl: Optional[int]) -> None:
+        """Reload a stale value in background."""
+        if key in self._refreshing:
+            return None
+        self._refreshing.add(key)
+
+        def done(task: Task) -> None:
+            self._refreshing.discard(key)
+            if not task.cancelled() and task.exception() is not None:
+                print_warning(f"Can't refresh the cached value ({key}). <{task.exception()}>")
+
+        self._start_load(key, loader, ttl, soft_ttl).add_done_callback(done)
+
+    async def get_or_load(
+            self,
+            key: str,
+            loader: Callable[[], Awaitable[Any]],
+            ttl: Optional[int] = None,
+            soft_ttl: Optional[int] = None,
+            default: Any = None,
+    ) -> Any:
+        """
+        Get the value, if not exists, load it and save it to the cache.
+        If the value is stale, return it and reload it in background.
+        :param key: the key.
+        :param loader: return the value, None means the value is missing.
+        :param ttl: the hard ttl (seconds), the default ttl is used for None.
+        :param soft_ttl: the soft ttl (seconds), the default soft ttl is used for None.
+        :param default: this value is returned if the value is missing.
+        :return: the value.
+        """
+        entry = await self._lookup(key)
+        if entry is None:
+            # the load task is shared, one cancelled request should not cancel the others.
+            entry = await shield(self._start_load(key, loader, ttl, soft_ttl))
+        elif entry[2] <= time():
+            self._refresh(key, loader, ttl, soft_ttl)
+        if entry is None or not entry[0]:
+            return default
+        return entry[1]
+
+    # ---- invalidation --
+
+    async def listen(self) -> None:
+        """Receive the invalidation messages, reconnect when the connection was lost."""
+        while True:
+            try:
+                channel = await self._redis.subscribe(self.CHANNEL)
+                # some messages may be lost while reconnecting.
+                self.drop(self.ALL)
+                self._subscribed = True
+                while await channel.wait_message():
+                    origin, keys = loads(await channel.get())
+                    if origin != self._id:
+                        self.drop(*keys)
+            except CancelledError:
+                raise
+            except (RedisError, ConnectionError, OSError) as e:
+                print_warning(f'Lost the cache invalidation channel. <{e}>')
+            self._subscribed = False
+            self.drop(self.ALL)
+            await sleep(1)
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start the listener task."""
+        if self._task is None:
+            self._task = loop.create_task(self.listen())
+
+    async def stop(self) -> None:
+        """Stop the listener task."""
+        self._subscribed = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+
+# -------------------------------------------------------------------------- Moca Tiered Cache --
@@ -1,6 +1,9 @@
 # -- Imports --------------------------------------------------------------------------
 
 from .MocaRedis import MocaRedis
+from .MocaRedisPipeline import MocaRedisPipeline
+from .MocaSingleFlight import MocaSingleFlight
+from .MocaTieredCache import MocaTieredCache
 from .utils import test_redis_connection
 
 # -------------------------------------------------------------------------- Imports --
@@ -0,0 +1,94 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Iterable, Dict, Set, Tuple, Union, Optional
+)
+from ipaddress import ip_address, ip_network, IPv4Address, IPv6Address, IPv4Network, IPv6Network
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaIPSet --------------------------------------------------------------------------
+
+
+class MocaIPSet:
+    """
+    A set of ip addresses and networks (CIDR), both IPv4 and IPv6 are supported.
+    The addresses are stored in a hash set, the networks are stored in hash sets by prefix length,
+    so a lookup costs at most one hash lookup per distinct prefix length.
+
+    Attributes
+    ----------
+    self._exact: Set[str]
+        the ip addresses (and the items that are not ip address) as written in the source.
+    self._networks: Dict[int, Tuple[Tuple[int, Set[int]], ...]]
+        {ip version: ((prefix length, the network addresses shifted by the host bits), ...)}
+    """
+
+    __slots__ = ('_exact', '_networks')
+
+    _BITS: Dict[int, int] = {4: 32, 6: 128}
+
+    def __init__(self, items: Iterable[str] = ()):
+        """
+        :param items: ip addresses or networks, like '127.0.0.1' or '10.0.0.0/8'.
+        """
+        self._exact: Set[str] = set()
+        self._networks: Dict[int, Tuple[Tuple[int, Set[int]], ...]] = {4: (), 6: ()}
+        for item in items:
+            self.add(item)
+
+    def _add(self, item: str) -> Optional[Union[IPv4Network, IPv6Network]]:
+        """Add an ip address to the exact set, if the item is a network, return it instead."""
+        if isinstance(item, str) and '/' in item:
+            try:
+                return ip_network(item, strict=False)
+            except ValueError:
+                pass
+        self._exact.add(item)
+        try:
+            # also store the normalized form, like '::1' for '0:0:0:0:0:0:0:1'.
+            self._exact.add(str(ip_address(item)))
+        except ValueError:
+            pass
+        return None
+
+    def __contains__(self, item: str) -> bool:
+        return self.is_in(item)
+
+    def __len__(self) -> int:
+        return len(self._exact) + sum(len(s) for v in self._networks.values() for _, s in v)
+
+    def add(self, item: str) -> None:
+        """Add an ip address or a network."""
+        network = self._add(item)
+        if network is None:
+            return None
+        bits = self._BITS[network.version]
+        value = int(network.network_address) >> (bits - network.prefixlen)
+        for prefix, networks in self._networks[network.version]:
+            if prefix == network.prefixlen:
+                networks.add(value)
+                return None
+        # shorter prefixes cover more addresses, check them first.
+        self._networks[network.version] = tuple(sorted(
+            self._networks[network.version] + ((network.prefixlen, {value}),)
+        ))
+
+    def is_in(self, item: str) -> bool:
+        """If the ip address is in this set or in one of the networks, return True."""
+        if item in self._exact:
+            return True
+        if not self._networks[4] and not self._networks[6]:
+            return False
+        try:
+            address: Union[IPv4Address, IPv6Address] = ip_address(item)
+        except ValueError:
+            return False
+        value = int(address)
+        bits = self._BITS[address.version]
+        for prefix, networks in self._networks[address.version]:
+            if (value >> (bits - prefix)) in networks:
+                return True
+        return False
+
+# -------------------------------------------------------------------------- MocaIPSet --
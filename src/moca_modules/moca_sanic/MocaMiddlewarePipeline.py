@@ -0,0 +1,82 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Tuple, List, Dict, Optional, Callable, Sequence, Awaitable
+)
+from time import perf_counter_ns
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaMiddlewarePipeline --------------------------------------------------------------------------
+
+
+class MocaMiddlewarePipeline:
+    """
+    Run some request middlewares as one middleware.
+    If a stage returns a response or raises an exception, the remaining stages will be skipped.
+
+    Attributes
+    ----------
+    self._stages: Tuple[Tuple[str, Callable], ...]
+        the names and the functions of the stages.
+    self._record_timings: bool
+        record the spent time of each stage.
+    self._timings: Dict[str, List[int]]
+        [the number of calls, the total spent time (nanoseconds)] of each stage.
+    self.observer: Optional[Callable[[float, str], Any]]
+        if this value is not None, it will be called with the spent time (seconds) and the name of each stage.
+    """
+
+    def __init__(
+            self,
+            stages: Sequence[Tuple[str, Callable[[Request], Awaitable[Optional[HTTPResponse]]]]],
+            record_timings: bool = False):
+        """
+        :param stages: the names and the functions of the stages, the stages will be run in this order.
+        :param record_timings: record the spent time of each stage.
+        """
+        self._stages: Tuple[Tuple[str, Callable], ...] = tuple(stages)
+        self._record_timings: bool = record_timings
+        self._timings: Dict[str, List[int]] = {name: [0, 0] for name, _ in self._stages}
+        self.observer: Optional[Callable[[float, str], Any]] = None
+
+    @property
+    def stages(self) -> Tuple[str, ...]:
+        return tuple(name for name, _ in self._stages)
+
+    @property
+    def timings(self) -> Dict[str, Tuple[int, float]]:
+        """Return (the number of calls, the total spent time (seconds)) of each stage."""
+        return {name: (count, total / 1e9) for name, (count, total) in self._timings.items()}
+
+    def clear_timings(self) -> None:
+        """Clear the recorded timings."""
+        for item in self._timings.values():
+            item[0] = item[1] = 0
+
+    async def __call__(self, request: Request) -> Optional[HTTPResponse]:
+        if not self._record_timings and self.observer is None:
+            for _, stage in self._stages:
+                response = await stage(request)
+                if response is not None:
+                    return response
+            return None
+        for name, stage in self._stages:
+            start = perf_counter_ns()
+            try:
+                response = await stage(request)
+            finally:
+                spent = perf_counter_ns() - start
+                if self._record_timings:
+                    timing = self._timings[name]
+                    timing[0] += 1
+                    timing[1] += spent
+                if self.observer is not None:
+                    self.observer(spent / 1e9, name)
+            if response is not None:
+                return response
+        return None
+
+# -------------------------------------------------------------------------- MocaMiddlewarePipeline --
@@ -0,0 +1,62 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Iterable
+)
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaPrefixSet --------------------------------------------------------------------------
+
+
+class MocaPrefixSet:
+    """
+    A set of prefixes, check whether a string starts with one of them in a single pass.
+
+    Attributes
+    ----------
+    self._source: Iterable[str]
+        the prefixes used to build this set.
+    self._match_all: bool
+        if the prefixes contain '*', all strings will be matched.
+    self._root: dict
+        the prefix tree, the children are stored by character, the end of a prefix is marked by None.
+    """
+
+    __slots__ = ('_source', '_match_all', '_root')
+
+    def __init__(self, prefixes: Iterable[str]):
+        """
+        :param prefixes: the prefixes, '*' means all strings will be matched.
+        """
+        self._source: Iterable[str] = prefixes
+        self._match_all: bool = False
+        self._root: dict = {}
+        for prefix in prefixes:
+            if prefix == '*':
+                self._match_all = True
+            node = self._root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[None] = True
+
+    @property
+    def source(self) -> Iterable[str]:
+        return self._source
+
+    def match(self, target: str) -> bool:
+        """If the target starts with one of the prefixes, return True."""
+        if self._match_all:
+            return True
+        node = self._root
+        if None in node:
+            return True
+        for char in target:
+            node = node.get(char)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+# -------------------------------------------------------------------------- MocaPrefixSet --
@@ -0,0 +1,74 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Optional
+)
+from sanic.request import Request, RequestParameters
+from sanic.exceptions import InvalidUsage
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaRequestParams --------------------------------------------------------------------------
+
+
+class MocaRequestParams:
+    """
+    A request scoped view of the request parameters, the body is parsed only when it was used,
+    and the parsed data is shared by all middlewares and the handler.
+    If the request has no body, the json body and the form body are not parsed.
+
+    Attributes
+    ----------
+    self._request: Request
+        the request.
+    self._json: Optional[dict]
+        the json body, if the body is not a json object, it will be an empty dictionary.
+    """
+
+    __slots__ = ('_request', '_json')
+
+    _EMPTY: RequestParameters = RequestParameters()
+
+    def __init__(self, request: Request):
+        """
+        :param request: the request.
+        """
+        self._request: Request = request
+        self._json: Optional[dict] = None
+
+    @property
+    def json(self) -> dict:
+        """The json body, it is decoded only once even if it is not a valid json."""
+        if self._json is None:
+            request = self._request
+            data = None
+            # a multipart body can't be a json.
+            if request.body and not request.content_type.startswith('multipart/'):
+                try:
+                    data = request.json
+                except InvalidUsage:
+                    pass
+            self._json = data if isinstance(data, dict) else {}
+        return self._json
+
+    @property
+    def args(self) -> RequestParameters:
+        return self._request.args
+
+    @property
+    def form(self) -> RequestParameters:
+        return self._request.form if self._request.body else self._EMPTY
+
+    @property
+    def files(self) -> RequestParameters:
+        return self._request.files if self._request.body else self._EMPTY
+
+    @property
+    def headers(self) -> Any:
+        return self._request.headers
+
+    @property
+    def cookies(self) -> dict:
+        return self._request.cookies
+
+# -------------------------------------------------------------------------- MocaRequestParams --
@@ -0,0 +1,102 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Dict, Tuple, Optional, Callable, Hashable, Awaitable
+)
+from functools import wraps
+from hashlib import blake2b
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaResponseCache --------------------------------------------------------------------------
+
+
+class MocaResponseCache:
+    """
+    A decorator to cache the encoded response body of a handler, with a strong ETag.
+    The cached response is used until the version of the source was changed,
+    and if the ETag is in the If-None-Match header, return 304 without the body.
+    Only the responses with status 200 are cached, and the headers set by the handler are not cached.
+
+        @app.route('/configs')
+        @MocaResponseCache(version=lambda request: request.app.config_file.version)
+        async def configs(request):
+            return json(request.app.config_file.dict)
+
+    Attributes
+    ----------
+    self._version: Optional[Callable[[Request], Hashable]]
+        a function to get the version of the source, None means the response never changes.
+    self._key: Optional[Callable[[Request], Hashable]]
+        a function to get the cache key, if the response depends on the request.
+    self._entries: Dict[Hashable, Tuple[Hashable, bytes, str, Optional[str]]]
+        {key: (version, body, etag, content type)}
+    self.hits: int
+        the number of the requests that used the cached response.
+    self.misses: int
+        the number of the requests that called the handler.
+    """
+
+    def __init__(
+            self,
+            version: Optional[Callable[[Request], Hashable]] = None,
+            key: Optional[Callable[[Request], Hashable]] = None,
+    ):
+        """
+        :param version: a function to get the version of the source, None means the response never changes.
+        :param key: a function to get the cache key, if the response depends on the request.
+        """
+        self._version: Optional[Callable[[Request], Hashable]] = version
+        self._key: Optional[Callable[[Request], Hashable]] = key
+        self._entries: Dict[Hashable, Tuple[Hashable, bytes, str, Optional[str]]] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def get_etag(body: bytes) -> str:
+        """Return a strong ETag of the body."""
+        return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+    @staticmethod
+    def is_not_modified(request: Request, etag: str) -> bool:
+        """If the ETag is in the If-None-Match header, return True."""
+        header = request.headers.get('If-None-Match')
+        if header is None:
+            return False
+        if header.strip() == '*':
+            return True
+        for item in header.split(','):
+            item = item.strip()
+            # If-None-Match uses the weak comparison.
+            if item == etag or (item.startswith('W/') and item[2:] == etag):
+                return True
+        return False
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._entries.clear()
+
+    def __call__(self, handler: Callable[..., Awaitable[HTTPResponse]]) -> Callable[..., Awaitable[HTTPResponse]]:
+        @wraps(handler)
+        async def wrapper(request: Request, *args, **kwargs) -> HTTPResponse:
+            key = None if self._key is None else self._key(request)
+            version = None if self._version is None else self._version(request)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                response = await handler(request, *args, **kwargs)
+                if response.status != 200 or response.body is None:
+                    return response
+                entry = (version, response.body, self.get_etag(response.body), response.content_type)
+                self._entries[key] = entry
+            else:
+                self.hits += 1
+            _, body, etag, content_type = entry
+            if self.is_not_modified(request, etag):
+                return HTTPResponse(status=304, headers={'ETag': etag})
+            return HTTPResponse(body, headers={'ETag': etag}, content_type=content_type)
+        return wrapper
+
+# -------------------------------------------------------------------------- MocaResponseCache --
@@ -0,0 +1,45 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Dict, Iterable, Optional, Pattern
+)
+from re import compile as re_compile, escape
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaRouteClassifier --------------------------------------------------------------------------
+
+
+class MocaRouteClassifier:
+    """
+    Classify the request path by prefixes in a single regular expression match.
+
+    Attributes
+    ----------
+    self._default: str
+        the class for the paths that don't match any prefixes.
+    self._pattern: Optional[Pattern]
+        the compiled pattern, every class is a named group.
+    """
+
+    def __init__(self, classes: Dict[str, Iterable[str]], default: str):
+        """
+        :param classes: the prefixes of each class, if some classes are matched, the former one is used.
+        :param default: the class for the paths that don't match any prefixes.
+        """
+        self._default: str = default
+        groups = []
+        for name, prefixes in classes.items():
+            prefixes = [escape(prefix.encode()) for prefix in prefixes]
+            if prefixes:
+                groups.append(b'(?P<' + name.encode() + b'>' + b'|'.join(prefixes) + b')')
+        self._pattern: Optional[Pattern] = re_compile(b'|'.join(groups)) if groups else None
+
+    def classify(self, raw_url: bytes) -> str:
+        """Return the class of the path."""
+        if self._pattern is None:
+            return self._default
+        matched = self._pattern.match(raw_url)
+        return self._default if matched is None else matched.lastgroup
+
+# -------------------------------------------------------------------------- MocaRouteClassifier --
@@ -1,16 +1,17 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Tuple, List, Optional, Callable, Set
+    Union, Tuple, List, Optional, Callable, Set, Dict
 )
 from pathlib import Path
 from sanic import Sanic, Blueprint, __version__
 from sanic.request import Request
 from sanic.server import HttpProtocol
 from sanic.log import logger, LOGGING_CONFIG_DEFAULTS
-from sanic.exceptions import Forbidden, InvalidUsage, SanicException
+from sanic.exceptions import Forbidden, SanicException
 from sanic.websocket import WebSocketProtocol
 from sanic.response import HTTPResponse, text
+from sanic.compat import Header
 from logging import INFO
 from copy import copy
 from ssl import SSLContext, Purpose, create_default_context
@@ -24,7 +25,9 @@ from spf import SanicPluginsFramework, SanicPlugin
 from ..moca_core import LICENSE, IS_DEBUG, CPU_COUNT, tz, ENCODING, is_uvloop
 from ..moca_utils import print_warning, print_info, get_random_string, print_error, is_file, set_process_name, is_ujson
 from ..moca_file import load_json_from_file
-from .utils import get_args, get_remote_address
+from .utils import compile_args, get_remote_address, get_request_params
+from .MocaPrefixSet import MocaPrefixSet
+from .MocaResponseCache import MocaResponseCache
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -402,6 +405,7 @@ class MocaSanic:
         """Initialize the sanic application."""
         # ------ Version ------
         @self._app.route('/server-version', methods={'GET', 'POST', 'OPTIONS'})
+        @MocaResponseCache()
         async def server_version(request: Request) -> HTTPResponse:
             return text(MocaSanic.VERSION)
 
@@ -411,6 +415,7 @@ class MocaSanic:
 
         # ------ License ------
         @self._app.route('/server-license', methods={'GET', 'POST', 'OPTIONS'})
+        @MocaResponseCache()
         async def show_license(request: Request) -> HTTPResponse:
             return text(MocaSanic.LICENSE)
 
@@ -440,16 +445,16 @@ class MocaSanic:
             return text(str(time()))
 
         # ------ Echo ------
+        get_echo_args = compile_args(('message|m', str, 'invalid message', {'max_length': 1024, 'is_ascii': True}))
+
         @self._app.route('/echo', methods={'GET', 'POST', 'OPTIONS'})
         async def echo(request: Request) -> HTTPResponse:
-            message, *_ = get_args(
-                request,
-                ('message|m', str, 'invalid message', {'max_length': 1024, 'is_ascii': True})
-            )
+            message, *_ = get_echo_args(request)
             return text(message)
 
         # ------ Status ------
         @self._app.route('/status', methods={'GET', 'POST', 'OPTIONS'})
+        @MocaResponseCache()
         async def status(request: Request) -> HTTPResponse:
             return text(f'{self._name} is working...')
 
@@ -458,50 +463,58 @@ class MocaSanic:
         async def check_process(request: Request):
             return text(current_process().pid)
 
-        # ------ Check origins ------
+        # ------ Preflight and internal key ------
+        if self._internal_key != '' and self._internal_key is not None:
+            @self._app.middleware('request')
+            async def check_request(request: Request):
+                if request.method == 'OPTIONS':
+                    return text('allowed.')
+                if request.headers.get('moca-internal-key') != self._internal_key:
+                    raise Forbidden('Invalid internal key.')
+        else:
+            @self._app.middleware('request')
+            async def check_request(request: Request):
+                if request.method == 'OPTIONS':
+                    return text('allowed.')
+
+        # ------ Set response headers and check origins ------
+        # the headers can't be changed after the server started,
+        # so convert them to strings and merge them once, only the origin header is set per response.
+        static_headers = Header({str(key): str(value) for key, value in self._headers.items()})
         if '*' in self._origins:
+            static_headers['Access-Control-Allow-Origin'] = '*'
+
             @self._app.middleware('response')
-            async def add_origin_header(request: Request, response: HTTPResponse):
-                response.headers['Access-Control-Allow-Origin'] = '*'
+            async def set_response_headers(request: Request, response: HTTPResponse):
+                response.headers.update(static_headers)
+                extra_headers = getattr(request.ctx, 'response_header', None)
+                if extra_headers is not None:
+                    response.headers.update(extra_headers)
         else:
+            origins = MocaPrefixSet(self._origins)
+            checked_origins: Dict[str, bool] = {}
+
             @self._app.middleware('response')
-            async def add_origin_header(request: Request, response: HTTPResponse):
+            async def set_response_headers(request: Request, response: HTTPResponse):
+                response.headers.update(static_headers)
+                extra_headers = getattr(request.ctx, 'response_header', None)
+                if extra_headers is not None:
+                    response.headers.update(extra_headers)
                 origin = request.headers.get('origin')
                 if origin is not None:
-                    for item in self._origins:
-                        if origin.startswith(item):
-                            response.headers['Access-Control-Allow-Origin'] = origin
-
-        @self._app.middleware('request')
-        async def response_for_preflight(request: Request):
-            if request.method.upper() == 'OPTIONS':
-                return text('allowed.')
-
-        # ------ Check internal key ------
-        if self._internal_key != '' and self._internal_key is not None:
-            @self._app.middleware('request')
-            async def check_internal_key(request: Request):
-                if request.headers.get('moca-internal-key') != self._internal_key:
-                    raise Forbidden('Invalid internal key.')
-
-        # ------ Set response headers ------
-        @self._app.middleware('response')
-        async def set_response_headers(request: Request, response: HTTPResponse):
-            response.headers.update(self._headers)
-            try:
-                headers = request.ctx.response_header
-                response.headers.update(headers)
-            except AttributeError:
-                pass
+                    allowed = checked_origins.get(origin)
+                    if allowed is None:
+                        allowed = origins.match(origin)
+                        if len(checked_origins) < 1024:  # don't let the clients fill the memory.
+                            checked_origins[origin] = allowed
+                    if allowed:
+                        response.headers['Access-Control-Allow-Origin'] = origin
 
         # ------ Set debug middleware ------
         if self._debug:
             @self._app.middleware('request')
             async def before(request: Request):
-                try:
-                    json_data = request.json if isinstance(request.json, dict) else {}
-                except InvalidUsage:
-                    json_data = {}
+                params = get_request_params(request)
                 print()
                 print('-- Receive a request -------------------------')
                 print('-- url --')
@@ -515,11 +528,11 @@ class MocaSanic:
                 print('-- remote --')
                 pprint(get_remote_address(request))
                 print('-- json --')
-                pprint(json_data)
+                pprint(params.json)
                 print('-- args --')
                 pprint(request.args)
                 print('-- form --')
-                pprint(request.form)
+                pprint(params.form)
                 print('-- header --')
                 pprint(request.headers)
                 print('------------------------- Receive a request --')
@@ -592,6 +605,11 @@ class MocaSanic:
     async def _after_server_stop(self, app: Sanic, loop) -> None:
         await self.after_server_stop(app, loop)
 
+    @staticmethod
+    def main_process_start(app: Sanic):
+        """Override this method to run something in the main process before the workers were forked."""
+        pass
+
     @staticmethod
     async def before_server_start(app: Sanic, loop):
         """Override this method to add listener."""
@@ -616,6 +634,7 @@ class MocaSanic:
         """Run Sanic server."""
         set_process_name(f'{self._name} --- main process')
         self._init_app()
+        self.main_process_start(self._app)
         try:
             print_info(f'uvloop: {is_uvloop()}, ujson: {is_ujson()}')
             if self._debug:
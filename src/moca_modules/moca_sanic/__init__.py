@@ -1,7 +1,13 @@
 # -- Imports --------------------------------------------------------------------------
 
-from .utils import get_remote_address, get_args, write_cookie
+from .utils import get_remote_address, get_args, compile_args, get_request_params, write_cookie
+from .MocaRequestParams import MocaRequestParams
 from .MocaSanic import MocaSanic
+from .MocaPrefixSet import MocaPrefixSet
+from .MocaRouteClassifier import MocaRouteClassifier
+from .MocaMiddlewarePipeline import MocaMiddlewarePipeline
+from .MocaIPSet import MocaIPSet
+from .MocaResponseCache import MocaResponseCache
 
 # -------------------------------------------------------------------------- Imports --
 
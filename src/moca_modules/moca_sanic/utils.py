@@ -1,12 +1,11 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Any, Tuple, Optional
+    Any, Tuple, Optional, Callable, Dict
 )
 from functools import partial
 from sanic.request import Request
 from sanic.response import HTTPResponse
-from sanic.exceptions import InvalidUsage
 from datetime import datetime
 from json import JSONDecodeError
 try:
@@ -19,73 +18,130 @@ except (ImportError, ModuleNotFoundError):
     dumps = partial(__dumps, separators=(",", ":"))
 from ..moca_utils import try_to_bool, validate_argument
 from ..moca_el_command import el_command_parser
+from .MocaRequestParams import MocaRequestParams
 
 # -------------------------------------------------------------------------- Imports --
 
 # -- Private Functions --------------------------------------------------------------------------
 
+_MISSING = object()
 
-def __get_param(json_data: dict, request: Request, key: str,
-                type_: Any = None, default: Any = None, validate: Optional[dict] = None, from_: str = 'all') -> Any:
-    for __key in key.split('|'):
-        if from_ == 'all':
-            data = json_data.get(
-                __key,
-                request.args.get(__key,
-                                 request.form.get(__key,
-                                                  request.headers.get(__key.upper().replace('_', '-'),
-                                                                      request.files.get(__key,
-                                                                                        request.cookies.get(__key)))))
-            )
-        elif from_ == 'json':
-            data = json_data.get(__key)
-        elif from_ == 'args':
-            data = request.args.get(__key)
-        elif from_ == 'form':
-            data = request.form.get(__key)
-        elif from_ == 'header':
-            data = request.headers.get(__key.upper().replace('_', '-'))
-        elif from_ == 'file':
-            data = request.files.get(__key)
-        elif from_ == 'cookie':
-            data = request.cookies.get(__key)
+
+def __from_json(params: MocaRequestParams, key: str) -> Any:
+    return params.json.get(key, _MISSING)
+
+
+def __from_args(params: MocaRequestParams, key: str) -> Any:
+    return params.args.get(key, _MISSING)
+
+
+def __from_form(params: MocaRequestParams, key: str) -> Any:
+    return params.form.get(key, _MISSING)
+
+
+def __from_header(params: MocaRequestParams, key: str) -> Any:
+    return params.headers.get(key, _MISSING)
+
+
+def __from_file(params: MocaRequestParams, key: str) -> Any:
+    return params.files.get(key, _MISSING)
+
+
+def __from_cookie(params: MocaRequestParams, key: str) -> Any:
+    return params.cookies.get(key, _MISSING)
+
+
+# the sources will be read in this order.
+__SOURCES: Dict[str, Callable[[MocaRequestParams, str], Any]] = {
+    'json': __from_json,
+    'args': __from_args,
+    'form': __from_form,
+    'header': __from_header,
+    'file': __from_file,
+    'cookie': __from_cookie,
+}
+
+
+def __compile_converter(type_: Any, default: Any) -> Optional[Callable[[Any], Any]]:
+    """Return a function to convert the value to the type, if the type is None or any, return None."""
+    if type_ is None or type_ is any:
+        return None
+    if type_ is int:  # str to int
+        def from_str(data: str) -> Any:
+            try:
+                return int(data)
+            except (ValueError, TypeError):
+                return default
+    elif type_ is list or type_ is dict:  # str to list, str to dict
+        def from_str(data: str) -> Any:
+            try:
+                data = loads(data)
+                return data if type(data) is type_ else default
+            except (ValueError, TypeError, JSONDecodeError):
+                return default
+    elif type_ is bool:
+        from_str = try_to_bool
+    else:
+        from_str = None
+
+    def convert(data: Any) -> Any:
+        if type(data) is type_:
+            return data
+        elif type(data) is str and from_str is not None:
+            return from_str(data)
+        elif (type(data) is int or type(data) is float) and type_ is str:  # int to str, float to str
+            return str(data)
+        else:
+            return default
+    return convert
+
+
+def __compile_param(key: str, type_: Any = None, default: Any = None, validate: Optional[dict] = None,
+                    from_: str = 'all') -> Tuple:
+    """Resolve the aliases, the header names, the validator and the converter."""
+    if from_ == 'all':
+        sources = tuple(__SOURCES.items())
+    elif from_ in __SOURCES:
+        sources = ((from_, __SOURCES[from_]),)
+    else:
+        raise ValueError('form_ argument is only supported  (all, json, args, form, header, file, cookie)')
+    lookups = tuple(
+        tuple(
+            (getter, __key.upper().replace('_', '-') if name == 'header' else __key)
+            for name, getter in sources
+        )
+        for __key in key.split('|')
+    )
+    return (
+        lookups,
+        None if validate is None else partial(validate_argument, **validate),
+        __compile_converter(type_, default),
+        default,
+    )
+
+
+def __get_param(params: MocaRequestParams, lookups: Tuple, validate: Optional[Callable], convert: Optional[Callable],
+                default: Any) -> Any:
+    data = None
+    for alias in lookups:
+        # use the first source that has this key.
+        for getter, key in alias:
+            data = getter(params, key)
+            if data is not _MISSING:
+                break
         else:
-            raise ValueError('form_ argument is only supported  (all, json, args, form, header, file)')
+            data = None
         if data is not None:
             break
-    if type(data) is str:
+    if type(data) is str and data.startswith('[el]'):
         status, value = el_command_parser(data)
         if status:
             data = value
-    if validate is not None and not validate_argument(data, **validate):
+    if validate is not None and not validate(data):
         return default
-    if type_ is None or type_ is any:
-        return data
-    elif type(data) is type_:
+    if convert is None:
         return data
-    elif type(data) is str and type_ is int:  # str to int
-        try:
-            return int(data)
-        except (ValueError, TypeError):
-            return default
-    elif (type(data) is int or type(data) is float) and type_ is str:  # int to str, float to str
-        return str(data)
-    elif type(data) is str and type_ is list:  # str to list
-        try:
-            data = loads(data)
-            return data if type(data) is list else default
-        except (ValueError, TypeError, JSONDecodeError):
-            return default
-    elif type(data) is str and type_ is dict:  # str to dict
-        try:
-            data = loads(data)
-            return data if type(data) is dict else default
-        except (ValueError, TypeError, JSONDecodeError):
-            return default
-    elif type(data) is str and type_ is bool:
-        return try_to_bool(data)
-    else:
-        return default
+    return convert(data)
 
 # -------------------------------------------------------------------------- Private Functions --
 
@@ -93,8 +149,40 @@ def __get_param(json_data: dict, request: Request, key: str,
 
 
 def get_remote_address(request: Request) -> str:
-    """Get remote address"""
-    return request.remote_addr if request.remote_addr != '' else request.ip
+    """Get remote address, the result is saved to the request context."""
+    try:
+        return request.ctx.remote_address
+    except AttributeError:
+        address = request.remote_addr if request.remote_addr != '' else request.ip
+        request.ctx.remote_address = address
+        return address
+
+
+def get_request_params(request: Request) -> MocaRequestParams:
+    """Get the parameter view of the request, the view is saved to the request context."""
+    try:
+        return request.ctx.params
+    except AttributeError:
+        request.ctx.params = MocaRequestParams(request)
+        return request.ctx.params
+
+
+def compile_args(*args, from_: str = 'all') -> Callable[[Request], Tuple]:
+    """
+    Compile the argument specs, and return a function to get the arguments from a request.
+    The aliases, the header names and the validators are resolved here,
+    so create the function once (at import time), and call it in the handlers.
+    The format of args and from_ is same to the get_args function.
+    """
+    params = tuple(
+        __compile_param(key, from_=from_) if isinstance(key, str) else __compile_param(*key, from_=from_)
+        for key in args
+    )
+
+    def extractor(request: Request) -> Tuple:
+        view = get_request_params(request)
+        return tuple([__get_param(view, *param) for param in params])
+    return extractor
 
 
 def get_args(request: Request, *args, from_: str = 'all') -> Tuple:
@@ -112,15 +200,9 @@ def get_args(request: Request, *args, from_: str = 'all') -> Tuple:
                                             'max_length': 32,
                                          }
     The value of from_ argument can be (all, json, args, form, header, file, cookie)
+    If the same arguments are used many times, use compile_args instead.
     """
-    try:
-        json_data = request.json if isinstance(request.json, dict) else {}
-    except InvalidUsage:
-        json_data = {}
-    return tuple([__get_param(json_data, request, key, from_=from_) if isinstance(key, str) else
-                  __get_param(json_data, request, key[0], key[1], from_=from_) if len(key) == 2 else
-                  __get_param(json_data, request, key[0], key[1], key[2], from_=from_) if len(key) == 3 else
-                  __get_param(json_data, request, key[0], key[1], key[2], key[3], from_=from_) for key in args])
+    return compile_args(*args, from_=from_)(request)
 
 
 def write_cookie(
@@ -0,0 +1,136 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, Tuple, Union
+)
+from pathlib import Path
+from mmap import mmap
+from os import getpid
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from struct import Struct
+from threading import Lock
+from time import sleep
+from ..moca_utils import print_error
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+# the sequence number and the length of the snapshot.
+_SEQUENCE = Struct('<Q')
+_LENGTH = Struct('<Q')
+_HEADER_SIZE = _SEQUENCE.size + _LENGTH.size
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- MocaConfigBroker --------------------------------------------------------------------------
+
+
+class MocaConfigBroker:
+    """
+    Share the parsed config data from the main process to the forked worker processes.
+    The main process publishes a snapshot to a shared memory, and the workers only load the snapshot
+    when the version was changed, so all workers switch to the new data at the same time.
+    The channels must be added before the worker processes are forked.
+
+    Each channel is protected by a sequence lock, the sequence number is odd while the snapshot is being written,
+    and the readers retry if the sequence number was changed while reading.
+
+    Attributes
+    ----------
+    self._capacity: int
+        the maximum size of a snapshot (bytes).
+    self._owner: int
+        the process id of the process that created this broker, only this process can publish snapshots.
+    self._lock: Lock
+        the lock for the publishers.
+    self._channels: Dict[str, mmap]
+        the shared memory of the channels.
+    self._cache: Dict[str, Tuple[int, Any]]
+        {name: (sequence number, the loaded snapshot)} the snapshots loaded in this process.
+    """
+
+    def __init__(self, capacity: int = 4 * 1024 * 1024):
+        """
+        :param capacity: the maximum size of a snapshot (bytes), the memory is allocated when it was used.
+        """
+        self._capacity: int = capacity
+        self._owner: int = getpid()
+        self._lock: Lock = Lock()
+        self._channels: Dict[str, mmap] = {}
+        self._cache: Dict[str, Tuple[int, Any]] = {}
+
+    @staticmethod
+    def get_channel_name(name: Union[str, Path]) -> str:
+        """Return the channel name, the absolute path is used if the name is a path."""
+        return str(name.absolute()) if isinstance(name, Path) else name
+
+    @property
+    def is_owner(self) -> bool:
+        return getpid() == self._owner
+
+    def __contains__(self, name: Union[str, Path]) -> bool:
+        return self.get_channel_name(name) in self._channels
+
+    def add(self, name: Union[str, Path]) -> None:
+        """Add a channel, this method must be called before the worker processes are forked."""
+        name = self.get_channel_name(name)
+        if name not in self._channels:
+            # an anonymous mapping is shared with the child processes.
+            self._channels[name] = mmap(-1, _HEADER_SIZE + self._capacity)
+
+    def publish(self, name: Union[str, Path], value: Any) -> bool:
+        """
+        Publish a new snapshot.
+        :param name: the channel name.
+        :param value: the data, it should be able to pickle.
+        :return: if the snapshot was too large, return False.
+        """
+        name = self.get_channel_name(name)
+        data = dumps(value, HIGHEST_PROTOCOL)
+        if len(data) > self._capacity:
+            print_error(f"Can't publish the snapshot of {name}, "
+                        f"{len(data)} bytes is larger than the capacity ({self._capacity} bytes).")
+            return False
+        buffer = self._channels[name]
+        with self._lock:
+            sequence = _SEQUENCE.unpack_from(buffer, 0)[0]
+            _SEQUENCE.pack_into(buffer, 0, sequence + 1)
+            _LENGTH.pack_into(buffer, _SEQUENCE.size, len(data))
+            buffer[_HEADER_SIZE:_HEADER_SIZE + len(data)] = data
+            _SEQUENCE.pack_into(buffer, 0, sequence + 2)
+            self._cache[name] = (sequence + 2, value)
+        return True
+
+    def version(self, name: Union[str, Path]) -> int:
+        """Return the version of the snapshot, 0 means the snapshot is not published yet."""
+        return _SEQUENCE.unpack_from(self._channels[self.get_channel_name(name)], 0)[0] // 2
+
+    def get(self, name: Union[str, Path], default: Any = None) -> Any:
+        """
+        Return the latest snapshot.
+        The same object is returned until a new snapshot was published, so don't change it.
+        """
+        name = self.get_channel_name(name)
+        buffer = self._channels[name]
+        cache = self._cache.get(name)
+        for _ in range(1000):
+            sequence = _SEQUENCE.unpack_from(buffer, 0)[0]
+            if cache is not None and cache[0] == sequence:
+                return cache[1]
+            if sequence == 0:
+                return default
+            if sequence % 2 == 1:
+                sleep(0)  # the snapshot is being written.
+                continue
+            length = _LENGTH.unpack_from(buffer, _SEQUENCE.size)[0]
+            data = buffer[_HEADER_SIZE:_HEADER_SIZE + length]
+            if _SEQUENCE.unpack_from(buffer, 0)[0] != sequence:
+                continue
+            value = loads(data)
+            self._cache[name] = (sequence, value)
+            return value
+        # the publisher is too slow, use the old snapshot.
+        return default if cache is None else cache[1]
+
+# -------------------------------------------------------------------------- MocaConfigBroker --
@@ -2,6 +2,7 @@
 
 from .MocaMultiProcessLock import MocaMultiProcessLock
 from .MocaSharedMemory import MocaSharedMemory
+from .MocaConfigBroker import MocaConfigBroker
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -20,6 +20,9 @@ from .moca_utils import (
     have_alnum, have_alpha, have_ascii, have_numeric, create_tor_deny_config_for_nginx, pm, pl, resize_img,
     get_my_public_ip, get_my_public_ip_v6, get_my_public_ip_v4, update_use_github, update_moca_modules
 )
+from .moca_serializer import (
+    register_serializer, register_compressor, get_compress_stats
+)
 from .moca_centos_utils import (  # The functions in this file, Only supports CentOS 8 and RHEL 8.
     get_centos_cpu_info, get_centos_cpu_model_name, get_centos_cpu_vendor_id, get_centos_cpu_cores,
     get_centos_cpu_cache_size, get_centos_cpu_mhz, get_centos_ssh_login_log, get_centos_accepted_ssh_login_log,
@@ -71,4 +74,12 @@ prettytable
     A simple Python library for easily displaying tabular data in a visually appealing ASCII table format
 Pillow
     The friendly PIL fork (Python Imaging Library)
+orjson
+    Fast, correct Python JSON library supporting dataclasses, datetimes, and numpy
+msgpack (optional)
+    MessagePack serializer
+zstandard (optional)
+    Zstandard bindings for Python
+lz4 (optional)
+    LZ4 Bindings for Python
 """
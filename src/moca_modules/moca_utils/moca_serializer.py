@@ -0,0 +1,219 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, Callable
+)
+from math import isfinite
+from gzip import compress as gzip_compress, decompress as gzip_decompress
+from orjson import dumps as orjson_dumps, loads as orjson_loads
+try:
+    from cloudpickle import dumps as p_dumps, loads as p_loads
+except (ImportError, ModuleNotFoundError):
+    from pickle import dumps as p_dumps, loads as p_loads
+try:
+    from msgpack import packb, unpackb
+except (ImportError, ModuleNotFoundError):
+    packb = unpackb = None
+try:
+    from zstandard import ZstdCompressor, ZstdDecompressor
+except (ImportError, ModuleNotFoundError):
+    ZstdCompressor = ZstdDecompressor = None
+try:
+    from lz4.frame import compress as lz4_compress, decompress as lz4_decompress
+except (ImportError, ModuleNotFoundError):
+    lz4_compress = lz4_decompress = None
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+# the first byte of the tagged format, it is not a valid first byte of a pickle or the legacy b'moca' format.
+MAGIC: bytes = b'\xfe'
+
+# if the compressed size is larger than this ratio of the original size, the data is saved without compression.
+COMPRESS_RATIO: float = 0.9
+
+# {tag: (name, dumps, loads, accepts)} the serializers are tried in the order of the tags.
+_serializers: Dict[int, Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any], Callable[[Any], bool]]] = {}
+
+# {tag: (name, compress, decompress)}
+_compressors: Dict[int, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+
+# the data smaller than this will not be compressed by the default compressor.
+_compress_threshold: int = 1024
+
+# the tag of the compressor used for the large data.
+_default_compressor: Optional[int] = None
+
+# the measured sizes, {tag: [the compressed bytes, the original bytes]}
+_compress_stats: Dict[int, List[int]] = {}
+
+NO_COMPRESSION: int = 0
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Registry --------------------------------------------------------------------------
+
+
+def register_serializer(
+        tag: int,
+        name: str,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes], Any],
+        accepts: Callable[[Any], bool],
+) -> None:
+    """
+    Register a serializer, moca_dumps uses the serializer that has the smallest tag and accepts the object.
+    The pickle serializer (127) accepts any object, so the serializers for specific types should use a smaller tag.
+    The tag is saved in the header, so don't change the tag of a serializer after saving the data.
+    :param tag: 1 ~ 255
+    :param name: the name of the serializer.
+    :param dumps: serialize the object.
+    :param loads: deserialize the data.
+    :param accepts: return True if the serializer can restore the object without changing its types.
+    """
+    if not 0 < tag < 256:
+        raise ValueError('The tag must be 1 ~ 255.')
+    _serializers[tag] = (name, dumps, loads, accepts)
+    for key in sorted(_serializers):
+        _serializers[key] = _serializers.pop(key)
+
+
+def register_compressor(
+        tag: int,
+        name: str,
+        compress: Callable[[bytes], bytes],
+        decompress: Callable[[bytes], bytes],
+        default: bool = False,
+        threshold: int = 1024,
+) -> None:
+    """
+    Register a compressor.
+    :param tag: 1 ~ 255
+    :param name: the name of the compressor.
+    :param compress: compress the data.
+    :param decompress: decompress the data.
+    :param default: use this compressor for the new data.
+    :param threshold: the data smaller than this will not be compressed, if this compressor is the default one.
+    """
+    global _default_compressor, _compress_threshold
+    if not 0 < tag < 256:
+        raise ValueError('The tag must be 1 ~ 255.')
+    _compressors[tag] = (name, compress, decompress)
+    if default:
+        _default_compressor = tag
+        _compress_threshold = threshold
+
+
+def get_compress_stats() -> Dict[str, float]:
+    """Return the average compression ratio of each compressor."""
+    return {
+        _compressors[tag][0]: compressed / original
+        for tag, (compressed, original) in _compress_stats.items() if original
+    }
+
+# -------------------------------------------------------------------------- Registry --
+
+# -- Serializers --------------------------------------------------------------------------
+
+
+def _is_plain(obj: Any, allow_bytes: bool) -> bool:
+    """
+    Return True if the object only consists of dict (str keys), list, str, int, float, bool and None.
+    Tuples are not plain, json and msgpack would restore them as lists.
+    """
+    cls = type(obj)
+    if cls is str or cls is bool or obj is None:
+        return True
+    elif cls is float:
+        # json can't keep nan and infinity.
+        return isfinite(obj)
+    elif cls is int:
+        return -2 ** 63 <= obj < 2 ** 64
+    elif cls is list:
+        return all(_is_plain(item, allow_bytes) for item in obj)
+    elif cls is dict:
+        return all(type(key) is str and _is_plain(value, allow_bytes) for key, value in obj.items())
+    elif cls is bytes:
+        return allow_bytes
+    else:
+        return False
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson_dumps(obj)
+
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return packb(obj, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return unpackb(data, raw=False, strict_map_key=True)
+
+
+register_serializer(1, 'bytes', bytes, bytes, lambda obj: type(obj) is bytes)
+register_serializer(2, 'orjson', _orjson_dumps, orjson_loads, lambda obj: _is_plain(obj, False))
+if packb is not None:
+    register_serializer(3, 'msgpack', _msgpack_dumps, _msgpack_loads, lambda obj: _is_plain(obj, True))
+register_serializer(127, 'pickle', p_dumps, p_loads, lambda obj: True)
+
+# the last registered default compressor is used, zstd > lz4 > gzip.
+# decompressing gzip costs more than decoding the data, so it is only used for the very large data.
+register_compressor(1, 'gzip', gzip_compress, gzip_decompress, default=True, threshold=65536)
+if lz4_compress is not None:
+    register_compressor(3, 'lz4', lz4_compress, lz4_decompress, default=True)
+if ZstdCompressor is not None:
+    # the compressor objects are not thread safe, but creating them is cheap.
+    register_compressor(
+        2, 'zstd',
+        lambda data: ZstdCompressor(level=3).compress(data),
+        lambda data: ZstdDecompressor().decompress(data),
+        default=True,
+    )
+
+# -------------------------------------------------------------------------- Serializers --
+
+# -- Functions --------------------------------------------------------------------------
+
+
+def moca_dumps(obj: Any) -> bytes:
+    """
+    Serialize and compress.
+    The format is MAGIC + the tag of the serializer + the tag of the compressor + the data.
+    The large data is compressed by the default compressor, if the compression saves enough space.
+    """
+    for tag, (_, dumps, _, accepts) in _serializers.items():
+        if accepts(obj):
+            try:
+                data = dumps(obj)
+            except (TypeError, ValueError, OverflowError):
+                continue
+            break
+    else:
+        raise TypeError(f'No serializer accepts the object. <{type(obj)}>')
+    compressor = NO_COMPRESSION
+    if len(data) > _compress_threshold and _default_compressor is not None:
+        compressed = _compressors[_default_compressor][1](data)
+        stats = _compress_stats.setdefault(_default_compressor, [0, 0])
+        stats[0] += len(compressed)
+        stats[1] += len(data)
+        if len(compressed) < len(data) * COMPRESS_RATIO:
+            compressor, data = _default_compressor, compressed
+    return MAGIC + bytes((tag, compressor)) + data
+
+
+def moca_loads(data: Optional[bytes]) -> Any:
+    """Load serialized object, the data saved by the old versions (gzip + pickle or pickle) can also be loaded."""
+    if data is None:
+        return None
+    elif data[:1] == MAGIC:
+        compressor = data[2]
+        body = data[3:] if compressor == NO_COMPRESSION else _compressors[compressor][2](data[3:])
+        return _serializers[data[1]][2](body)
+    elif data[:4] == b'moca':
+        return p_loads(gzip_decompress(data[4:]))
+    else:
+        return p_loads(data)
+
+# -------------------------------------------------------------------------- Functions --
@@ -24,7 +24,6 @@ from io import StringIO
 from aiofiles import open as aio_open
 from uuid import uuid4
 from re import compile
-from gzip import compress, decompress
 from multiprocessing import current_process
 from pprint import pprint
 from setproctitle import setproctitle
@@ -44,10 +43,6 @@ from PIL import Image
 from io import BytesIO
 from shutil import copytree, rmtree, copy
 from os import remove
-try:
-    from cloudpickle import dumps as p_dumps, loads as p_loads
-except (ImportError, ModuleNotFoundError):
-    from pickle import dumps as p_dumps, loads as p_loads
 from json import JSONDecodeError
 try:
     from ujson import dump as __dump, dumps as __dumps, loads
@@ -62,6 +57,7 @@ except (ImportError, ModuleNotFoundError):
     dump = partial(__dump, separators=(",", ":"), ensure_ascii=False)
     dumps = partial(__dumps, separators=(",", ":"), ensure_ascii=False)
     is_ujson = lambda: False
+from .moca_serializer import moca_dumps, moca_loads
 from ..moca_core import (
     LICENSE, NEW_LINE, tz, ConsoleColor, HIRAGANA, KATAKANA, PROCESS_ID, IS_WIN, DIGITS, ENCODING, TMP_DIR,
     IS_UNIX_LIKE, SELF_PATH
@@ -712,15 +708,6 @@ def check_email_format(email: str) -> bool:
     return email_pattern.match(email) is not None
 
 
-def moca_dumps(obj: Any) -> bytes:
-    """serialize and compress."""
-    data = p_dumps(obj)
-    if len(data) > 1024:
-        return b'moca' + compress(data)
-    else:
-        return data
-
-
 def moca_dump(obj: Any, filename: Union[Path, str]) -> None:
     """serialize and compress."""
     with open(str(filename), mode='wb') as file:
@@ -733,16 +720,6 @@ async def moca_aio_dump(obj: Any, filename: Union[Path, str]) -> None:
         await file.write(moca_dumps(obj))
 
 
-def moca_loads(data: Optional[bytes]) -> Any:
-    """Load serialized object."""
-    if data is None:
-        return None
-    elif data[:4] == b'moca':
-        return p_loads(decompress(data[4:]))
-    else:
-        return p_loads(data)
-
-
 def moca_load(filename: Union[Path, str]) -> Any:
     """Load serialized object."""
     with open(str(filename), mode='rb') as file:
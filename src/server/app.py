@@ -1,15 +1,21 @@
 # -- Imports --------------------------------------------------------------------------
 
 from sanic import Sanic, Blueprint
-from threading import Thread
 from limits.strategies import FixedWindowElasticExpiryRateLimiter
 from limits.storage import MemoryStorage, RedisStorage
-from copy import copy
+from asyncio import run_coroutine_threadsafe
 from aioredis import RedisError
 from pymysql import MySQLError
-from .middlewares import middlewares
+from .middlewares import middlewares, request_pipeline
+from .middlewares.api_key_index import ApiKeyIndex
+from .middlewares.ip_blacklist import IPBlacklist
+from .middlewares.security_monitor import SecurityMonitor
 from .routes import blueprints
+from .routes.snapshot import SnapshotStore
+from .routes.client_counter import ClientCounter
+from .routes.root import response_caches
 from .. import moca_modules as mzk
+from ..moca_modules.moca_dev import MocaSamplingProfiler, MocaRequestProfiler
 from .. import core
 
 # -------------------------------------------------------------------------- Imports --
@@ -39,7 +45,7 @@ else:
         core.SERVER_CONFIG['access_control_allowed_methods']
     )
 # Access-Control-Max-Age header.
-core.SERVER_CONFIG['headers']['Access-Control-Allow-Methods'] = int(
+core.SERVER_CONFIG['headers']['Access-Control-Max-Age'] = int(
     core.SERVER_CONFIG['access_control_max_age']
 )
 # Access-Control-Expose-Headers
@@ -80,50 +86,61 @@ app: Sanic = moca_sanic.app
 
 
 # set event listener
+def main_process_start(app_: Sanic) -> None:
+    # parse the config files once in the main process, and share the parsed data to the workers.
+    app_.config_watcher = mzk.MocaFileWatcher(debounce=0.2)
+    app_.config_broker = mzk.MocaConfigBroker()
+    for filename in (
+            core.SYSTEM_CONFIG, core.IP_BLACKLIST_FILE, core.API_KEY_FILE,
+            core.APP_CLIENT_CONFIG_FILE, core.WEB_CLIENT_CONFIG_FILE, core.SCREEN_NAME_LIST_FILE,
+    ):
+        mzk.MocaSynchronizedJSONFile(filename, watcher=app_.config_watcher).share(app_.config_broker)
+
+
 async def before_server_start(app_: Sanic, loop):
     mzk.set_process_name(f'{app_.name} --- listener {mzk.get_my_pid()}')
     mzk.print_info(f'Starting Sanic server. -- {mzk.get_my_pid()}')
 
+    # the files are reloaded when they were changed, the changes in 0.2 seconds are handled together.
+    # the files shared by the main process are loaded from the config broker, and are not watched here.
+    app_.file_watcher: mzk.MocaFileWatcher = mzk.MocaFileWatcher(debounce=0.2)
+    broker = getattr(app_, 'config_broker', None)
     app_.system_config: mzk.MocaConfig = mzk.MocaConfig(
-        core.SYSTEM_CONFIG, manual_reload=True
+        core.SYSTEM_CONFIG, watcher=app_.file_watcher, broker=broker
     )
     app_.ip_blacklist: mzk.MocaSynchronizedJSONListFile = mzk.MocaSynchronizedJSONListFile(
-        core.IP_BLACKLIST_FILE, manual_reload=True, remove_duplicates=True,
+        core.IP_BLACKLIST_FILE, watcher=app_.file_watcher, broker=broker, remove_duplicates=True,
     )
+    app_.ip_blacklist_index: IPBlacklist = IPBlacklist(app_.ip_blacklist)
     app_.api_key_config: mzk.MocaSynchronizedJSONListFile = mzk.MocaSynchronizedJSONListFile(
-        core.API_KEY_FILE, manual_reload=True
+        core.API_KEY_FILE, watcher=app_.file_watcher, broker=broker
     )
+    app_.api_key_index: ApiKeyIndex = ApiKeyIndex(app_.api_key_config)
     app_.app_client_config: mzk.MocaSynchronizedJSONDictFile = mzk.MocaSynchronizedJSONDictFile(
-        core.APP_CLIENT_CONFIG_FILE, manual_reload=True
+        core.APP_CLIENT_CONFIG_FILE, watcher=app_.file_watcher, broker=broker
     )
     app_.web_client_config: mzk.MocaSynchronizedJSONDictFile = mzk.MocaSynchronizedJSONDictFile(
-        core.WEB_CLIENT_CONFIG_FILE, manual_reload=True
+        core.WEB_CLIENT_CONFIG_FILE, watcher=app_.file_watcher, broker=broker
     )
     app_.screen_name_list: mzk.MocaSynchronizedJSONListFile = mzk.MocaSynchronizedJSONListFile(
-        core.SCREEN_NAME_LIST_FILE, manual_reload=True
+        core.SCREEN_NAME_LIST_FILE, watcher=app_.file_watcher, broker=broker
     )
     app_.dict_cache = {}
+    app_.allowed_referer = mzk.MocaPrefixSet(())
     app_.secure_log = mzk.MocaFileLog(core.LOG_DIR.joinpath('secure.log'))
+    app_.security_monitor: SecurityMonitor = SecurityMonitor(
+        app_.secure_log, app_.ip_blacklist_index, app_.system_config
+    )
     app_.scheduler = mzk.MocaScheduler()
+    # the profilers are toggled by /moca-virtual-dm/profiler, and write the profiles to the log directory.
+    app_.sampling_profiler: MocaSamplingProfiler = MocaSamplingProfiler(core.LOG_DIR)
+    app_.request_profiler: MocaRequestProfiler = MocaRequestProfiler(core.LOG_DIR)
     if core.SERVER_CONFIG['rate_limiter_redis_storage'] is None:
         app_._storage_for_rate_limiter = MemoryStorage()
     else:
         app_._storage_for_rate_limiter = RedisStorage(core.SERVER_CONFIG['rate_limiter_redis_storage'])
     app_.rate_limiter = FixedWindowElasticExpiryRateLimiter(app_._storage_for_rate_limiter)
 
-    def __reload_timer(application: Sanic) -> None:
-        while True:
-            mzk.sleep(1)
-            application.system_config.reload_file()
-            application.ip_blacklist.reload_file()
-            application.api_key_config.reload_file()
-            application.app_client_config.reload_file()
-            application.web_client_config.reload_file()
-            application.screen_name_list.reload_file()
-
-    app_._timer_thread = Thread(target=__reload_timer, args=(app_,), daemon=True)
-    app_._timer_thread.start()
-
     try:
         app_.mysql = mzk.MocaMysql(
             core.DB_CONFIG['mysql']['host'],
@@ -150,11 +167,21 @@ async def before_server_start(app_: Sanic, loop):
             int(core.DB_CONFIG['redis']['port']),
             int(core.DB_CONFIG['redis']['db']),
             core.DB_CONFIG['redis']['password'],
-            int(core.DB_CONFIG['mysql']['min_size']),
-            int(core.DB_CONFIG['mysql']['max_size']),
+            int(core.DB_CONFIG['redis']['min_size']),
+            int(core.DB_CONFIG['redis']['max_size']),
         )
         app_.redis.prefix = core.DB_CONFIG['redis']['prefix']
         await app_.redis.test_con()
+        app_.single_flight = mzk.MocaSingleFlight(app_.redis)
+        app_.dos_counter = mzk.MocaSlidingWindowCounter(app_.redis, 'dos-detect', 5)
+        app_.client_counter = ClientCounter(
+            mzk.MocaAsyncCounter(
+                mzk.AioRedisDriver(await app_.redis.get_aio_pool(), f'mr-{app_.redis.prefix}-counter-')
+            ),
+            app_.mysql,
+            app_.redis,
+            app_.single_flight,
+        )
     except KeyError as e:
         mzk.print_error(f'Redis database configuration error. missing key: {e}')
         mzk.sys_exit(1)
@@ -164,14 +191,29 @@ async def before_server_start(app_: Sanic, loop):
         mzk.print_error("You can use 'python3 moca.py test-redis-con' to check your database.")
         mzk.print_error(f"<(RedisError, ConnectionRefusedError): {e}>")
         mzk.sys_exit(1)
+    app_.client_init_writer = mzk.MocaBufferedWriter(
+        app_.mysql,
+        core.CLIENT_INIT_QUERY,
+        int(core.SERVER_CONFIG['client_init_buffer']['max_size']),
+        float(core.SERVER_CONFIG['client_init_buffer']['interval']),
+        int(core.SERVER_CONFIG['client_init_buffer']['max_pending']),
+        app_.client_counter.add,
+    )
     try:
-        app_.simple_cache = mzk.MocaSimpleCache(
-            int(core.DB_CONFIG['simple_cache']['pool_size']),
-            int(core.DB_CONFIG['simple_cache']['page_size']),
+        app_.cache = mzk.MocaTieredCache(
+            app_.redis,
+            int(core.DB_CONFIG['tiered_cache']['max_size']),
+            int(core.DB_CONFIG['tiered_cache']['ttl']),
+            int(core.DB_CONFIG['tiered_cache']['soft_ttl']),
+            float(core.DB_CONFIG['tiered_cache']['local_ttl']),
+            int(core.DB_CONFIG['tiered_cache']['negative_ttl']),
+            app_.single_flight,
         )
     except KeyError as e:
-        mzk.print_error(f'SimpleCache configuration error. missing key: {e}')
+        mzk.print_error(f'TieredCache configuration error. missing key: {e}')
         mzk.sys_exit(1)
+    # the snapshots are removed with the local copies of the tiered cache.
+    app_.snapshots = SnapshotStore(app_.cache)
     try:
         app_.mail = mzk.MocaMail(
             core.MAIL_CONFIG['smtp_server']['user'],
@@ -185,35 +227,114 @@ async def before_server_start(app_: Sanic, loop):
         mzk.print_error(f'Mail configuration error. missing key: {e}')
         mzk.sys_exit(1)
 
+    # the metrics of all workers are aggregated in redis, and exported by /moca-virtual-dm/metrics.
+    app_.metrics: mzk.MocaMetrics = mzk.MocaMetrics(app_.redis)
+    app_.http_latency = app_.metrics.histogram(
+        'moca_http_request_duration_seconds', 'The latency of the requests.', ('endpoint',)
+    )
+    app_.http_responses = app_.metrics.counter(
+        'moca_http_responses_total', 'The number of the responses.', ('endpoint', 'status')
+    )
+    request_pipeline.observer = app_.metrics.histogram(
+        'moca_middleware_duration_seconds', 'The spent time of the request middlewares.', ('middleware',)
+    ).observe
+    app_.redis.timer = app_.metrics.histogram(
+        'moca_redis_command_duration_seconds', 'The latency of the redis commands.', ('command',)
+    ).observe
+    app_.redis.acquire_timer = app_.metrics.histogram(
+        'moca_redis_pool_wait_seconds', 'The time waiting for a pooled redis connection.'
+    ).observe
+    app_.mysql.timer = app_.metrics.histogram(
+        'moca_mysql_query_duration_seconds', 'The latency of the mysql queries.', ('statement',)
+    ).observe
+
+    def cache_requests():
+        values = {}
+        for name, cache in response_caches.items():
+            values[('response', name, 'hit')] = cache.hits
+            values[('response', name, 'miss')] = cache.misses
+        for name, count in app_.snapshots.hits.items():
+            values[('snapshot', name, 'hit')] = count
+        for name, count in app_.snapshots.misses.items():
+            values[('snapshot', name, 'miss')] = count
+        for tier, count in app_.cache.hits.items():
+            values[('tiered', tier, 'hit')] = count
+        values[('tiered', 'all', 'miss')] = app_.cache.misses
+        return values
+
+    app_.metrics.collect(
+        'moca_cache_requests_total', 'The number of the cache lookups.', ('cache', 'name', 'result'), cache_requests
+    )
+    app_.metrics.collect(
+        'moca_redis_health_check_failures_total', 'The number of the failed redis health checks.', (),
+        lambda: {(): app_.redis.health_check_failures},
+    )
+
 
 async def after_server_start(app_: Sanic, loop):
     mzk.print_info(f'Started Sanic server. -- {mzk.get_my_pid()}')
 
     # run scheduled tasks.
-    def dos_detect():
-        info = copy(app_.dict_cache.get('dos-detect'))
-        app_.dict_cache['dos-detect'] = {}
-        if info is None:
-            return None
-        for ip, count in info.items():
-            if count > core.system_config.get_config('dos_detect', int, 5000):
-                app_.ip_blacklist.append(ip)
-                app_.secure_log.write_log(
-                    f"Add {ip} to the blacklist. <dos_detection>",
-                    mzk.LogLevel.WARNING
-                )
-
-    app_.scheduler.add_event_per_second('Dos-detect', dos_detect, 5)
+    def client_count_reconcile():
+        run_coroutine_threadsafe(app_.client_counter.reconcile(), loop)
+
+    app_.scheduler.add_event_per_minute('Client-count-reconcile', client_count_reconcile, 10)
+
+    # write the buffered client registrations.
+    app_.client_init_writer.start(loop)
+
+    # listen the invalidation messages of the local cache, they also remove the snapshots.
+    app_.cache.start(loop)
+
+    # block the ip addresses that sent too many requests in the window, the requests of all workers are counted.
+    async def dos_detect(totals):
+        limit = core.system_config.get_config('dos_detect', int, 5000)
+        for ip, count in totals.items():
+            if count > limit:
+                app_.security_monitor.ban(ip, 'dos_detection')
+
+    app_.dos_counter.start(loop, dos_detect)
+
+    # write the security logs and ban the ip addresses in background.
+    app_.security_monitor.start(loop)
+
+    # write the banned ip addresses to the blacklist file.
+    app_.ip_blacklist_index.start(loop)
+
+    # ping redis periodically, and reconnect the pooled connections if it failed.
+    app_.redis.start_health_check(loop, float(core.DB_CONFIG['redis'].get('health_check_interval', 5)))
+
+    # push the metrics of this worker to redis.
+    app_.metrics.start(loop)
 
 
 async def before_server_stop(app_: Sanic, loop):
     mzk.print_info(f'Stopping Sanic server. -- {mzk.get_my_pid()}')
+    app_.file_watcher.stop()
+    try:
+        app_.sampling_profiler.stop()
+    except OSError as e:
+        mzk.print_error(f"Can't write the profile. <{e}>")
+    await app_.cache.stop()
+    await app_.dos_counter.stop()
+    try:
+        await app_.security_monitor.stop()
+        await app_.ip_blacklist_index.stop()
+    except OSError as e:
+        mzk.print_error(f"Can't write the ip blacklist file. <{e}>")
+    try:
+        await app_.client_init_writer.close()
+    except (MySQLError, ConnectionError, OSError) as e:
+        mzk.print_error(f"Can't write the buffered client registrations. <{e}>")
+    await app_.metrics.stop()
+    await app_.redis.stop_health_check()
 
 
 async def after_server_stop(app_: Sanic, loop):
     mzk.print_info(f'Stopped Sanic server. -- {mzk.get_my_pid()}')
 
 
+moca_sanic.main_process_start = main_process_start
 moca_sanic.before_server_start = before_server_start
 moca_sanic.after_server_start = after_server_start
 moca_sanic.before_server_stop = before_server_stop
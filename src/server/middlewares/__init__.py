@@ -4,6 +4,7 @@ from typing import (
     Dict, Callable, Tuple, Union
 )
 from spf import SanicPlugin
+from ... import moca_modules as mzk
 from ... import core
 from .ip_blacklist_filter import ip_blacklist_filter
 from .maintenance_flag import maintenance_flag
@@ -13,6 +14,9 @@ from .dos_detection import dos_detection
 from .referer_checker import referer_checker
 from .add_time_header import add_time_header
 from .save_start_time import save_start_time
+from .classify_path import classify_path
+from .record_metrics import record_metrics
+from .request_profiler import request_profiler, save_request_profile
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -26,14 +30,33 @@ plugin: str = 'plugin'
 
 # -- Default Middlewares --------------------------------------------------------------------------
 
+# the request middlewares, they will be run in the order of `middleware_order` in configs/server.json.
+request_middlewares: Dict[str, Callable] = {
+    'save_start_time': save_start_time,
+    'request_profiler': request_profiler,
+    'classify_path': classify_path,
+    'ip_blacklist_filter': ip_blacklist_filter,
+    'maintenance_flag': maintenance_flag,
+    'dos_detection': dos_detection,
+    'force_headers': force_headers,
+    'referer_checker': referer_checker,
+    'api_key_checker': api_key_checker,
+}
+
+try:
+    request_pipeline: mzk.MocaMiddlewarePipeline = mzk.MocaMiddlewarePipeline(
+        [(name, request_middlewares[name]) for name in core.SERVER_CONFIG['middleware_order']],
+        mzk.try_to_bool(core.SERVER_CONFIG.get('middleware_timings', False)),
+    )
+except KeyError as e:
+    mzk.print_error(f'Unknown middleware in middleware_order: {e}')
+    mzk.sys_exit(1)
+
 middlewares: Dict[str, Tuple[str, Union[Callable, SanicPlugin]]] = {
-    'save_start_time': (request, save_start_time),
-    'maintenance_flag': (request, maintenance_flag),
-    'force_headers': (request, force_headers),
-    'referer_checker': (request, referer_checker),
-    'api_key_checker': (request, api_key_checker),
-    'dos_detection': (request, dos_detection),
+    'request_pipeline': (request, request_pipeline),
     'add_time_header': (response, add_time_header),
+    'record_metrics': (response, record_metrics),
+    'save_request_profile': (response, save_request_profile),
 }
 
 
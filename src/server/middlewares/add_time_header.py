@@ -11,15 +11,12 @@ from time import time
 
 async def add_time_header(request: Request, response: HTTPResponse):
     """Add Start-Time, End-Time, Spent-Time headers to response."""
-    try:
-        start = request.ctx.start_time
+    start = getattr(request.ctx, 'start_time', None)
+    if start is not None:
         end = time()
-        response.headers.update({
-            'Moca-Start-Time': start,
-            'Moca-End-Time': end,
-            'MocaSpent-Time': end - start,
-        })
-    except AttributeError:
-        pass
+        headers = response.headers
+        headers['Moca-Start-Time'] = str(start)
+        headers['Moca-End-Time'] = str(end)
+        headers['MocaSpent-Time'] = str(end - start)
 
 # -------------------------------------------------------------------------- Middleware --
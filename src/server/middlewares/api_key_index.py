@@ -0,0 +1,164 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Dict, List, Tuple, Optional, FrozenSet, Callable
+)
+from limits import parse_many, RateLimitItem
+from ... import moca_modules as mzk
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Api Key Index --------------------------------------------------------------------------
+
+
+class PathTrie:
+    """
+    A prefix tree of the allowed paths.
+    If some paths are matched, the path that appears first in the config file will be used.
+
+    Attributes
+    ----------
+    self._root: dict
+        the root node, the children are stored by character, the matched path is stored by None.
+    """
+
+    __slots__ = ('_root',)
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, index: int, path: str, limits: Optional[List[RateLimitItem]]) -> None:
+        """
+        Add a path.
+        :param index: the position in the config file.
+        :param path: the path prefix.
+        :param limits: the rate limits for this path, None means unlimited.
+        """
+        node = self._root
+        for char in path:
+            node = node.setdefault(char, {})
+        if None not in node:  # the first one is used.
+            node[None] = (index, path, limits)
+
+    def match(self, target: str) -> Optional[Tuple[int, str, Optional[List[RateLimitItem]]]]:
+        """Return (index, path, limits) of the first matched path, if not found return None."""
+        node = self._root
+        found = node.get(None)
+        for char in target:
+            node = node.get(char)
+            if node is None:
+                break
+            item = node.get(None)
+            if item is not None and (found is None or item[0] < found[0]):
+                found = item
+        return found
+
+
+class ApiKey:
+    """
+    A compiled api key.
+
+    Attributes
+    ----------
+    self.key: str
+        the api key.
+    self.status: bool
+        the status of the api key.
+    self.limits: Optional[List[RateLimitItem]]
+        the rate limits for this key, None means unlimited.
+    self.paths: PathTrie
+        the allowed paths.
+    self.ip: Optional[FrozenSet[str]]
+        the allowed ip addresses, None means all ip addresses are allowed.
+    self.required_headers: Dict[str, Any]
+        the required headers.
+    self.get_required_args: Optional[Callable]
+        the compiled extractor of the required arguments, None means no arguments are required.
+    self.required_args: Tuple
+        the values of the required arguments.
+    self.delay: float
+        the delay seconds.
+    """
+
+    __slots__ = ('key', 'status', 'limits', 'paths', 'ip', 'required_headers', 'get_required_args', 'required_args',
+                 'delay')
+
+    def __init__(self, info: dict):
+        """
+        :param info: an item of the api key config file.
+        """
+        self.key: str = info.get('key')
+        self.status: bool = info.get('status', False)
+        rate = info.get('rate')
+        self.limits: Optional[List[RateLimitItem]] = None if rate == '*' else parse_many(rate)
+        self.paths: PathTrie = PathTrie()
+        for index, path_info in enumerate(info.get('allowed_path')):
+            if ':' in path_info:
+                path, path_rate = path_info.split(':', 1)
+            else:
+                path, path_rate, = path_info, '*'
+            self.paths.add(index, path, None if path_rate == '*' else parse_many(path_rate))
+        ip = info.get('ip')
+        if ip == '*':
+            self.ip: Optional[FrozenSet[str]] = None
+        elif isinstance(ip, str):
+            self.ip: Optional[FrozenSet[str]] = frozenset((ip,))
+        else:
+            self.ip: Optional[FrozenSet[str]] = frozenset(ip)
+        required = info.get('required')
+        self.required_headers: Dict[str, Any] = required['headers']
+        self.get_required_args: Optional[Callable] = \
+            mzk.compile_args(*required['args'].keys()) if required['args'] else None
+        self.required_args: Tuple = tuple(required['args'].values())
+        self.delay: float = info.get('delay', 0)
+
+
+class ApiKeyIndex:
+    """
+    The compiled api key config file, it will be compiled again when the file was reloaded.
+
+    Attributes
+    ----------
+    self._file: MocaSynchronizedJSONListFile
+        the api key config file.
+    self._source: Optional[list]
+        the list that was used to build the index.
+    self._index: Dict[str, ApiKey]
+        the api keys.
+    """
+
+    def __init__(self, file: mzk.MocaSynchronizedJSONListFile):
+        """
+        :param file: the api key config file.
+        """
+        self._file: mzk.MocaSynchronizedJSONListFile = file
+        self._source: Optional[list] = None
+        self._index: Dict[str, ApiKey] = {}
+
+    def _compile(self, source: list) -> Dict[str, ApiKey]:
+        """Compile the api key list."""
+        index: Dict[str, ApiKey] = {}
+        for info in source:
+            key = info.get('key')
+            if key in index:  # the first one is used.
+                continue
+            try:
+                index[key] = ApiKey(info)
+            except (TypeError, ValueError, KeyError, AttributeError) as e:
+                # a broken config should not be treated as an unknown key.
+                mzk.print_warning(f'Invalid API-KEY config, disabled it: <{key}> {e}')
+                index[key] = ApiKey({
+                    'key': key, 'status': False, 'rate': '*', 'allowed_path': [], 'ip': '*',
+                    'required': {'headers': {}, 'args': {}},
+                })
+        return index
+
+    def get(self, key: str) -> Optional[ApiKey]:
+        """Get the compiled api key, if not found return None."""
+        source = self._file.list
+        if source is not self._source:
+            self._index = self._compile(source)
+            self._source = source
+        return self._index.get(key)
+
+# -------------------------------------------------------------------------- Api Key Index --
@@ -0,0 +1,22 @@
+# -- Imports --------------------------------------------------------------------------
+
+from sanic.request import Request
+from ... import moca_modules as mzk
+from ... import core
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+classifier: mzk.MocaRouteClassifier = mzk.MocaRouteClassifier(core.SERVER_CONFIG['path_classes'], 'api')
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Middleware --------------------------------------------------------------------------
+
+
+async def classify_path(request: Request):
+    """Save the class of the request path (static, status, web or api) to request."""
+    request.ctx.path_class = classifier.classify(request.raw_url)
+
+# -------------------------------------------------------------------------- Middleware --
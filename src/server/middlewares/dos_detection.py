@@ -14,12 +14,6 @@ from ... import moca_modules as mzk
 
 async def dos_detection(request: Request):
     """Count access for dos detection."""
-    ip = mzk.get_remote_address(request)
-    if request.app.dict_cache.get('dos-detect') is None:
-        request.app.dict_cache['dos-detect'] = {}
-    try:
-        request.app.dict_cache['dos-detect'][ip] += 1
-    except KeyError:
-        request.app.dict_cache['dos-detect'][ip] = 1
+    request.app.dos_counter.hit(mzk.get_remote_address(request))
 
 # -------------------------------------------------------------------------- Middleware --
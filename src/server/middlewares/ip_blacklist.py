@@ -0,0 +1,155 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    List, Set, Optional, Iterable
+)
+from asyncio import AbstractEventLoop, Task, CancelledError, sleep
+from ... import moca_modules as mzk
+try:
+    from fcntl import flock, LOCK_EX, LOCK_UN
+except (ImportError, ModuleNotFoundError):
+    flock = LOCK_EX = LOCK_UN = None
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- IP Blacklist --------------------------------------------------------------------------
+
+
+class IPBlacklist:
+    """
+    The compiled ip blacklist, the changes of the file are applied when it was reloaded.
+    The banned ip addresses are blocked at once, and added to the file in batches.
+    All workers add to the same file, so the file is read again and merged under a file lock before writing,
+    and the written ip addresses stay in the set until the reloaded file contains them.
+
+    Attributes
+    ----------
+    self._file: MocaSynchronizedJSONListFile
+        the ip blacklist file.
+    self._source: Optional[list]
+        the list that was used to build the set.
+    self._items: Set[str]
+        the items of the reloaded file in the set.
+    self._written: Set[str]
+        the ip addresses that were written to the file, but are not in the reloaded file yet.
+    self._set: MocaIPSet
+        the compiled blacklist.
+    self._pending: List[str]
+        the banned ip addresses that are not written to the file yet.
+    self._task: Optional[Task]
+        the flush task.
+    """
+
+    def __init__(self, file: mzk.MocaSynchronizedJSONListFile):
+        """
+        :param file: the ip blacklist file.
+        """
+        self._file: mzk.MocaSynchronizedJSONListFile = file
+        self._source: Optional[list] = None
+        self._items: Set[str] = set()
+        self._written: Set[str] = set()
+        self._set: mzk.MocaIPSet = mzk.MocaIPSet()
+        self._pending: List[str] = []
+        self._task: Optional[Task] = None
+
+    def _get_set(self) -> mzk.MocaIPSet:
+        """
+        Return the compiled blacklist, apply the changes if the file was reloaded.
+        The added items are added to the set, it is compiled again only if some items were removed.
+        """
+        source = self._file.list
+        if source is not self._source:
+            items = set(source)
+            self._written.difference_update(items)
+            if self._items - items:
+                self._set = mzk.MocaIPSet(items)
+                for ip in self._pending:
+                    self._set.add(ip)
+                for ip in self._written:
+                    self._set.add(ip)
+            else:
+                for item in items - self._items:
+                    self._set.add(item)
+            self._items = items
+            self._source = source
+        return self._set
+
+    def is_in(self, ip: str) -> bool:
+        """If the ip address is in the blacklist, return True."""
+        return self._get_set().is_in(ip)
+
+    def ban(self, ips: Iterable[str]) -> List[str]:
+        """Add the ip addresses to the blacklist, return the ip addresses that were not banned before."""
+        blacklist = self._get_set()
+        banned = []
+        for ip in ips:
+            if not blacklist.is_in(ip):
+                blacklist.add(ip)
+                banned.append(ip)
+        self._pending.extend(banned)
+        return banned
+
+    def _write(self, pending: List[str]) -> list:
+        """
+        Add the ip addresses to the file, and return the written list.
+        The file is read again under the file lock, so the ip addresses added by other workers are not lost.
+        """
+        with open(f'{self._file.filename}.lock', mode='a') as lock:
+            if flock is not None:
+                flock(lock, LOCK_EX)
+            try:
+                try:
+                    current = mzk.load_json_from_file(self._file.filename)
+                except ValueError:
+                    current = None
+                if not isinstance(current, list):
+                    current = list(self._file.list)
+                existing = set(current)
+                added = [ip for ip in pending if ip not in existing]
+                return self._file.change_json(current + added) if added else current
+            finally:
+                if flock is not None:
+                    flock(lock, LOCK_UN)
+
+    async def flush(self) -> None:
+        """Write the pending ip addresses to the file."""
+        if self._pending:
+            self._get_set()
+            source, pending, self._pending = self._source, self._pending, []
+            try:
+                written = await mzk.get_running_loop().run_in_executor(None, self._write, pending)
+            except BaseException:
+                self._pending[:0] = pending
+                raise
+            self._written.update(pending)
+            current = self._file.list
+            if self._source is source and (current is source or current is written):
+                # the set already has the written ip addresses, don't compile the list returned by the file.
+                self._source = current
+
+    async def run(self) -> None:
+        """Write the pending ip addresses to the file once per second."""
+        while True:
+            await sleep(1)
+            try:
+                await self.flush()
+            except OSError as e:
+                mzk.print_warning(f"Can't write the ip blacklist file. <{e}>")
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start the flush task."""
+        if self._task is None:
+            self._task = loop.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write the pending ip addresses."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+# -------------------------------------------------------------------------- IP Blacklist --
@@ -11,9 +11,9 @@ from ... import moca_modules as mzk
 
 async def ip_blacklist_filter(request: Request):
     """
-    Block all IPs in configs/ip_blacklist.json
+    Block all IPs and networks in configs/ip_blacklist.json
     """
-    if request.app.ip_blacklist.is_in(mzk.get_remote_address(request)):
+    if request.app.ip_blacklist_index.is_in(mzk.get_remote_address(request)):
         raise Forbidden("Your access was blocked by ip filter.")
     else:
         pass  # do nothing
@@ -0,0 +1,20 @@
+# -- Imports --------------------------------------------------------------------------
+
+from sanic.request import Request
+from sanic.response import HTTPResponse
+from time import time
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Middleware --------------------------------------------------------------------------
+
+
+async def record_metrics(request: Request, response: HTTPResponse):
+    """Record the latency and the status code of the request, the rejected requests have no endpoint."""
+    endpoint = request.endpoint or 'none'
+    request.app.http_responses.inc(endpoint, str(response.status))
+    start = getattr(request.ctx, 'start_time', None)
+    if start is not None:
+        request.app.http_latency.observe(time() - start, endpoint)
+
+# -------------------------------------------------------------------------- Middleware --
@@ -12,7 +12,7 @@ from ... import core
 
 async def referer_checker(request: Request):
     """Check the referer header."""
-    if not request.raw_url.startswith(b'/status'):
+    if request.ctx.path_class != 'status':
         config = request.app.system_config.get_config('referer', dict)
         # {
         #     "force": bool,
@@ -22,15 +22,10 @@ async def referer_checker(request: Request):
         if referer is None and config['force']:
             raise Forbidden('Missing referer.')
         elif referer is not None:
-            status = False
-            if '*' in config['allowed_referer']:
-                status = True
-            else:
-                for item in config['allowed_referer']:
-                    if referer.startswith(item):
-                        status = True
-                        break
-            if not status:
+            # the prefix set is built again only when the config file was reloaded.
+            if request.app.allowed_referer.source is not config['allowed_referer']:
+                request.app.allowed_referer = mzk.MocaPrefixSet(config['allowed_referer'])
+            if not request.app.allowed_referer.match(referer):
                 if core.SERVER_CONFIG.get('debug', False):
                     mzk.print_warning(f'Received a request from unknown referer <{referer}>.')
                 raise Forbidden('Invalid referer.')
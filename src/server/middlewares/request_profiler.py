@@ -0,0 +1,39 @@
+# -- Imports --------------------------------------------------------------------------
+
+from hmac import compare_digest
+from sanic.request import Request
+from sanic.response import HTTPResponse
+from ... import moca_modules as mzk
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Middleware --------------------------------------------------------------------------
+
+
+async def request_profiler(request: Request):
+    """
+    If the request profiler of this worker is enabled,
+    profile the request that has the Moca-Profile header with the root password.
+    This middleware should run after the ip blacklist and the api key checks.
+    """
+    if request.app.request_profiler.enabled:
+        header = request.headers.get('Moca-Profile')
+        root_pass = request.app.system_config.get_config('root_pass')
+        if header is not None and root_pass is not None and \
+                compare_digest(header.encode(), str(root_pass).encode()):
+            request.ctx.profile = request.app.request_profiler.begin()
+
+
+async def save_request_profile(request: Request, response: HTTPResponse):
+    """Write the profile of the request to the log directory, and add the file name to the response."""
+    profile = getattr(request.ctx, 'profile', None)
+    if profile is not None:
+        try:
+            path = request.app.request_profiler.end(profile, request.endpoint or request.path)
+        except OSError as e:
+            mzk.print_warning(f"Can't write the request profile. <{e}>")
+        else:
+            if path is not None:
+                response.headers['Moca-Profile-File'] = path.name
+
+# -------------------------------------------------------------------------- Middleware --
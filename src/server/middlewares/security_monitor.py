@@ -0,0 +1,169 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Dict, Set, List, Tuple, Optional
+)
+from asyncio import AbstractEventLoop, Task, Queue, QueueFull, CancelledError, sleep
+from collections import OrderedDict
+from pathlib import Path
+from ... import moca_modules as mzk
+from .ip_blacklist import IPBlacklist
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Variables --------------------------------------------------------------------------
+
+# the logs are written in a executor thread, this is written as the location of them.
+_LOG_ORIGIN: Tuple[str, str, int] = (Path(__file__).name, 'SecurityMonitor', -1)
+
+# -------------------------------------------------------------------------- Variables --
+
+# -- Security Monitor --------------------------------------------------------------------------
+
+
+class SecurityMonitor:
+    """
+    Collect the security events in the request handlers, and write the logs and ban the ip addresses
+    in a background task. A request only needs to increase a counter and put the ip address to a queue,
+    and the same ip address is queued only once until the background task handles it.
+    The logs of a batch are written to the file at once in a executor thread.
+
+    Attributes
+    ----------
+    self._secure_log: MocaFileLog
+        the secure log.
+    self._blacklist: IPBlacklist
+        the ip blacklist.
+    self._system_config: MocaConfig
+        the system config.
+    self._interval: float
+        the events in this seconds will be handled together.
+    self._queue: Queue
+        the ip addresses that have new events.
+    self._queued: Set[str]
+        the ip addresses in the queue.
+    self._unknown_api_key: OrderedDict
+        {ip: (the number of the unknown api keys, the last unknown api key)}
+        the least recently seen ip address is removed when it has more than maxsize entries,
+        and the entry is removed when the ip address was banned.
+    self._maxsize: int
+        the maximum number of the ip addresses in the queue and in the unknown api key counter.
+    self._bans: Dict[str, str]
+        {ip: the reason} the ip addresses that should be banned.
+    self._dropped: int
+        the number of the events that were dropped because the queue was full.
+    self._task: Optional[Task]
+        the background task.
+    """
+
+    def __init__(self,
+                 secure_log: mzk.MocaFileLog,
+                 blacklist: IPBlacklist,
+                 system_config: mzk.MocaConfig,
+                 maxsize: int = 10000,
+                 interval: float = 0.5):
+        """
+        :param secure_log: the secure log.
+        :param blacklist: the ip blacklist.
+        :param system_config: the system config.
+        :param maxsize: the maximum number of the ip addresses in the queue and in the unknown api key counter.
+        :param interval: the events in this seconds will be handled together.
+        """
+        self._secure_log: mzk.MocaFileLog = secure_log
+        self._blacklist: IPBlacklist = blacklist
+        self._system_config: mzk.MocaConfig = system_config
+        self._interval: float = interval
+        self._queue: Queue = Queue(maxsize)
+        self._queued: Set[str] = set()
+        self._unknown_api_key: OrderedDict = OrderedDict()
+        self._maxsize: int = maxsize
+        self._bans: Dict[str, str] = {}
+        self._dropped: int = 0
+        self._task: Optional[Task] = None
+
+    def _notify(self, ip: str) -> None:
+        """Put the ip address to the queue, if it is not in the queue."""
+        if ip not in self._queued:
+            try:
+                self._queue.put_nowait(ip)
+                self._queued.add(ip)
+            except QueueFull:
+                self._dropped += 1
+
+    def unknown_api_key(self, ip: str, key: str) -> None:
+        """Received an unknown api key."""
+        count, _ = self._unknown_api_key.pop(ip, (0, key))
+        self._unknown_api_key[ip] = (count + 1, key)
+        if len(self._unknown_api_key) > self._maxsize:
+            self._unknown_api_key.popitem(last=False)
+        self._notify(ip)
+
+    def ban(self, ip: str, reason: str) -> None:
+        """Add the ip address to the blacklist."""
+        self._bans.setdefault(ip, reason)
+        self._notify(ip)
+
+    def _handle(self, ips: List[str]) -> List[Tuple[str, int]]:
+        """Ban the ip addresses, and return the logs (message, level) to write."""
+        logs: List[Tuple[str, int]] = []
+        limit = self._system_config.get_config('block_ip_when_received_invalid_system_auth', int, 0)
+        for ip in ips:
+            count, key = self._unknown_api_key.get(ip, (0, None))
+            if key is not None:
+                logs.append((f"Received a unknown API-KEY: <{key}> from {ip}. ({count} times)", mzk.LogLevel.WARNING))
+                if count > limit:
+                    self._bans.setdefault(ip, 'api_key_checker')
+        bans = {ip: self._bans.pop(ip) for ip in ips if ip in self._bans}
+        for ip in bans:
+            # the banned ip addresses can't send requests any more.
+            self._unknown_api_key.pop(ip, None)
+        for ip in self._blacklist.ban(bans.keys()):
+            logs.append((f"Add {ip} to the blacklist. <{bans[ip]}>", mzk.LogLevel.WARNING))
+        if self._dropped:
+            logs.append((
+                f"The security event queue was full, {self._dropped} events were dropped.", mzk.LogLevel.WARNING
+            ))
+            self._dropped = 0
+        return logs
+
+    async def _write_logs(self, logs: List[Tuple[str, int]]) -> None:
+        """Write the logs in a executor thread."""
+        if logs:
+            await mzk.get_running_loop().run_in_executor(None, self._secure_log.write_logs, logs, _LOG_ORIGIN)
+
+    async def run(self) -> None:
+        """Handle the queued events."""
+        while True:
+            ips = [await self._queue.get()]
+            # collect the events in the interval, and handle them together.
+            await sleep(self._interval)
+            while not self._queue.empty():
+                ips.append(self._queue.get_nowait())
+            self._queued.difference_update(ips)
+            try:
+                await self._write_logs(self._handle(ips))
+            except OSError as e:
+                mzk.print_warning(f"Can't handle the security events. <{e}>")
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start the background task."""
+        if self._task is None:
+            self._task = loop.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background task, and handle the remaining events."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        # the events taken by the cancelled task are also in this set.
+        ips = list(self._queued)
+        self._queued.clear()
+        await self._write_logs(self._handle(ips))
+
+# -------------------------------------------------------------------------- Security Monitor --
@@ -0,0 +1,87 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional
+)
+from ... import moca_modules as mzk
+from ... import core
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Client Counter --------------------------------------------------------------------------
+
+
+class ClientCounter:
+    """
+    The number of the registered clients.
+    The count is kept in redis, and increased when new clients were inserted,
+    so the clients table don't need to be scanned for every request.
+
+    Attributes
+    ----------
+    self._counter: MocaAsyncCounter
+        the redis counter.
+    self._mysql: MocaMysql
+        the mysql client.
+    self._redis: MocaRedis
+        the redis client.
+    self._single_flight: MocaSingleFlight
+        only one worker will count the clients table when the counter is missing.
+    """
+
+    KEY: str = 'clients'
+
+    def __init__(self,
+                 counter: mzk.MocaAsyncCounter,
+                 mysql: mzk.MocaMysql,
+                 redis: mzk.MocaRedis,
+                 single_flight: mzk.MocaSingleFlight):
+        """
+        :param counter: the redis counter.
+        :param mysql: the mysql client.
+        :param redis: the redis client.
+        :param single_flight: only one worker will count the clients table when the counter is missing.
+        """
+        self._counter: mzk.MocaAsyncCounter = counter
+        self._mysql: mzk.MocaMysql = mysql
+        self._redis: mzk.MocaRedis = redis
+        self._single_flight: mzk.MocaSingleFlight = single_flight
+
+    async def _load(self) -> Optional[int]:
+        """Get the count from redis, if not exists return None."""
+        value, _ = await self._counter.get(self.KEY)
+        return value
+
+    async def _build(self) -> int:
+        """Count the clients table, and save it to redis."""
+        res = await self._mysql.execute_aio(core.CLIENT_COUNT_QUERY)
+        value = int(res[0][0])
+        await self._counter.set(self.KEY, value)
+        return value
+
+    async def count(self) -> int:
+        """Return the number of the registered clients."""
+        value = await self._load()
+        if value is None:
+            value = await self._single_flight.do(self.KEY, self._load, self._build)
+        return value
+
+    async def add(self, value: int) -> None:
+        """Increase the count, only if the counter was seeded."""
+        if await self._load() is not None:
+            await self._counter.add(self.KEY, value)
+
+    async def reconcile(self) -> None:
+        """
+        Count the clients table again, to fix the drift caused by lost increments.
+        Only one worker will run it at the same time.
+        """
+        token = await self._redis.acquire_lock('client-count-reconcile', 60000)
+        if token is None:
+            return None
+        try:
+            await self._build()
+        finally:
+            await self._redis.release_lock('client-count-reconcile', token)
+
+# -------------------------------------------------------------------------- Client Counter --
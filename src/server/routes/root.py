@@ -1,8 +1,12 @@
 # -- Imports --------------------------------------------------------------------------
 
-from sanic import Blueprint
+from typing import (
+    Dict, List
+)
+from datetime import datetime
+from sanic import Blueprint, Sanic
 from sanic.request import Request
-from sanic.response import HTTPResponse, json as original_json, text
+from sanic.response import HTTPResponse, json as original_json, text, raw
 from orjson import dumps as orjson_dumps
 from functools import partial
 json = partial(original_json, dumps=orjson_dumps)
@@ -10,6 +14,7 @@ from sanic.exceptions import Forbidden
 from ... import moca_modules as mzk
 from ... import core
 from .utils import check_root_pass
+from .snapshot import ListSnapshot
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -18,37 +23,123 @@ from .utils import check_root_pass
 root: Blueprint = Blueprint('root', None)
 
 
+async def _build_news(app: Sanic) -> List[List[str]]:
+    """Get news from mysql, and encode them."""
+    res = await app.mysql.execute_aio(core.GET_NEWS_QUERY)
+    special = []
+    normal = []
+    if res is not None and len(res) > 0 and len(res[0]) > 0:
+        for id_, news_type, title, detail, url, img_path, special_flag in res:
+            news_item = {
+                'id': id_,
+                'type': news_type,
+                'title': title,
+                'detail': detail,
+                'url': url,
+                'img_path': img_path,
+            }
+            if special_flag:
+                special.append(news_item)
+            else:
+                normal.append(news_item)
+    return ListSnapshot.encode(special, normal)
+
+
+async def _load_news(app: Sanic) -> ListSnapshot:
+    """Load the encoded news from the cache or mysql, and save the snapshot."""
+    generation = app.snapshots.generation('news-info')
+    cache = await app.cache.get_or_load('news-info', partial(_build_news, app))
+    return app.snapshots.put('news-info', ListSnapshot.from_cache(cache), generation)
+
+
+async def _build_slide_ad(app: Sanic) -> List[List[str]]:
+    """Get slide ads from mysql, and encode them."""
+    res = await app.mysql.execute_aio(core.GET_SLIDE_AD_QUERY)
+    special = []
+    normal = []
+    if res is not None and len(res) > 0 and len(res[0]) > 0:
+        for id_, img_path, url, special_flag in res:
+            slide_ad = {
+                'id': id_,
+                'img_path': img_path,
+                'url': url
+            }
+            if special_flag:
+                special.append(slide_ad)
+            else:
+                normal.append(slide_ad)
+    return ListSnapshot.encode(special, normal)
+
+
+async def _load_slide_ad(app: Sanic) -> ListSnapshot:
+    """Load the encoded slide ads from the cache or mysql, and save the snapshot."""
+    generation = app.snapshots.generation('slide-ad')
+    cache = await app.cache.get_or_load('slide-ad', partial(_build_slide_ad, app))
+    return app.snapshots.put('slide-ad', ListSnapshot.from_cache(cache), generation)
+
+
+async def _build_ai_info_list(app: Sanic) -> List[List[str]]:
+    """Get ai info list from mysql, and encode it."""
+    res = await app.mysql.execute_aio(core.GET_AI_INFO_QUERY) or ()
+    return ListSnapshot.encode([], [{
+        'name': item[0],
+        'twitter': item[1],
+        'bot_name': item[0],
+        'img': item[2],
+        'icon': item[3],
+        'bg': item[4],
+        'url': item[5],
+        'first_word': item[6],
+        'details': item[7],
+    } for item in res])
+
+
+async def _load_ai_info_list(app: Sanic) -> ListSnapshot:
+    """Load the encoded ai info list from the cache or mysql, and save the snapshot."""
+    generation = app.snapshots.generation('ai-info-list')
+    cache = await app.cache.get_or_load('ai-info-list', partial(_build_ai_info_list, app))
+    return app.snapshots.put('ai-info-list', ListSnapshot.from_cache(cache), generation)
+
+
+_init_args = mzk.compile_args(
+    ('client_type|client', str, None, {'is_in': ['web', 'app']}),
+    ('client_id|id', str, None, {'max_length': 36, 'min_length': 36})
+)
+
+
 @root.route('/init', {'GET', 'POST', 'OPTIONS'})
 async def init(request: Request) -> HTTPResponse:
-    client_type, client_id = mzk.get_args(
-        request,
-        ('client_type|client', str, None, {'is_in': ['web', 'app']}),
-        ('client_id|id', str, None, {'max_length': 36, 'min_length': 36})
-    )
+    client_type, client_id = _init_args(request)
     if client_type is None:
         raise Forbidden('client_type parameter format error.')
     if client_id is None:
         raise Forbidden('client_id parameter format error.')
-    await request.app.mysql.execute_aio(
-        core.CLIENT_INIT_QUERY,
-        (client_id, client_type, mzk.get_remote_address(request)),
-        True
+    await request.app.client_init_writer.put(
+        (client_id, client_type, mzk.get_remote_address(request), datetime.now())
     )
     return text('success.')
 
 
 @root.route('/client-count', {'GET', 'POST', 'OPTIONS'})
 async def client_count(request: Request) -> HTTPResponse:
-    res = await request.app.mysql.execute_aio(core.CLIENT_COUNT_QUERY)
-    return text(res[0][0])
+    return text(str(await request.app.client_counter.count()))
+
+
+_configs_args = mzk.compile_args(
+    ('client_type|client', str, None, {'is_in': ['web', 'app']}),
+)
+
+
+_configs_cache = mzk.MocaResponseCache(
+    version=lambda request: (request.app.web_client_config.version, request.app.app_client_config.version),
+    key=lambda request: _configs_args(request)[0],
+)
 
 
 @root.route('/configs', {'GET', 'POST', 'OPTIONS'})
+@_configs_cache
 async def configs(request: Request) -> HTTPResponse:
-    client_type, *_ = mzk.get_args(
-        request,
-        ('client_type|client', str, None, {'is_in': ['web', 'app']}),
-    )
+    client_type, *_ = _configs_args(request)
     if client_type == 'web':
         return json(request.app.web_client_config.dict)
     elif client_type == 'app':
@@ -57,16 +148,18 @@ async def configs(request: Request) -> HTTPResponse:
         raise Forbidden('client_type parameter format error.')
 
 
+_add_news_args = mzk.compile_args(
+    ('news_type|type', str, None, {'is_in': ['simple-text', 'one-image']}),
+    ('title', str, None, {'max_length': 16}),
+    ('detail', str, None, {'max_length': 256}),
+    ('url', str, None, {'max_length': 1024}),
+    ('img_path', str, None, {'max_length': 1024}),
+)
+
+
 @root.route('/add-news', {'GET', 'POST', 'OPTIONS'})
 async def add_news(request: Request) -> HTTPResponse:
-    news_type, title, detail, url, img_path = mzk.get_args(
-        request,
-        ('news_type|type', str, None, {'is_in': ['simple-text', 'one-image']}),
-        ('title', str, None, {'max_length': 16}),
-        ('detail', str, None, {'max_length': 256}),
-        ('url', str, None, {'max_length': 1024}),
-        ('img_path', str, None, {'max_length': 1024}),
-    )
+    news_type, title, detail, url, img_path = _add_news_args(request)
     if news_type is None:
         raise Forbidden('missing required parameter (news_type).')
     elif news_type == 'simple-text':
@@ -80,50 +173,27 @@ async def add_news(request: Request) -> HTTPResponse:
         (news_type, title, detail, url, img_path),
         True
     )
-    await request.app.redis.delete('news-info-special')
-    await request.app.redis.delete('news-info-normal')
+    await request.app.cache.delete('news-info')
     return text('success.')
 
 
 @root.route('/get-news', {'GET', 'POST', 'OPTIONS'})
 async def get_news(request: Request) -> HTTPResponse:
-    special = await request.app.redis.get('news-info-special', None)
-    normal = await request.app.redis.get('news-info-normal', None)
-    if special is not None and normal is not None:
-        mzk.shuffle(normal)
-        special.extend(normal)
-        return json(special)
-    res = await request.app.mysql.execute_aio(core.GET_NEWS_QUERY)
-    special = []
-    normal = []
-    if len(res) > 0 and len(res[0]) > 0:
-        for id_, news_type, title, detail, url, img_path, special_flag in res:
-            news_item = {
-                'id': id_,
-                'type': news_type,
-                'title': title,
-                'detail': detail,
-                'url': url,
-                'img_path': img_path,
-            }
-            if special_flag:
-                special.append(news_item)
-            else:
-                normal.append(news_item)
-    await request.app.redis.set('news-info-special', special)
-    await request.app.redis.set('news-info-normal', normal)
-    mzk.shuffle(normal)
-    special.extend(normal)
-    return json(special)
+    snapshot = request.app.snapshots.get('news-info')
+    if snapshot is None:
+        snapshot = await _load_news(request.app)
+    return raw(snapshot.render(), content_type='application/json')
+
+
+_add_slide_ad_args = mzk.compile_args(
+    ('url', str, None, {'max_length': 1024}),
+    ('img_path', str, None, {'max_length': 1024}),
+)
 
 
 @root.route('/add-slide-ad', {'GET', 'POST', 'OPTIONS'})
 async def add_slide_ad(request: Request) -> HTTPResponse:
-    url, img_path = mzk.get_args(
-        request,
-        ('url', str, None, {'max_length': 1024}),
-        ('img_path', str, None, {'max_length': 1024}),
-    )
+    url, img_path = _add_slide_ad_args(request)
     if img_path is None:
         raise Forbidden('img_path parameter format error.')
     await request.app.mysql.execute_aio(
@@ -131,70 +201,51 @@ async def add_slide_ad(request: Request) -> HTTPResponse:
         (img_path, url),
         True
     )
-    await request.app.redis.delete('slide-ad-special')
-    await request.app.redis.delete('slide-ad-normal')
+    await request.app.cache.delete('slide-ad')
     return text('success.')
 
 
 @root.route('/get-slide-ad', {'GET', 'POST', 'OPTIONS'})
 async def get_slide_ad(request: Request) -> HTTPResponse:
-    special = await request.app.redis.get('slide-ad-special', None)
-    normal = await request.app.redis.get('slide-ad-normal', None)
-    if special is not None and normal is not None:
-        mzk.shuffle(normal)
-        special.extend(normal)
-        return json(special)
-    res = await request.app.mysql.execute_aio(core.GET_SLIDE_AD_QUERY)
-    special = []
-    normal = []
-    if len(res) > 0 and len(res[0]) > 0:
-        for id_, img_path, url, special_flag in res:
-            slide_ad = {
-                'id': id_,
-                'img_path': img_path,
-                'url': url
-            }
-            if special_flag:
-                special.append(slide_ad)
-            else:
-                normal.append(slide_ad)
-    await request.app.redis.set('slide-ad-special', special)
-    await request.app.redis.set('slide-ad-normal', normal)
-    mzk.shuffle(normal)
-    special.extend(normal)
-    return json(special)
+    snapshot = request.app.snapshots.get('slide-ad')
+    if snapshot is None:
+        snapshot = await _load_slide_ad(request.app)
+    return raw(snapshot.render(), content_type='application/json')
 
 
 @root.route('/clear-cache', {'GET', 'POST', 'OPTIONS'})
 async def clear_cache(request: Request) -> HTTPResponse:
     check_root_pass(request)
-    await request.app.redis.delete('slide-ad-special')
-    await request.app.redis.delete('slide-ad-normal')
-    await request.app.redis.delete('news-info-special')
-    await request.app.redis.delete('news-info-normal')
+    await request.app.cache.delete('slide-ad', 'news-info', 'ai-info-list')
     return text('success.')
 
 
+_screen_name_list_cache = mzk.MocaResponseCache(version=lambda request: request.app.screen_name_list.version)
+
+
 @root.route('/screen-name-list', {'GET', 'POST', 'OPTIONS'})
+@_screen_name_list_cache
 async def screen_name_list(request: Request) -> HTTPResponse:
     return json(request.app.screen_name_list.list)
 
 
+_add_new_ai_args = mzk.compile_args(
+    ('name', str, None, {'max_length': 16}),
+    ('twitter', str, None, {'max_length': 32}),
+    ('img', str, None, {'max_length': 4096}),
+    ('icon', str, None, {'max_length': 4096}),
+    ('bg', str, None, {'max_length': 4096}),
+    ('url', str, None, {'max_length': 4096}),
+    ('first_word', str, None, {'max_length': 64}),
+    ('details', str, None, {'max_length': 512}),
+    ('password', str, None, {'max_length': 16}),
+)
+
+
 @root.route('/add-new-ai', {'GET', 'POST', 'OPTIONS'})
 async def add_new_ai(request: Request) -> HTTPResponse:
     check_root_pass(request)
-    name, twitter, img, icon, bg, url, first_word, details, password = mzk.get_args(
-        request,
-        ('name', str, None, {'max_length': 16}),
-        ('twitter', str, None, {'max_length': 32}),
-        ('img', str, None, {'max_length': 4096}),
-        ('icon', str, None, {'max_length': 4096}),
-        ('bg', str, None, {'max_length': 4096}),
-        ('url', str, None, {'max_length': 4096}),
-        ('first_word', str, None, {'max_length': 64}),
-        ('details', str, None, {'max_length': 512}),
-        ('password', str, None, {'max_length': 16}),
-    )
+    name, twitter, img, icon, bg, url, first_word, details, password = _add_new_ai_args(request)
     if twitter is None:
         raise Forbidden('twitter parameter format error.')
     if password is None:
@@ -204,28 +255,73 @@ async def add_new_ai(request: Request) -> HTTPResponse:
         (name, twitter, img, icon, bg, url, first_word, details, password),
         True,
     )
-    await request.app.redis.delete('ai-info-list')
+    await request.app.cache.delete('ai-info-list')
     return text('success.')
 
 
 @root.route('/get-ai-info-list', {'GET', 'POST', 'OPTIONS'})
 async def get_ai_info_list(request: Request) -> HTTPResponse:
-    res = await request.app.redis.get('ai-info-list', None)
-    if res is None:
-        res = await request.app.mysql.execute_aio(core.GET_AI_INFO_QUERY)
-        await request.app.redis.set('ai-info-list', res)
-    data = [{
-        'name': item[0],
-        'twitter': item[1],
-        'bot_name': item[0],
-        'img': item[2],
-        'icon': item[3],
-        'bg': item[4],
-        'url': item[5],
-        'first_word': item[6],
-        'details': item[7],
-    } for item in res]
-    mzk.shuffle(data)
-    return json(data)
+    snapshot = request.app.snapshots.get('ai-info-list')
+    if snapshot is None:
+        snapshot = await _load_ai_info_list(request.app)
+    return raw(snapshot.render(), content_type='application/json')
+
+
+_profiler_args = mzk.compile_args(
+    ('mode', str, None, {'is_in': ['sampling', 'request', 'stop', 'status']}),
+    ('duration', int, 30),
+    ('interval', int, 10),
+)
+
+
+@root.route('/profiler', {'GET', 'POST', 'OPTIONS'})
+async def profiler(request: Request) -> HTTPResponse:
+    """
+    Toggle the profilers of the worker that received this request, the profiles are written to the log directory.
+    sampling: sample the stacks every interval milliseconds of the cpu time for the duration (seconds).
+    request: profile the requests that have the Moca-Profile header (the root password) for the duration (seconds).
+    stop: stop both profilers.
+    """
+    check_root_pass(request)
+    mode, duration, interval = _profiler_args(request)
+    if mode is None:
+        raise Forbidden('mode parameter format error.')
+    duration = min(max(duration, 1), 3600)
+    sampling_profiler = request.app.sampling_profiler
+    request_profiler = request.app.request_profiler
+    file = None
+    if mode == 'sampling':
+        if sampling_profiler.running:
+            raise Forbidden('The sampling profiler is already running.')
+        sampling_profiler.start(min(max(interval, 1), 1000) / 1000, duration, request.app.loop)
+    elif mode == 'request':
+        request_profiler.enable(duration)
+    elif mode == 'stop':
+        request_profiler.disable()
+        path = sampling_profiler.stop()
+        file = None if path is None else path.name
+    return json({
+        'pid': mzk.get_my_pid(),
+        'file': file,
+        'sampling': sampling_profiler.status(),
+        'request': request_profiler.status(),
+    })
+
+
+@root.route('/metrics', {'GET', 'POST', 'OPTIONS'})
+async def metrics(request: Request) -> HTTPResponse:
+    """
+    Render the metrics of all workers in the prometheus text format.
+    This is an api path, the scraper must send an api key and the root password, its rate limits are applied.
+    """
+    check_root_pass(request)
+    return text(await request.app.metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# the response caches of this blueprint, their hit ratios are exported as metrics.
+response_caches: Dict[str, mzk.MocaResponseCache] = {
+    'configs': _configs_cache,
+    'screen-name-list': _screen_name_list_cache,
+}
 
 # -------------------------------------------------------------------------- Blueprint --
@@ -0,0 +1,121 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Dict, List, Optional
+)
+from orjson import dumps as orjson_dumps
+from ... import moca_modules as mzk
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Snapshot --------------------------------------------------------------------------
+
+
+class ListSnapshot:
+    """
+    A decoded copy of a list endpoint.
+    All items are encoded to json once, so a request only needs to shuffle and join them.
+    The encoded items are also cached in redis as str, so loading a snapshot doesn't need to build them,
+    and the cached value is saved as json instead of pickle.
+
+    Attributes
+    ----------
+    self.special: List[bytes]
+        the encoded items that always stay on the top of the list.
+    self.normal: List[bytes]
+        the encoded items that will be shuffled for every request.
+    """
+
+    __slots__ = ('special', 'normal')
+
+    def __init__(self, special: List[bytes], normal: List[bytes]):
+        """
+        :param special: the encoded items that always stay on the top of the list.
+        :param normal: the encoded items that will be shuffled for every request.
+        """
+        self.special: List[bytes] = special
+        self.normal: List[bytes] = normal
+
+    @staticmethod
+    def encode(special: List[dict], normal: List[dict]) -> List[List[str]]:
+        """Encode the items, the result can be cached and passed to the from_cache method."""
+        return [[orjson_dumps(item).decode() for item in special], [orjson_dumps(item).decode() for item in normal]]
+
+    @classmethod
+    def from_cache(cls, cache: List[List[str]]) -> 'ListSnapshot':
+        """Create a snapshot from the result of the encode method, the bytes cached by the old versions are kept."""
+        special, normal = cache
+        return cls(
+            [item if type(item) is bytes else item.encode() for item in special],
+            [item if type(item) is bytes else item.encode() for item in normal],
+        )
+
+    def render(self) -> bytes:
+        """Return the json body, the normal items are shuffled."""
+        normal = self.normal[:]
+        mzk.shuffle(normal)
+        return b'[' + b','.join(self.special + normal) + b']'
+
+
+class SnapshotStore:
+    """
+    The snapshots of list endpoints in this worker.
+    A snapshot is built from the value of the tiered cache that has the same name,
+    and it is removed with the local copy of the value. So deleting the value from the tiered cache also removes
+    the snapshots from all workers, and there is no other invalidation channel.
+
+    Attributes
+    ----------
+    self._cache: MocaTieredCache
+        the tiered cache that has the values of the snapshots.
+    self._snapshots: Dict[str, ListSnapshot]
+        the snapshots.
+    self._generation: Dict[str, int]
+        this number will be increased when the snapshot was removed.
+        a snapshot built before the removal will not be saved.
+    self.hits: Dict[str, int]
+        the number of the requests that used the snapshot.
+    self.misses: Dict[str, int]
+        the number of the requests that had to load the data.
+    """
+
+    ALL: str = mzk.MocaTieredCache.ALL
+
+    def __init__(self, cache: mzk.MocaTieredCache):
+        """
+        :param cache: the tiered cache that has the values of the snapshots.
+        """
+        self._cache: mzk.MocaTieredCache = cache
+        self._snapshots: Dict[str, ListSnapshot] = {}
+        self._generation: Dict[str, int] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        cache.add_drop_callback(self.drop)
+
+    def get(self, name: str) -> Optional[ListSnapshot]:
+        """Get the snapshot, if not exists or can't be trusted, return None."""
+        # while the cache is not listening the invalidation channel, the snapshots can't be trusted either.
+        snapshot = self._snapshots.get(name) if self._cache.subscribed else None
+        counter = self.misses if snapshot is None else self.hits
+        counter[name] = counter.get(name, 0) + 1
+        return snapshot
+
+    def generation(self, name: str) -> int:
+        """Get the current generation, pass it to put method after building the snapshot."""
+        return self._generation.get(name, 0)
+
+    def put(self, name: str, snapshot: ListSnapshot, generation: int) -> ListSnapshot:
+        """Save the snapshot, if it was not removed while building."""
+        if self._cache.subscribed and self._generation.get(name, 0) == generation:
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def drop(self, *names: str) -> None:
+        """Remove the snapshots from this worker, the ALL name removes all of them."""
+        if self.ALL in names:
+            names = tuple(set(self._generation.keys()) | set(self._snapshots.keys()))
+        for name in names:
+            self._generation[name] = self._generation.get(name, 0) + 1
+            self._snapshots.pop(name, None)
+
+# -------------------------------------------------------------------------- Snapshot --
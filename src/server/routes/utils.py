@@ -1,5 +1,6 @@
 # -- Imports --------------------------------------------------------------------------
 
+from hmac import compare_digest
 from sanic.request import Request
 from sanic.exceptions import Forbidden
 from ... import moca_modules as mzk
@@ -9,9 +10,14 @@ from ... import moca_modules as mzk
 # -- Utils --------------------------------------------------------------------------
 
 
+_get_root_pass = mzk.compile_args(('root_pass', str, None, {'max_length': 1024}))
+
+
 def check_root_pass(request: Request) -> None:
-    root_pass, *_ = mzk.get_args(request, ('root_pass', str, None, {'max_length': 1024}))
-    if root_pass != request.app.system_config.get_config('root_pass'):
+    root_pass, *_ = _get_root_pass(request)
+    expected = request.app.system_config.get_config('root_pass')
+    # compare in constant time, the time should not tell how many characters are correct.
+    if root_pass is None or expected is None or not compare_digest(root_pass.encode(), str(expected).encode()):
         raise Forbidden('Invalid root password.')
 
 # -------------------------------------------------------------------------- Utils --